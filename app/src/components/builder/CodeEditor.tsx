@@ -83,6 +83,13 @@ export default function CodeEditor({ component, onSave, onCancel }: CodeEditorPr
     }
   };
 
+  // Validate while typing; results are cached server-side by code hash
+  useEffect(() => {
+    if (!code.trim()) return;
+    const timer = setTimeout(handleValidate, 500);
+    return () => clearTimeout(timer);
+  }, [code]);
+
   const handleSave = async () => {
     if (!component.id) return;
     
@@ -23,6 +23,8 @@ interface DragDropBuilderProps {
 interface ComponentInstance {
   id: string
   componentId: string
+  // Pinned by the server on save; the page keeps this version when the component changes
+  componentVersion?: string
   type: "built-in" | "custom"
   props: Record<string, any>
 }
@@ -85,6 +87,7 @@ export default function DragDropBuilder({ content, onChange, websiteId }: DragDr
         const newInstance: ComponentInstance = {
           id: `${componentId}-${Date.now()}`,
           componentId: component.id!,
+          componentVersion: component.version,
           type: component.component_type as "built-in" | "custom",
           props: defaultProps,
         }
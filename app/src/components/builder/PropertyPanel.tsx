@@ -12,6 +12,7 @@ import { Badge } from "@/components/ui/badge"
 import { ImageIcon } from "lucide-react"
 import { mediaServiceGetUserMedia } from "@/lib/sdk"
 import type { Component, MediaAsset } from "@/lib/sdk"
+import { mediaThumbnailUrl } from "@/lib/utils"
 
 interface PropertyPanelProps {
   component: Component
@@ -167,7 +168,8 @@ export default function PropertyPanel({ component, instance, onPropsChange, webs
                           }}
                         >
                           <img
-                            src={asset.file_path || "/placeholder.svg"}
+                            src={mediaThumbnailUrl(asset) || "/placeholder.svg"}
+                            loading="lazy"
                             alt={asset.name}
                             className="w-full h-12 object-cover"
                           />
@@ -16,6 +16,7 @@ import {
   mediaServiceOrganizeMedia
 } from "@/lib/sdk";
 import type { MediaAsset } from "@/lib/sdk";
+import { mediaThumbnailUrl } from "@/lib/utils";
 
 export default function MediaLibrary() {
   const navigate = useNavigate();
@@ -321,7 +322,8 @@ export default function MediaLibrary() {
                   <div className="aspect-square bg-gray-100 rounded-lg mb-3 flex items-center justify-center overflow-hidden">
                     {asset.mime_type.startsWith('image/') ? (
                       <img 
-                        src={asset.file_path} 
+                        src={mediaThumbnailUrl(asset)} 
+                        loading="lazy"
                         alt={asset.alt_text || asset.name}
                         className="w-full h-full object-cover"
                       />
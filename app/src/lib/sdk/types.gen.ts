@@ -171,6 +171,26 @@ export type BodyWebsiteServiceUploadFavicon = {
     website_id: string;
 };
 
+export type BuiltInComponent = {
+    id: string;
+    user_id: string;
+    name: string;
+    description?: string | null;
+    category: string;
+    component_type: 'built-in';
+    code?: string;
+    styles?: string;
+    props_schema?: {
+        [key: string]: unknown;
+    };
+    preview_image_path?: string | null;
+    compiled_url?: string | null;
+    is_public?: boolean;
+    version: string;
+    created_at: string;
+    updated_at: string;
+};
+
 export type Component = {
     id?: string;
     user_id: string;
@@ -184,6 +204,7 @@ export type Component = {
         [key: string]: unknown;
     };
     preview_image_path?: string | null;
+    compiled_url?: string | null;
     is_public?: boolean;
     version?: string;
     created_at?: string;
@@ -201,11 +222,15 @@ export type MediaAsset = {
     name: string;
     original_filename: string;
     file_path: string;
+    content_hash?: string | null;
     file_size: number;
     mime_type: string;
     alt_text?: string | null;
     tags?: Array<string>;
     folder?: string | null;
+    derivatives?: {
+        [key: string]: unknown;
+    };
     created_at?: string;
     updated_at?: string;
 };
@@ -481,7 +506,7 @@ export type ComponentServiceGetBuiltInComponentsResponses = {
     /**
      * Successful Response
      */
-    200: Array<Component>;
+    200: Array<BuiltInComponent>;
 };
 
 export type ComponentServiceGetBuiltInComponentsResponse = ComponentServiceGetBuiltInComponentsResponses[keyof ComponentServiceGetBuiltInComponentsResponses];
@@ -1,6 +1,15 @@
 import { clsx, type ClassValue } from "clsx"
 import { twMerge } from "tailwind-merge"
+import { client } from "@/lib/sdk/client.gen"
+import type { MediaAsset } from "@/lib/sdk"
 
 export function cn(...inputs: ClassValue[]) {
   return twMerge(clsx(inputs))
 }
+
+// Small server-rendered thumbnail for an asset, falling back to the original file
+export function mediaThumbnailUrl(asset: MediaAsset): string {
+  const thumbnail = asset.derivatives?.thumbnail as { file_path?: string } | undefined
+  if (!thumbnail?.file_path) return asset.file_path
+  return `${client.getConfig().baseUrl ?? ""}${thumbnail.file_path}`
+}
@@ -0,0 +1,247 @@
+##############################################################################
+# Dependencies
+##############################################################################
+
+from email.utils import formatdate, parsedate_to_datetime
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Optional, Sequence
+import gzip
+import hashlib
+import time
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from solar.config import config
+from solar.media import PRESIGNED_URL_EXPIRY
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Encodings we can produce, in order of preference
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+# max-age for content that never changes at its URL (one year, the conventional maximum)
+IMMUTABLE_MAX_AGE = 31536000
+# Revision ETags of bodies holding presigned URLs change this often; half the URL lifetime leaves room for max-age
+PRESIGN_ETAG_WINDOW = PRESIGNED_URL_EXPIRY // 2
+
+##############################################################################
+# Conditional Requests
+##############################################################################
+
+
+def _identity_etag(etag: str) -> str:
+    """Strip the weak prefix and the content-coding suffix added by encoded_etag."""
+    etag = etag.strip().removeprefix("W/")
+    for encoding in ("br", "gzip"):
+        suffix = f'-{encoding}"'
+        if etag.endswith(suffix):
+            return etag[:-len(suffix)] + '"'
+    return etag
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Weak comparison of an If-None-Match header against an ETag, as RFC 9110 requires for GET.
+
+    Compressed representations carry their own ETag (see encoded_etag); they match the identity ETag here
+    since a 304 lets the client reuse whichever representation it has.
+    """
+    if if_none_match.strip() == "*":
+        return True
+    opaque = _identity_etag(etag)
+    for candidate in if_none_match.split(","):
+        if _identity_etag(candidate) == opaque:
+            return True
+    return False
+
+
+def is_not_modified(request: Request, etag: Optional[str] = None, last_modified: Optional[float] = None) -> bool:
+    """
+    Whether a GET/HEAD can be answered with 304.
+
+    If-None-Match takes precedence; If-Modified-Since is only consulted when the client sent no ETag.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag is not None and etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+    # HTTP dates have one-second resolution
+    return int(last_modified) <= since
+
+
+##############################################################################
+# ETags
+##############################################################################
+
+
+def content_etag(body: bytes) -> str:
+    """Strong ETag from a hash of the response body."""
+    return '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def revision_etag(content: Any, fields: Sequence[str] = ("id", "updated_at")) -> str:
+    """
+    Strong ETag from the revision fields of a model or list of models, so a 304 needs no serialization.
+
+    The fields must change whenever anything in the representation does; the model class is included so two
+    endpoints returning the same rows differently never share an ETag.
+    """
+    items: Iterable = content if isinstance(content, list) else [content]
+    digest = hashlib.sha256()
+    for item in items:
+        digest.update(type(item).__name__.encode())
+        for field in fields:
+            digest.update(b"\x1f" + str(getattr(item, field)).encode())
+        digest.update(b"\x1e")
+    return '"' + digest.hexdigest()[:32] + '"'
+
+
+def presigned_revision_etag(content: Any, url_field: str, fields: Sequence[str] = ("id", "updated_at")) -> str:
+    """
+    revision_etag for models that may carry a presigned URL in `url_field`.
+
+    Presigned URLs expire while the row revision stays the same, so when any item has one the ETag also names the
+    current PRESIGN_ETAG_WINDOW. A client revalidating a body keeps it through 304s only until the window ends, well
+    before the URLs in it expire, and then gets a body with freshly signed URLs.
+    """
+    etag = revision_etag(content, fields)
+    items: Iterable = content if isinstance(content, list) else [content]
+    if not any(getattr(item, url_field) for item in items):
+        return etag
+    window = int(time.time()) // PRESIGN_ETAG_WINDOW
+    return '"' + hashlib.sha256(f"{etag}:{window}".encode()).hexdigest()[:32] + '"'
+
+
+def encoded_etag(etag: str, encoding: Optional[str]) -> str:
+    """A compressed representation is different bytes, so a strong ETag must differ too."""
+    if encoding is None:
+        return etag
+    return etag[:-1] + f'-{encoding}"'
+
+##############################################################################
+# Compression
+##############################################################################
+
+
+def negotiate_encoding(request: Request) -> Optional[str]:
+    """The preferred supported content-coding the client accepts, or None for identity."""
+    accepted = {}
+    for part in request.headers.get("accept-encoding", "").split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if coding:
+            accepted[coding.lower()] = quality
+    for encoding in SUPPORTED_ENCODINGS:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=config.brotli_quality())
+    return gzip.compress(body, compresslevel=config.gzip_level())
+
+
+@lru_cache(maxsize=32)
+def precompress(body: bytes) -> Dict[str, bytes]:
+    """
+    Every supported encoding of a body that is served many times, compressed on first use.
+
+    Meant for long-lived bodies such as the built-in catalog; the cache holds them by value.
+    """
+    if len(body) < config.compression_min_bytes():
+        return {}
+    return {encoding: compress(body, encoding) for encoding in SUPPORTED_ENCODINGS}
+
+
+def encoded_response(
+    request: Request,
+    body: bytes,
+    etag: str,
+    media_type: str = "application/json",
+    headers: Optional[Dict[str, str]] = None,
+    precompressed: Optional[Dict[str, bytes]] = None,
+) -> Response:
+    """
+    A 200 response carrying the ETag, compressed when the client accepts it and the body is large enough.
+
+    `precompressed` maps encodings to bodies that were compressed ahead of time.
+    """
+    headers = _vary_on_encoding(headers)
+    encoding = None
+    if len(body) >= config.compression_min_bytes():
+        encoding = negotiate_encoding(request)
+    if encoding is not None:
+        if precompressed and encoding in precompressed:
+            body = precompressed[encoding]
+        else:
+            body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    headers["ETag"] = encoded_etag(etag, encoding)
+    return Response(content=body, media_type=media_type, headers=headers)
+
+
+def not_modified_response(etag: str, headers: Optional[Dict[str, str]] = None) -> Response:
+    return Response(status_code=304, headers={**_vary_on_encoding(headers), "ETag": etag})
+
+
+def _vary_on_encoding(headers: Optional[Dict[str, str]]) -> Dict[str, str]:
+    """Copy of the headers with Accept-Encoding added to any Vary the caller set."""
+    headers = dict(headers or {})
+    vary = [value.strip() for value in headers.get("Vary", "").split(",") if value.strip()]
+    if "accept-encoding" not in (value.lower() for value in vary):
+        vary.append("Accept-Encoding")
+    headers["Vary"] = ", ".join(vary)
+    return headers
+
+##############################################################################
+# Cache-Control
+##############################################################################
+
+
+def private_cache_headers(max_age: int = 0, immutable: bool = False) -> Dict[str, str]:
+    """
+    Headers for per-user responses: only the browser may store them, and with max_age=0 it revalidates every use.
+    `immutable` marks content that never changes at its URL, such as a component version.
+
+    Vary: Authorization keeps any cache that ignores `private` from serving one user's response to another.
+    """
+    cache_control = f"private, max-age={max_age}" if max_age > 0 else "private, no-cache"
+    if immutable:
+        cache_control += ", immutable"
+    return {"Cache-Control": cache_control, "Vary": "Authorization"}
+
+
+def public_cache_headers(max_age: int) -> Dict[str, str]:
+    """Headers for responses that are the same for every caller, so browsers, nginx and CDNs may share them."""
+    stale = config.cache_stale_while_revalidate()
+    return {"Cache-Control": f"public, max-age={max_age}, stale-while-revalidate={stale}"}
+
+
+def signed_url_cache_headers(expires: int) -> Dict[str, str]:
+    """
+    Headers for content behind a signed media URL. The content never changes at its URL, but caches may only keep
+    it until the signature expires, after which the URL stops working.
+    """
+    return {"Cache-Control": f"public, max-age={max(0, expires - int(time.time()))}, immutable"}
+
+
+def file_headers(size: int, mtime: float) -> Dict[str, str]:
+    return {"Content-Length": str(size), "Last-Modified": formatdate(mtime, usegmt=True)}
@@ -0,0 +1,126 @@
+##############################################################################
+# Dependencies
+##############################################################################
+
+from pathlib import Path
+import json
+import logging
+import sys
+import traceback
+
+from loguru import logger
+
+from solar.config import config
+
+# Packages whose standard-library loggers log at API_LOG_LEVEL
+APP_LOGGERS = ("solar", "core", "api")
+
+##############################################################################
+# Formats
+##############################################################################
+
+
+def format_record(record):
+    fmt = "{level:<5} | {message}"
+    if record["exception"] is not None:
+        exc_type, exc_value, exc_traceback = record["exception"]
+        tb_lines = traceback.extract_tb(exc_traceback)
+        if tb_lines:
+            last_frame = tb_lines[-1]
+            error_info = (
+                f'\nFile "{last_frame.filename}", line {last_frame.lineno}, in {last_frame.name}\n'
+                f'  {last_frame.line}\n'
+                f'{exc_type.__name__}: {exc_value}'
+            )
+            record["message"] += error_info
+
+        record["exception"] = None
+
+    return fmt + "\n"
+
+
+def format_json_record(record):
+    """One JSON object per line. The line is built here and substituted whole, so braces in it aren't re-parsed."""
+    entry = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "message": record["message"],
+        "logger": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+    }
+    entry.update({key: value for key, value in record["extra"].items() if key != "json"})
+    if record["exception"] is not None:
+        exc_type, exc_value, exc_traceback = record["exception"]
+        entry["exception"] = "".join(traceback.format_exception(exc_type, exc_value, exc_traceback))
+    record["extra"]["json"] = json.dumps(entry, default=str)
+    return "{extra[json]}\n"
+
+##############################################################################
+# Interception
+##############################################################################
+
+# need this to capture print statements
+class InterceptHandler:
+    def write(self, msg):
+        if msg.strip():
+            logger.info(msg.strip())
+
+    def flush(self):
+        pass
+
+
+class StdlibInterceptHandler(logging.Handler):
+    """Routes records from the standard logging module (used by solar and core) into loguru's sinks."""
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            level = logger.level(record.levelname).name
+        except ValueError:
+            level = record.levelno
+        logger.opt(depth=6, exception=record.exc_info).log(level, record.getMessage())
+
+##############################################################################
+# Setup
+##############################################################################
+
+
+def configure_logging():
+    """
+    Install the API's log sinks as configured by API_LOG_LEVEL, LIBRARY_LOG_LEVEL, LOG_FORMAT, LOG_FILE,
+    LOG_TO_STDERR and LOG_CAPTURE_STDOUT.
+
+    Sinks are enqueued: records are formatted by the caller and written by a background thread, so a slow disk or
+    terminal never holds up a request.
+    """
+    level = config.log_level()
+    format_func = format_json_record if config.log_format() == "json" else format_record
+
+    logger.remove()
+    if config.log_to_stderr():
+        logger.add(
+            sys.stderr,
+            level=level,
+            format=format_func,
+            colorize=config.log_format() != "json",
+            enqueue=True
+        )
+
+    log_file = config.log_file()
+    if log_file is not None:
+        Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+        logger.add(
+            log_file,
+            rotation="50 MB",
+            retention="10 days",
+            level=level,
+            format=format_func,
+            enqueue=True
+        )
+
+    # Other libraries only reach the sinks from LIBRARY_LOG_LEVEL up; the app's own loggers follow API_LOG_LEVEL
+    logging.basicConfig(handlers=[StdlibInterceptHandler()], level=config.library_log_level(), force=True)
+    for name in APP_LOGGERS:
+        logging.getLogger(name).setLevel(level)
+    if config.log_capture_stdout():
+        sys.stdout = InterceptHandler()
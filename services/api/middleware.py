@@ -0,0 +1,152 @@
+##############################################################################
+# Dependencies
+##############################################################################
+
+from typing import Callable, Dict, List, Tuple
+import json
+import random
+import time
+import uuid
+
+from limits import parse
+from limits.storage import MemoryStorage
+from limits.strategies import FixedWindowRateLimiter
+from loguru import logger
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from solar import context as request_context
+from solar.config import config
+
+##############################################################################
+# Request Middleware
+##############################################################################
+
+AUTH_PATH_PREFIX = "/api/auth"
+AUTH_CORS_HEADERS = {
+    "Access-Control-Allow-Credentials": "true",
+    "Access-Control-Allow-Methods": "GET, POST, OPTIONS",
+    "Access-Control-Allow-Headers": "Authorization, Content-Type, Accept",
+    "Access-Control-Expose-Headers": "Set-Cookie",
+}
+
+
+class RequestMiddleware:
+    """
+    Request id, deadline, timing log, auth-route CORS and rate limiting in a single pure ASGI layer.
+
+    Unlike @app.middleware("http"), nothing here wraps the request or response body, so streaming responses
+    pass straight through and the per-request cost is a few dict operations.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        get_auth_origins: Callable[[], List[str]],
+        rate_limits: Dict[Tuple[str, str], str],
+    ):
+        self.app = app
+        self.get_auth_origins = get_auth_origins
+        self.rate_limits = {route: parse(limit) for route, limit in rate_limits.items()}
+        self.rate_limiter = FixedWindowRateLimiter(MemoryStorage())
+        self.log_sample_rate = config.log_request_sample_rate()
+        self.log_slow_seconds = config.log_slow_request_ms() / 1000
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method, path = scope["method"], scope["path"]
+        request_id = str(uuid.uuid4())[:8]
+        # Copied into executor threads along with the loguru context, so the service layer sees both
+        request_id_token = request_context.request_id.set(request_id)
+        deadline_token = request_context.set_deadline(config.request_timeout())
+        start_time = time.perf_counter()
+        status_code = None
+
+        is_auth_route = path.startswith(AUTH_PATH_PREFIX)
+        auth_origin = None
+        if is_auth_route:
+            origin = _header(scope, b"origin")
+            auth_origin = origin if origin in self.get_auth_origins() else ""
+
+        body_received = False
+
+        async def receive_wrapper() -> Message:
+            nonlocal body_received
+            message = await receive()
+            # The deadline covers the work done for the request, not the client's upload: it restarts once the whole
+            # body is in, so a slow multipart upload doesn't leave the service layer without time
+            if message["type"] == "http.request" and not message.get("more_body", False) and not body_received:
+                body_received = True
+                request_context.set_deadline(config.request_timeout())
+            return message
+
+        async def send_wrapper(message: Message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if is_auth_route:
+                    _apply_auth_cors(MutableHeaders(scope=message), auth_origin)
+            await send(message)
+
+        try:
+            with logger.contextualize(request_id=request_id):
+                limit = self.rate_limits.get((method, path))
+                if limit is not None and not self.rate_limiter.hit(limit, _client_host(scope), method, path):
+                    await _send_json(send_wrapper, 429, {"error": f"Rate limit exceeded: {limit}"})
+                else:
+                    await self.app(scope, receive_wrapper, send_wrapper)
+                process_time = time.perf_counter() - start_time
+                if not (method == "HEAD" and path == "/docs") and self._should_log(status_code, process_time):
+                    logger.info(f"{method} {path} ({status_code}) - {process_time:.3f}s")
+        except Exception:
+            process_time = time.perf_counter() - start_time
+            with logger.contextualize(request_id=request_id):
+                logger.exception(f"{method} {path} - Failed after {process_time:.3f}s")
+            raise
+        finally:
+            request_context.request_deadline.reset(deadline_token)
+            request_context.request_id.reset(request_id_token)
+
+    def _should_log(self, status_code: int, process_time: float) -> bool:
+        """Errors and slow requests are always logged; the rest are sampled at LOG_REQUEST_SAMPLE_RATE."""
+        if status_code is None or status_code >= 400 or process_time >= self.log_slow_seconds:
+            return True
+        return random.random() < self.log_sample_rate
+
+
+def _header(scope: Scope, name: bytes) -> str:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return ""
+
+
+def _client_host(scope: Scope) -> str:
+    client = scope.get("client")
+    return client[0] if client else "127.0.0.1"
+
+
+def _apply_auth_cors(headers: MutableHeaders, origin: str):
+    """Replace the app-wide CORS headers with strict origin checking on auth routes."""
+    if origin:
+        headers["Access-Control-Allow-Origin"] = origin
+        for key, value in AUTH_CORS_HEADERS.items():
+            headers[key] = value
+    else:
+        # unauthorized origins on auth routes, set CORS headers to blank
+        headers["Access-Control-Allow-Origin"] = ""
+        headers["Access-Control-Allow-Methods"] = ""
+        headers["Access-Control-Allow-Headers"] = ""
+
+
+async def _send_json(send: Send, status_code: int, content: Dict):
+    body = json.dumps(content).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status_code,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -6,7 +6,6 @@
 
 from fastapi import Depends, FastAPI, HTTPException, Request, status, Body, UploadFile, File, Form
 from fastapi.staticfiles import StaticFiles
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import HTMLResponse, Response
 
 from fastapi.middleware.cors import CORSMiddleware
@@ -38,6 +37,8 @@ from solar.access import User
 from solar.media import MediaFile
 
 from api.utils import get_swagger_ui_html
+from api.middleware import RequestMiddleware
+from api.logging_config import configure_logging
 from api.models import TokenExchangeRequest, TokenResponse, TokenValidationRequest, LogoutResponse
 
 OPENROUTER_API_KEY = os.environ.get("OPENROUTER_API_KEY")
@@ -50,7 +51,7 @@ REFRESH_TOKEN_COOKIE_NAME = "refresh_token"
 
 
 
-from .models import BodyWebsiteServiceCreateWebsite, CreateWebsiteOutputSchema, GetUserWebsitesOutputSchema, BodyWebsiteServiceGetWebsite, GetWebsiteOutputSchema, BodyWebsiteServiceUpdateWebsite, UpdateWebsiteOutputSchema, UploadFaviconOutputSchema, BodyWebsiteServiceDeleteWebsite, DeleteWebsiteOutputSchema, BodyWebsiteServicePublishWebsite, PublishWebsiteOutputSchema, BodyComponentServiceCreateCustomComponent, CreateCustomComponentOutputSchema, BodyComponentServiceGetUserComponents, GetUserComponentsOutputSchema, GetBuiltInComponentsOutputSchema, BodyComponentServiceGetPublicComponents, GetPublicComponentsOutputSchema, BodyComponentServiceGetComponent, GetComponentOutputSchema, BodyComponentServiceUpdateComponent, UpdateComponentOutputSchema, UploadComponentPreviewOutputSchema, BodyComponentServiceDeleteComponent, DeleteComponentOutputSchema, BodyComponentServiceValidateComponentCode, ValidateComponentCodeOutputSchema, UploadMediaOutputSchema, BodyMediaServiceGetUserMedia, GetUserMediaOutputSchema, BodyMediaServiceGetMediaAsset, GetMediaAssetOutputSchema, BodyMediaServiceUpdateMediaMetadata, UpdateMediaMetadataOutputSchema, BodyMediaServiceDeleteMediaAsset, DeleteMediaAssetOutputSchema, BodyMediaServiceOrganizeMedia, OrganizeMediaOutputSchema, BodyPageServiceCreatePage, CreatePageOutputSchema, BodyPageServiceGetWebsitePages, GetWebsitePagesOutputSchema, BodyPageServiceGetPage, GetPageOutputSchema, BodyPageServiceUpdatePageContent, UpdatePageContentOutputSchema, BodyPageServiceUpdatePageMetadata, UpdatePageMetadataOutputSchema, BodyPageServiceUpdatePageStyles, UpdatePageStylesOutputSchema, BodyPageServicePublishPage, PublishPageOutputSchema, BodyPageServiceDeletePage, DeletePageOutputSchema, BodyPageServiceReorderPages, ReorderPagesOutputSchema
+from .models import BodyWebsiteServiceCreateWebsite, CreateWebsiteOutputSchema, GetUserWebsitesOutputSchema, BodyWebsiteServiceGetWebsite, GetWebsiteOutputSchema, BodyWebsiteServiceUpdateWebsite, UpdateWebsiteOutputSchema, UploadFaviconOutputSchema, BodyWebsiteServiceDeleteWebsite, DeleteWebsiteOutputSchema, BodyWebsiteServicePublishWebsite, PublishWebsiteOutputSchema, BodyComponentServiceCreateCustomComponent, CreateCustomComponentOutputSchema, BodyComponentServiceGetUserComponents, GetUserComponentsOutputSchema, GetBuiltInComponentsOutputSchema, BodyComponentServiceGetPublicComponents, GetPublicComponentsOutputSchema, BodyComponentServiceGetComponent, GetComponentOutputSchema, BodyComponentServiceUpdateComponent, UpdateComponentOutputSchema, UploadComponentPreviewOutputSchema, BodyComponentServiceDeleteComponent, DeleteComponentOutputSchema, BodyComponentServiceValidateComponentCode, ValidateComponentCodeOutputSchema, UploadMediaOutputSchema, BodyMediaServiceGetUserMedia, GetUserMediaOutputSchema, BodyMediaServiceGetMediaAsset, GetMediaAssetOutputSchema, BodyMediaServiceGetMediaUrl, GetMediaUrlOutputSchema, BodyMediaServiceUpdateMediaMetadata, UpdateMediaMetadataOutputSchema, BodyMediaServiceDeleteMediaAsset, DeleteMediaAssetOutputSchema, BodyMediaServiceDeleteMediaAssets, DeleteMediaAssetsOutputSchema, BodyMediaServiceOrganizeMedia, OrganizeMediaOutputSchema, BodyPageServiceCreatePage, CreatePageOutputSchema, BodyPageServiceGetWebsitePages, GetWebsitePagesOutputSchema, BodyPageServiceGetPage, GetPageOutputSchema, BodyPageServiceUpdatePageContent, UpdatePageContentOutputSchema, BodyPageServiceUpdatePageMetadata, UpdatePageMetadataOutputSchema, BodyPageServiceUpdatePageStyles, UpdatePageStylesOutputSchema, BodyPageServicePublishPage, PublishPageOutputSchema, BodyPageServiceDeletePage, DeletePageOutputSchema, BodyPageServiceReorderPages, ReorderPagesOutputSchema
 
 
 ###############################################################################
@@ -62,51 +63,7 @@ from pathlib import Path
 from typing import TypeVar
 import traceback
 
-def format_record(record):
-    fmt = "{level:<5} | {message}"
-    if record["exception"] is not None:
-        exc_type, exc_value, exc_traceback = record["exception"]        
-        tb_lines = traceback.extract_tb(exc_traceback)
-        if tb_lines:
-            last_frame = tb_lines[-1]
-            error_info = (
-                f'\nFile "{last_frame.filename}", line {last_frame.lineno}, in {last_frame.name}\n'
-                f'  {last_frame.line}\n'
-                f'{exc_type.__name__}: {exc_value}'
-            )
-            record["message"] += error_info
-        
-        record["exception"] = None
-    
-    return fmt + "\n"
-
-logger.remove()
-logger.add(
-    sys.stderr,
-    level="DEBUG",
-    format=format_record,
-    colorize=True
-)
-
-Path("../logs").mkdir(exist_ok=True)
-logger.add(
-    "../logs/fast_api.log",
-    rotation="50 MB",
-    retention="10 days",
-    level="DEBUG",
-    format=format_record
-)
-
-# need this to capture print statements
-class InterceptHandler:
-    def write(self, msg):
-        if msg.strip():
-            logger.info(msg.strip())
-    
-    def flush(self):
-        pass
-
-sys.stdout = InterceptHandler()
+configure_logging()
 
 T = TypeVar('T')
 
@@ -121,28 +78,6 @@ app = FastAPI(
     docs_url=None
 )
 
-###############################################################################
-# Simple Request Logging Middleware
-###############################################################################
-
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    request_id = str(uuid.uuid4())[:8]
-    
-    with logger.contextualize(request_id=request_id):
-        start_time = datetime.utcnow()
-        
-        try:
-            response = await call_next(request)
-            process_time = (datetime.utcnow() - start_time).total_seconds()
-            if "HEAD /docs" not in request.url.path:
-              logger.info(f"{request.method} {request.url.path} ({response.status_code}) - {process_time:.3f}s")
-            return response
-        except Exception as e:
-            process_time = (datetime.utcnow() - start_time).total_seconds()
-            logger.exception(f"{request.method} {request.url.path} - Failed after {process_time:.3f}s")
-            raise
-            
 ###############################################################################
 # Error Handler
 ###############################################################################
@@ -213,31 +148,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-async def auth_cors_middleware(request: Request, call_next):
-    if request.url.path.startswith("/api/auth"):
-        auth_origins = get_auth_origins()
-        origin = request.headers.get("origin", "")
-        response = await call_next(request)
-        
-        # override the wildcard CORS settings with strict origin checking
-        if origin in auth_origins:
-            response.headers["Access-Control-Allow-Origin"] = origin
-            response.headers["Access-Control-Allow-Credentials"] = "true"
-            response.headers["Access-Control-Allow-Methods"] = "GET, POST, OPTIONS"
-            response.headers["Access-Control-Allow-Headers"] = "Authorization, Content-Type, Accept"
-            response.headers["Access-Control-Expose-Headers"] = "Set-Cookie"
-        else:
-            # unauthorized origins on auth routes, set CORS headers to blank or remove them
-            response.headers["Access-Control-Allow-Origin"] = ""
-            response.headers["Access-Control-Allow-Methods"] = ""
-            response.headers["Access-Control-Allow-Headers"] = ""
-            
-        return response
-    else:
-        return await call_next(request)
-
-# auth-specific middleware and logging middleware
-app.middleware("http")(auth_cors_middleware)
+# Request id, timing and auth-route CORS; added last so it wraps CORSMiddleware
+app.add_middleware(
+    RequestMiddleware,
+    get_auth_origins=get_auth_origins,
+    rate_limits={}
+)
 
 # OPTIONS handler for auth endpoints
 @app.options("/api/auth/{rest_of_path:path}", include_in_schema=False)
@@ -674,6 +590,16 @@ async def media_service_get_media_asset(body: BodyMediaServiceGetMediaAsset = Bo
 
 
 
+@app.post('/api/media_service/get_media_url', response_model=GetMediaUrlOutputSchema, operation_id='media_service_get_media_url')
+async def media_service_get_media_url(body: BodyMediaServiceGetMediaUrl = Body(...), current_user: User = Depends(get_current_user)) -> GetMediaUrlOutputSchema:
+    """
+    Get a presigned URL for the best derivative of a media asset, plus srcsets per format.
+    """
+    pass
+
+
+
+
 @app.post('/api/media_service/update_media_metadata', response_model=UpdateMediaMetadataOutputSchema, operation_id='media_service_update_media_metadata')
 async def media_service_update_media_metadata(body: BodyMediaServiceUpdateMediaMetadata = Body(...), current_user: User = Depends(get_current_user)) -> UpdateMediaMetadataOutputSchema:
     """
@@ -694,6 +620,16 @@ async def media_service_delete_media_asset(body: BodyMediaServiceDeleteMediaAsse
 
 
 
+@app.post('/api/media_service/delete_media_assets', response_model=DeleteMediaAssetsOutputSchema, operation_id='media_service_delete_media_assets')
+async def media_service_delete_media_assets(body: BodyMediaServiceDeleteMediaAssets = Body(...), current_user: User = Depends(get_current_user)) -> DeleteMediaAssetsOutputSchema:
+    """
+    Delete many media assets and their files, reporting assets and objects that could not be removed.
+    """
+    pass
+
+
+
+
 @app.post('/api/media_service/organize_media', response_model=OrganizeMediaOutputSchema, operation_id='media_service_organize_media')
 async def media_service_organize_media(body: BodyMediaServiceOrganizeMedia = Body(...), current_user: User = Depends(get_current_user)) -> OrganizeMediaOutputSchema:
     """
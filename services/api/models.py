@@ -25,9 +25,16 @@ class LogoutResponse(BaseModel):
 
 # Import user-defined models that we need for input/response models
 from core.media_asset import MediaAsset
+from core.media_service import MAX_BULK_MEDIA_ASSETS
+from core.media_transforms import TransformParams
 from core.page import Page
 from core.website import Website
 from core.component import Component
+from core.component_search import ComponentSearchResult
+from core.component_version import ComponentVersion
+from core.built_in_components import BuiltInComponent, BuiltInComponentVersion
+from core.component_usage import ComponentUsage
+from core.component_transfer import ImportResult
 
 class BodyWebsiteServiceCreateWebsite(BaseModel):
   name: str
@@ -70,7 +77,7 @@ class BodyComponentServiceGetUserComponents(BaseModel):
   category: Optional[str] = None
 
 GetUserComponentsOutputSchema = List[Component]
-GetBuiltInComponentsOutputSchema = List[Component]
+GetBuiltInComponentsOutputSchema = List[BuiltInComponent]
 class BodyComponentServiceGetPublicComponents(BaseModel):
   category: Optional[str] = None
 
@@ -79,6 +86,14 @@ class BodyComponentServiceGetComponent(BaseModel):
   component_id: UUID
 
 GetComponentOutputSchema = Component
+class BodyComponentServiceSearchComponents(BaseModel):
+  query: Optional[str] = None
+  category: Optional[str] = None
+  mine_only: bool = False
+  page: int = Field(1, ge=1)
+  page_size: int = Field(24, ge=1, le=100)
+
+SearchComponentsOutputSchema = ComponentSearchResult
 class BodyComponentServiceUpdateComponent(BaseModel):
   component_id: UUID
   name: Optional[str] = None
@@ -87,8 +102,24 @@ class BodyComponentServiceUpdateComponent(BaseModel):
   styles: Optional[str] = None
   props_schema: Optional[Dict] = None
   is_public: Optional[bool] = None
+  bump: Optional[Literal["major", "minor", "patch"]] = None
 
 UpdateComponentOutputSchema = Component
+class BodyComponentServiceGetComponentVersions(BaseModel):
+  component_id: UUID
+
+GetComponentVersionsOutputSchema = List[ComponentVersion]
+class BodyComponentServiceGetComponentVersion(BaseModel):
+  component_id: str
+  version: str = Field(pattern=r"^\d+\.\d+\.\d+$")
+
+GetComponentVersionOutputSchema = Union[ComponentVersion, BuiltInComponentVersion]
+class BodyComponentServiceGetComponentUsage(BaseModel):
+  component_id: str
+  version: Optional[str] = None
+
+GetComponentUsageOutputSchema = List[Dict]
+ImportComponentsOutputSchema = ImportResult
 UploadComponentPreviewOutputSchema = Component
 class BodyComponentServiceDeleteComponent(BaseModel):
   component_id: UUID
@@ -109,6 +140,16 @@ class BodyMediaServiceGetMediaAsset(BaseModel):
   asset_id: UUID
 
 GetMediaAssetOutputSchema = MediaAsset
+class BodyMediaServiceGetMediaUrl(BaseModel):
+  asset_id: UUID
+  width: Optional[int] = None
+  mime_types: Optional[List[str]] = None
+
+GetMediaUrlOutputSchema = Dict
+class BodyMediaServiceGetMediaTransformUrl(TransformParams):
+  asset_id: UUID
+
+GetMediaTransformUrlOutputSchema = Dict
 class BodyMediaServiceUpdateMediaMetadata(BaseModel):
   asset_id: UUID
   name: Optional[str] = None
@@ -121,8 +162,12 @@ class BodyMediaServiceDeleteMediaAsset(BaseModel):
   asset_id: UUID
 
 DeleteMediaAssetOutputSchema = bool
+class BodyMediaServiceDeleteMediaAssets(BaseModel):
+  asset_ids: List[UUID] = Field(max_length=MAX_BULK_MEDIA_ASSETS)
+
+DeleteMediaAssetsOutputSchema = Dict
 class BodyMediaServiceOrganizeMedia(BaseModel):
-  asset_ids: List[UUID]
+  asset_ids: List[UUID] = Field(max_length=MAX_BULK_MEDIA_ASSETS)
   target_folder: Optional[str] = None
 
 OrganizeMediaOutputSchema = List[MediaAsset]
@@ -146,6 +191,10 @@ class BodyPageServiceUpdatePageContent(BaseModel):
   content_structure: Dict
 
 UpdatePageContentOutputSchema = Page
+class BodyPageServiceGetPageComponents(BaseModel):
+  page_id: UUID
+
+GetPageComponentsOutputSchema = List[ComponentUsage]
 class BodyPageServiceUpdatePageMetadata(BaseModel):
   page_id: UUID
   title: Optional[str] = None
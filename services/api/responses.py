@@ -0,0 +1,74 @@
+##############################################################################
+# Dependencies
+##############################################################################
+
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from pydantic import TypeAdapter
+from starlette.requests import Request
+from starlette.responses import Response
+
+from api.http_cache import content_etag, encoded_response, is_not_modified, not_modified_response, precompress
+from solar.config import config
+
+##############################################################################
+# Fast JSON Responses
+##############################################################################
+
+
+@lru_cache(maxsize=None)
+def get_adapter(schema: Any) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+def fast_json_response(content: Any, schema: Any) -> Any:
+    """
+    Serialize trusted service output straight to JSON bytes with pydantic-core.
+
+    Returning a Response makes FastAPI skip response_model validation and jsonable_encoder, which otherwise dump,
+    re-validate and re-encode every model (including large content_structure and props_schema dicts). The
+    response_model stays on the route for the OpenAPI schema. With FAST_JSON_RESPONSES=false the content is
+    returned unchanged and goes through FastAPI's default path.
+    """
+    if not config.fast_json_responses():
+        return content
+    return Response(content=get_adapter(schema).dump_json(content), media_type="application/json")
+
+
+def conditional_json_response(
+    request: Request,
+    content: Any,
+    schema: Any,
+    etag: Optional[str] = None,
+    headers: Optional[Dict[str, str]] = None,
+) -> Response:
+    """
+    Answer with 304 when the client's If-None-Match still matches, otherwise a compressed JSON body.
+
+    Pass an `etag` derived from row revisions (see http_cache.revision_etag) so the 304 path never serializes;
+    without one the ETag is a hash of the serialized body. `headers` (typically Cache-Control and Vary) are sent on
+    both the 200 and the 304.
+    """
+    if etag is not None and is_not_modified(request, etag):
+        return not_modified_response(etag, headers)
+    body = get_adapter(schema).dump_json(content)
+    if etag is None:
+        etag = content_etag(body)
+        if is_not_modified(request, etag):
+            return not_modified_response(etag, headers)
+    return encoded_response(request, body, etag, headers=headers)
+
+
+def encoded_json_response(
+    request: Request, body: bytes, etag: str, headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """Serve a JSON body that was serialized ahead of time, e.g. the built-in catalog, with its precomputed ETag."""
+    if is_not_modified(request, etag):
+        return not_modified_response(etag, headers)
+    return encoded_response(request, body, etag, headers=headers, precompressed=precompress(body))
+
+
+def cached_json_response(content: Any, schema: Any, headers: Dict[str, str]) -> Response:
+    """JSON response with caching headers but no ETag, for content that differs on every call (presigned URLs)."""
+    return Response(content=get_adapter(schema).dump_json(content), media_type="application/json", headers=headers)
@@ -4,44 +4,54 @@
 ##############################################################################
 
 
-from fastapi import Depends, FastAPI, HTTPException, Request, status, Body, UploadFile, File, Form
+from fastapi import Depends, FastAPI, HTTPException, Request, status, Body, UploadFile, File, Form, Query
 from fastapi.staticfiles import StaticFiles
-from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.responses import HTMLResponse, Response
-from slowapi import Limiter, _rate_limit_exceeded_handler
-from slowapi.util import get_remote_address
-from slowapi.errors import RateLimitExceeded
-import re
 
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse, HTMLResponse, Response
+from fastapi.responses import JSONResponse, FileResponse, HTMLResponse, PlainTextResponse, Response, StreamingResponse
 from fastapi.exceptions import RequestValidationError
 from fastapi.security import OAuth2PasswordBearer
 
 import sys
 import os
 import asyncio
+import threading
 import logging
 import traceback
 import contextvars
 import httpx
 import jwt
 import json
-import requests
+import hashlib
+import random
+import time
 from pathlib import Path
 import builtins
 
-from datetime import datetime, date, time, timedelta
+from datetime import datetime, date, timedelta
 from concurrent.futures import ThreadPoolExecutor
 from typing import Callable, Any, TypeVar, Awaitable, List, Optional, Dict, Union, Literal, Annotated, Tuple, Set
 from functools import partial, wraps
+from contextlib import asynccontextmanager
 from uuid import UUID
 import uuid
 
 from solar.access import User
-from solar.media import MediaFile
+from solar import context as request_context
+from solar.auth import run_key_rotation, verify_token_locally
+from solar.cache import TieredCache
+from solar.executors import BULK, CPU, DB_HEAVY, DB_LIGHT, STORAGE, ExecutorOverloaded, get_executor, render_prometheus, shutdown_executors
+from solar.config import config
+from solar.disk_cache import iter_file
+from solar.http import close_clients, get_async_client, request_with_retry
+from solar.media import MediaFile, MEDIA_CHUNK_SIZE
 
 from api.utils import get_swagger_ui_html
+from api.middleware import RequestMiddleware
+from api.logging_config import configure_logging
+from api.http_cache import IMMUTABLE_MAX_AGE, file_headers, is_not_modified, presigned_revision_etag, private_cache_headers, public_cache_headers, revision_etag, signed_url_cache_headers
+from api.responses import cached_json_response, conditional_json_response, encoded_json_response, fast_json_response
 from api.models import TokenExchangeRequest, TokenResponse, TokenValidationRequest, LogoutResponse
 
 OPENROUTER_API_KEY = os.environ.get("OPENROUTER_API_KEY")
@@ -50,8 +60,14 @@ SOLAR_APP_TOKEN_URL = f"{ROUTER_BASE_URL}/innerApp/oauth2/token"
 SOLAR_APP_INTROSPECT_URL = f"{ROUTER_BASE_URL}/innerApp/oauth2/introspect"
 REFRESH_TOKEN_COOKIE_NAME = "refresh_token"
 
-from .models import BodyWebsiteServiceCreateWebsite, CreateWebsiteOutputSchema, GetUserWebsitesOutputSchema, BodyWebsiteServiceGetWebsite, GetWebsiteOutputSchema, BodyWebsiteServiceUpdateWebsite, UpdateWebsiteOutputSchema, UploadFaviconOutputSchema, BodyWebsiteServiceDeleteWebsite, DeleteWebsiteOutputSchema, BodyWebsiteServicePublishWebsite, PublishWebsiteOutputSchema, BodyComponentServiceCreateCustomComponent, CreateCustomComponentOutputSchema, BodyComponentServiceGetUserComponents, GetUserComponentsOutputSchema, GetBuiltInComponentsOutputSchema, BodyComponentServiceGetPublicComponents, GetPublicComponentsOutputSchema, BodyComponentServiceGetComponent, GetComponentOutputSchema, BodyComponentServiceUpdateComponent, UpdateComponentOutputSchema, UploadComponentPreviewOutputSchema, BodyComponentServiceDeleteComponent, DeleteComponentOutputSchema, BodyComponentServiceValidateComponentCode, ValidateComponentCodeOutputSchema, UploadMediaOutputSchema, BodyMediaServiceGetUserMedia, GetUserMediaOutputSchema, BodyMediaServiceGetMediaAsset, GetMediaAssetOutputSchema, BodyMediaServiceUpdateMediaMetadata, UpdateMediaMetadataOutputSchema, BodyMediaServiceDeleteMediaAsset, DeleteMediaAssetOutputSchema, BodyMediaServiceOrganizeMedia, OrganizeMediaOutputSchema, BodyPageServiceCreatePage, CreatePageOutputSchema, BodyPageServiceGetWebsitePages, GetWebsitePagesOutputSchema, BodyPageServiceGetPage, GetPageOutputSchema, BodyPageServiceUpdatePageContent, UpdatePageContentOutputSchema, BodyPageServiceUpdatePageMetadata, UpdatePageMetadataOutputSchema, BodyPageServiceUpdatePageStyles, UpdatePageStylesOutputSchema, BodyPageServicePublishPage, PublishPageOutputSchema, BodyPageServiceDeletePage, DeletePageOutputSchema, BodyPageServiceReorderPages, ReorderPagesOutputSchema
+from .models import BodyWebsiteServiceCreateWebsite, CreateWebsiteOutputSchema, GetUserWebsitesOutputSchema, BodyWebsiteServiceGetWebsite, GetWebsiteOutputSchema, BodyWebsiteServiceUpdateWebsite, UpdateWebsiteOutputSchema, UploadFaviconOutputSchema, BodyWebsiteServiceDeleteWebsite, DeleteWebsiteOutputSchema, BodyWebsiteServicePublishWebsite, PublishWebsiteOutputSchema, BodyComponentServiceCreateCustomComponent, CreateCustomComponentOutputSchema, BodyComponentServiceGetUserComponents, GetUserComponentsOutputSchema, GetBuiltInComponentsOutputSchema, BodyComponentServiceGetPublicComponents, GetPublicComponentsOutputSchema, BodyComponentServiceGetComponent, GetComponentOutputSchema, BodyComponentServiceSearchComponents, SearchComponentsOutputSchema, BodyComponentServiceUpdateComponent, UpdateComponentOutputSchema, BodyComponentServiceGetComponentVersions, GetComponentVersionsOutputSchema, BodyComponentServiceGetComponentVersion, GetComponentVersionOutputSchema, BodyComponentServiceGetComponentUsage, GetComponentUsageOutputSchema, ImportComponentsOutputSchema, UploadComponentPreviewOutputSchema, BodyComponentServiceDeleteComponent, DeleteComponentOutputSchema, BodyComponentServiceValidateComponentCode, ValidateComponentCodeOutputSchema, UploadMediaOutputSchema, BodyMediaServiceGetUserMedia, GetUserMediaOutputSchema, BodyMediaServiceGetMediaAsset, GetMediaAssetOutputSchema, BodyMediaServiceGetMediaUrl, GetMediaUrlOutputSchema, BodyMediaServiceGetMediaTransformUrl, GetMediaTransformUrlOutputSchema, BodyMediaServiceUpdateMediaMetadata, UpdateMediaMetadataOutputSchema, BodyMediaServiceDeleteMediaAsset, DeleteMediaAssetOutputSchema, BodyMediaServiceDeleteMediaAssets, DeleteMediaAssetsOutputSchema, BodyMediaServiceOrganizeMedia, OrganizeMediaOutputSchema, BodyPageServiceCreatePage, CreatePageOutputSchema, BodyPageServiceGetWebsitePages, GetWebsitePagesOutputSchema, BodyPageServiceGetPage, GetPageOutputSchema, BodyPageServiceUpdatePageContent, UpdatePageContentOutputSchema, BodyPageServiceGetPageComponents, GetPageComponentsOutputSchema, BodyPageServiceUpdatePageMetadata, UpdatePageMetadataOutputSchema, BodyPageServiceUpdatePageStyles, UpdatePageStylesOutputSchema, BodyPageServicePublishPage, PublishPageOutputSchema, BodyPageServiceDeletePage, DeletePageOutputSchema, BodyPageServiceReorderPages, ReorderPagesOutputSchema
 from core import website_service, component_service, media_service, page_service
+from core.built_in_components import get_catalog
+from core.component_search import ensure_search_schema
+from core.component_compiler import open_artifact
+from core.component_props import InvalidComponentProps
+from core.component_validation import validate_code
+from core.media_transforms import TransformParams, transform_etag, verify_transform_signature
 
 from fastapi import APIRouter, HTTPException, Depends
 from typing import List, Optional, Dict, Any
@@ -313,51 +329,7 @@ from pathlib import Path
 from typing import TypeVar
 import traceback
 
-def format_record(record):
-    fmt = "{level:<5} | {message}"
-    if record["exception"] is not None:
-        exc_type, exc_value, exc_traceback = record["exception"]        
-        tb_lines = traceback.extract_tb(exc_traceback)
-        if tb_lines:
-            last_frame = tb_lines[-1]
-            error_info = (
-                f'\nFile "{last_frame.filename}", line {last_frame.lineno}, in {last_frame.name}\n'
-                f'  {last_frame.line}\n'
-                f'{exc_type.__name__}: {exc_value}'
-            )
-            record["message"] += error_info
-        
-        record["exception"] = None
-    
-    return fmt + "\n"
-
-logger.remove()
-logger.add(
-    sys.stderr,
-    level="DEBUG",
-    format=format_record,
-    colorize=True
-)
-
-Path("../logs").mkdir(exist_ok=True)
-logger.add(
-    "../logs/fast_api.log",
-    rotation="50 MB",
-    retention="10 days",
-    level="DEBUG",
-    format=format_record
-)
-
-# need this to capture print statements
-class InterceptHandler:
-    def write(self, msg):
-        if msg.strip():
-            logger.info(msg.strip())
-    
-    def flush(self):
-        pass
-
-sys.stdout = InterceptHandler()
+configure_logging()
 
 T = TypeVar('T')
 
@@ -365,54 +337,45 @@ T = TypeVar('T')
 # General App
 ##############################################################################
 
-# Security patch: Add rate limiting
-limiter = Limiter(key_func=get_remote_address)
+# Security patch: Add rate limiting, applied per client address by RequestMiddleware
+RATE_LIMITS = {
+    ("POST", "/api/auth/token"): "10/minute",  # Rate limit auth attempts
+}
+
+# reorder_pages changes sort_order without touching updated_at
+PAGE_REVISION_FIELDS = ("id", "updated_at", "sort_order")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Outbound HTTP clients are pooled for the life of the process and closed on shutdown
+    key_rotation = None
+    if config.auth_verification_mode() == "local":
+        key_rotation = asyncio.create_task(run_key_rotation())
+    # One worker builds the search indexes (concurrently), which can take minutes, so it runs on a thread of its
+    # own rather than a request executor; searches fall back to ILIKE until they are ready
+    threading.Thread(target=ensure_search_schema, name="search-schema", daemon=True).start()
+    try:
+        yield
+    finally:
+        if key_rotation is not None:
+            key_rotation.cancel()
+        await close_clients()
+        shutdown_executors()
+        # Drain the enqueued log sinks
+        await logger.complete()
 
 app = FastAPI(
     title="Next.js Website CMS",
-    docs_url=None
+    docs_url=None,
+    lifespan=lifespan
 )
 
-# Add rate limiting middleware
-app.state.limiter = limiter
-app.add_exception_handler(RateLimitExceeded, _rate_limit_exceeded_handler)
-
 app.include_router(router)
 
 # Security patch: Input validation functions
 def validate_component_code(code: str) -> bool:
     """Validate React component code for security"""
-    if not code or len(code) > 50000:  # 50KB limit
-        return False
-    
-    # Block dangerous patterns
-    dangerous_patterns = [
-        r'eval\s*\(',
-        r'Function\s*\(',
-        r'document\.write',
-        r'innerHTML\s*=',
-        r'outerHTML\s*=',
-        r'<script',
-        r'javascript:',
-        r'on\w+\s*=',  # event handlers
-        r'dangerouslySetInnerHTML',
-        r'__proto__',
-        r'constructor\s*\.',
-        r'process\.env',
-        r'require\s*\(',
-        r'import\s*\(',
-        r'fetch\s*\(',
-        r'XMLHttpRequest',
-        r'window\.',
-        r'global\.',
-        r'globalThis\.'
-    ]
-    
-    for pattern in dangerous_patterns:
-        if re.search(pattern, code, re.IGNORECASE):
-            return False
-    
-    return True
+    return validate_code(code)["valid"]
 
 def validate_file_upload(file: UploadFile) -> bool:
     """Validate uploaded files"""
@@ -444,28 +407,6 @@ def validate_file_upload(file: UploadFile) -> bool:
     
     return True
 
-###############################################################################
-# Simple Request Logging Middleware
-###############################################################################
-
-@app.middleware("http")
-async def log_requests(request: Request, call_next):
-    request_id = str(uuid.uuid4())[:8]
-    
-    with logger.contextualize(request_id=request_id):
-        start_time = datetime.utcnow()
-        
-        try:
-            response = await call_next(request)
-            process_time = (datetime.utcnow() - start_time).total_seconds()
-            if "HEAD /docs" not in request.url.path:
-              logger.info(f"{request.method} {request.url.path} ({response.status_code}) - {process_time:.3f}s")
-            return response
-        except Exception as e:
-            process_time = (datetime.utcnow() - start_time).total_seconds()
-            logger.exception(f"{request.method} {request.url.path} - Failed after {process_time:.3f}s")
-            raise
-            
 ###############################################################################
 # Error Handler
 ###############################################################################
@@ -578,31 +519,12 @@ app.add_middleware(
     expose_headers=["Set-Cookie"]
 )
 
-async def auth_cors_middleware(request: Request, call_next):
-    if request.url.path.startswith("/api/auth"):
-        auth_origins = get_auth_origins()
-        origin = request.headers.get("origin", "")
-        response = await call_next(request)
-        
-        # override the wildcard CORS settings with strict origin checking
-        if origin in auth_origins:
-            response.headers["Access-Control-Allow-Origin"] = origin
-            response.headers["Access-Control-Allow-Credentials"] = "true"
-            response.headers["Access-Control-Allow-Methods"] = "GET, POST, OPTIONS"
-            response.headers["Access-Control-Allow-Headers"] = "Authorization, Content-Type, Accept"
-            response.headers["Access-Control-Expose-Headers"] = "Set-Cookie"
-        else:
-            # unauthorized origins on auth routes, set CORS headers to blank or remove them
-            response.headers["Access-Control-Allow-Origin"] = ""
-            response.headers["Access-Control-Allow-Methods"] = ""
-            response.headers["Access-Control-Allow-Headers"] = ""
-            
-        return response
-    else:
-        return await call_next(request)
-
-# auth-specific middleware and logging middleware
-app.middleware("http")(auth_cors_middleware)
+# Request id, timing, auth-route CORS and rate limiting; added last so it wraps CORSMiddleware
+app.add_middleware(
+    RequestMiddleware,
+    get_auth_origins=get_auth_origins,
+    rate_limits=RATE_LIMITS
+)
 
 # OPTIONS handler for auth endpoints
 @app.options("/api/auth/{rest_of_path:path}", include_in_schema=False)
@@ -628,16 +550,43 @@ async def health_check():
 # Synchronous Function Helpers
 ##############################################################################
 
-thread_pool = ThreadPoolExecutor(max_workers=4)
+async def run_in_executor(executor_name: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Runs a synchronous function in the named executor (see solar.executors)"""
+    return await asyncio.wrap_future(get_executor(executor_name).submit(func, *args, **kwargs))
 
 async def run_sync_in_thread(func: Callable[..., Any], *args, **kwargs) -> Any:
-    """Runs a synchronous function in a thread pool"""
-    loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(
-        thread_pool,
-        partial(func, *args, **kwargs)
+    """Runs a synchronous function in the db-light executor"""
+    return await run_in_executor(DB_LIGHT, func, *args, **kwargs)
+
+async def executor_overloaded_handler(request: Request, exc: ExecutorOverloaded):
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Server is busy, please retry"},
+        headers={"Retry-After": "1"}
     )
 
+app.add_exception_handler(ExecutorOverloaded, executor_overloaded_handler)
+
+async def deadline_exceeded_handler(request: Request, exc: request_context.DeadlineExceeded):
+    return JSONResponse(
+        status_code=504,
+        content={"detail": "Request timed out"}
+    )
+
+app.add_exception_handler(request_context.DeadlineExceeded, deadline_exceeded_handler)
+
+async def invalid_component_props_handler(request: Request, exc: InvalidComponentProps):
+    return JSONResponse(
+        status_code=422,
+        content={"detail": str(exc), "errors": exc.errors}
+    )
+
+app.add_exception_handler(InvalidComponentProps, invalid_component_props_handler)
+
+@app.get("/api/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
 
 ##############################################################################
 # Custom Docs
@@ -658,19 +607,60 @@ async def custom_swagger_ui_html():
 # Auth Routes
 ##############################################################################
 
-async def get_current_user(token: str = Depends(oauth2_scheme)):
+introspection_cache = TieredCache("introspection", config.auth_cache_max_entries())
+
+
+def introspection_cache_key(jti: str) -> str:
+    """Cache key for an introspected token; hashed so raw tokens never sit in the shared store."""
+    return hashlib.sha256(jti.encode()).hexdigest()
+
+
+def cache_introspection(key: str, entry: Dict[str, Any], exp: Optional[float]):
+    """Remember an introspection result, never past the token's own expiry."""
+    if entry["active"]:
+        ttl = config.auth_cache_max_ttl()
+        if isinstance(exp, (int, float)):
+            ttl = min(ttl, exp - time.time())
+    else:
+        ttl = config.auth_cache_negative_ttl()
+    introspection_cache.set(key, entry, ttl)
+
+
+async def authenticate_token(token: str, revocation_sensitive: bool = False) -> User:
+    """
+    Resolve an access token to its user.
+
+    In "local" verification mode most tokens are verified against the cached JWKS without any network call; a
+    sampled fraction, and every revocation-sensitive request, is still introspected by the router.
+    """
     try:
         base_url = os.getenv("ROUTER_BASE_URL")
         if not base_url:
             raise HTTPException(status_code=500, detail="ROUTER_BASE_URL is not set, could not authenticate user")
         
+        jti = None
+        exp = None
+        local_user = None
+        if config.auth_verification_mode() == "local":
+            try:
+                claims = await verify_token_locally(token)
+            except jwt.ExpiredSignatureError:
+                raise HTTPException(status_code=401, detail="Token expired")
+            except jwt.InvalidTokenError:
+                raise HTTPException(status_code=401, detail="Invalid token")
+            if claims is not None:
+                local_user = User(id=claims["userUuid"], email=claims["email"])
+                if not revocation_sensitive and random.random() >= config.auth_introspection_sample_rate():
+                    return local_user
+                jti, exp = claims["jti"], claims["exp"]
+
         # Security patch: Validate JWT token properly
         jwt_secret = os.getenv("JWT_SECRET")
-        if not jwt_secret:
+        if jti is None and not jwt_secret:
             # Fallback to introspection-only validation for backward compatibility
             logger.warning("JWT_SECRET not set, using introspection-only validation")
             jti = token  # Use token directly for introspection
-        else:
+        elif jti is None:
             try:
                 # Proper JWT validation with signature verification
                 decoded_token = jwt.decode(
@@ -691,7 +681,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
                 
                 # Additional token validation
                 exp = decoded_token.get("exp")
-                if exp is None or exp < datetime.utcnow().timestamp():
+                if exp is None or exp < time.time():
                     raise HTTPException(status_code=401, detail="Token expired")
                     
             except jwt.ExpiredSignatureError:
@@ -701,29 +691,69 @@ async def get_current_user(token: str = Depends(oauth2_scheme)):
             except jwt.DecodeError:
                 raise HTTPException(status_code=401, detail="Malformed token")
         
+        # Reuse a recent introspection result; the shared tier is only consulted off the event loop.
+        # Revocation-sensitive and sampled requests always ask the router.
+        cache_key = introspection_cache_key(jti)
+        if not revocation_sensitive and local_user is None:
+            cached = introspection_cache.get_local(cache_key)
+            if cached is None and introspection_cache.has_remote_tier:
+                cached = await run_sync_in_thread(introspection_cache.get, cache_key)
+            if cached is not None:
+                if not cached["active"]:
+                    raise HTTPException(status_code=401, detail="Unauthorized")
+                return User(id=cached["userUuid"], email=cached["email"])
+
         token_url = f"{base_url}/innerApp/oauth2/introspect"
-        async with httpx.AsyncClient(timeout=20.0) as client:
-            response = await client.post(token_url, json={"token": jti, "token_type_hint": "access_token"})
-            if response.status_code != 200:
-                raise HTTPException(status_code=401, detail="Unauthorized")
-            
-            json_response = response.json()
-            if not json_response.get("active", False):
-                raise HTTPException(status_code=401, detail="Unauthorized")
-            
-            user_uuid = json_response.get("userUuid")
-            email = json_response.get("email")
-            if not user_uuid or not email:
-                raise HTTPException(status_code=401, detail="Invalid user data")
-            
-            user = User(id=user_uuid, email=email)
-            return user
-    except HTTPException:
+        try:
+            response = await request_with_retry("POST", token_url, json={"token": jti, "token_type_hint": "access_token"})
+        except httpx.HTTPError:
+            # A sampled check must not turn a router outage into failed requests
+            if local_user is not None and not revocation_sensitive:
+                return local_user
+            raise
+        if response.status_code >= 500 and local_user is not None and not revocation_sensitive:
+            return local_user
+        if response.status_code != 200:
+            # Only a definite rejection is remembered; server errors are retried on the next request
+            if response.status_code in (400, 401, 403):
+                cache_introspection(cache_key, {"active": False}, exp)
+            raise HTTPException(status_code=401, detail="Unauthorized")
+        
+        json_response = response.json()
+        if not json_response.get("active", False):
+            cache_introspection(cache_key, {"active": False}, exp)
+            raise HTTPException(status_code=401, detail="Unauthorized")
+        
+        user_uuid = json_response.get("userUuid")
+        email = json_response.get("email")
+        if not user_uuid or not email:
+            raise HTTPException(status_code=401, detail="Invalid user data")
+        
+        if exp is None:
+            exp = json_response.get("exp")
+        cache_introspection(cache_key, {"active": True, "userUuid": user_uuid, "email": email}, exp)
+        user = User(id=user_uuid, email=email)
+        return user
+    except (HTTPException, ExecutorOverloaded, request_context.DeadlineExceeded):
+        # Shedding and deadlines are answered with 503, not by logging the user out
         raise
     except Exception as e:
         print(f"get_current_user failed with error: {type(e).__name__}")
         raise HTTPException(status_code=401, detail="Unauthorized")
 
+
+async def get_current_user(token: str = Depends(oauth2_scheme)):
+    user = await authenticate_token(token)
+    request_context.current_user_id.set(str(user.id))
+    return user
+
+
+async def get_current_user_strict(token: str = Depends(oauth2_scheme)):
+    """For destructive or publishing operations: the token is always checked with the router, never from cache."""
+    user = await authenticate_token(token, revocation_sensitive=True)
+    request_context.current_user_id.set(str(user.id))
+    return user
+
 def extract_domain(url):
     if not url:
         return None
@@ -741,7 +771,6 @@ def extract_domain(url):
     return url
 
 @app.post('/api/auth/token', response_model=TokenResponse, include_in_schema=False)
-@limiter.limit("10/minute")  # Security patch: Rate limit auth attempts
 async def exchange_token(request: Request, body: TokenExchangeRequest = Body(...)):    
     try:
         params = body.model_dump(exclude_none=True)
@@ -771,13 +800,14 @@ async def exchange_token(request: Request, body: TokenExchangeRequest = Body(...
             except Exception as e:
                 logger.warning("Error extracting JTI from refresh token")
 
-        response = requests.post(
+        # Not retried on error responses: an authorization code can only be redeemed once
+        response = await get_async_client(SOLAR_APP_TOKEN_URL).post(
             SOLAR_APP_TOKEN_URL,
             json=params,
             headers={"Content-Type": "application/json", "Accept": "application/json"}
         )
         
-        if not response.ok:
+        if not response.is_success:
             return JSONResponse(
                     status_code=401,
                     content={
@@ -887,12 +917,12 @@ async def website_service_create_website(body: BodyWebsiteServiceCreateWebsite =
 
 
 @app.post('/api/website_service/get_user_websites', response_model=GetUserWebsitesOutputSchema, operation_id='website_service_get_user_websites')
-async def website_service_get_user_websites(current_user: User = Depends(get_current_user)) -> GetUserWebsitesOutputSchema:
+async def website_service_get_user_websites(request: Request, current_user: User = Depends(get_current_user)) -> GetUserWebsitesOutputSchema:
     """
     Get all websites belonging to the authenticated user.
     """
     response = await run_sync_in_thread(website_service.get_user_websites, user=current_user)
-    return response
+    return conditional_json_response(request, response, GetUserWebsitesOutputSchema, etag=presigned_revision_etag(response, "favicon_path"))
     
     
 
@@ -900,12 +930,12 @@ async def website_service_get_user_websites(current_user: User = Depends(get_cur
 
 
 @app.post('/api/website_service/get_website', response_model=GetWebsiteOutputSchema, operation_id='website_service_get_website')
-async def website_service_get_website(body: BodyWebsiteServiceGetWebsite = Body(...), current_user: User = Depends(get_current_user)) -> GetWebsiteOutputSchema:
+async def website_service_get_website(request: Request, body: BodyWebsiteServiceGetWebsite = Body(...), current_user: User = Depends(get_current_user)) -> GetWebsiteOutputSchema:
     """
     Get a specific website belonging to the authenticated user.
     """
     response = await run_sync_in_thread(website_service.get_website, user=current_user, website_id=body.website_id)
-    return response
+    return conditional_json_response(request, response, GetWebsiteOutputSchema, etag=presigned_revision_etag(response, "favicon_path"))
     
     
 
@@ -937,7 +967,7 @@ async def website_service_upload_favicon(favicon: UploadFile = File(...), websit
         file_size = len(contents)
         favicon = MediaFile(size=file_size, mime_type=content_type, bytes=contents)
 
-    response = await run_sync_in_thread(website_service.upload_favicon, user=current_user, website_id=website_id, favicon=favicon)
+    response = await run_in_executor(STORAGE, website_service.upload_favicon, user=current_user, website_id=website_id, favicon=favicon)
     return response
     
     
@@ -946,11 +976,11 @@ async def website_service_upload_favicon(favicon: UploadFile = File(...), websit
 
 
 @app.post('/api/website_service/delete_website', response_model=DeleteWebsiteOutputSchema, operation_id='website_service_delete_website')
-async def website_service_delete_website(body: BodyWebsiteServiceDeleteWebsite = Body(...), current_user: User = Depends(get_current_user)) -> DeleteWebsiteOutputSchema:
+async def website_service_delete_website(body: BodyWebsiteServiceDeleteWebsite = Body(...), current_user: User = Depends(get_current_user_strict)) -> DeleteWebsiteOutputSchema:
     """
     Delete a website and all its associated data.
     """
-    response = await run_sync_in_thread(website_service.delete_website, user=current_user, website_id=body.website_id)
+    response = await run_in_executor(DB_HEAVY, website_service.delete_website, user=current_user, website_id=body.website_id)
     return response
     
     
@@ -959,11 +989,11 @@ async def website_service_delete_website(body: BodyWebsiteServiceDeleteWebsite =
 
 
 @app.post('/api/website_service/publish_website', response_model=PublishWebsiteOutputSchema, operation_id='website_service_publish_website')
-async def website_service_publish_website(body: BodyWebsiteServicePublishWebsite = Body(...), current_user: User = Depends(get_current_user)) -> PublishWebsiteOutputSchema:
+async def website_service_publish_website(body: BodyWebsiteServicePublishWebsite = Body(...), current_user: User = Depends(get_current_user_strict)) -> PublishWebsiteOutputSchema:
     """
     Publish a website (make it live).
     """
-    response = await run_sync_in_thread(website_service.publish_website, user=current_user, website_id=body.website_id)
+    response = await run_in_executor(DB_HEAVY, website_service.publish_website, user=current_user, website_id=body.website_id)
     return response
     
     
@@ -985,12 +1015,12 @@ async def component_service_create_custom_component(body: BodyComponentServiceCr
 
 
 @app.post('/api/component_service/get_user_components', response_model=GetUserComponentsOutputSchema, operation_id='component_service_get_user_components')
-async def component_service_get_user_components(body: BodyComponentServiceGetUserComponents = Body(...), current_user: User = Depends(get_current_user)) -> GetUserComponentsOutputSchema:
+async def component_service_get_user_components(request: Request, body: BodyComponentServiceGetUserComponents = Body(...), current_user: User = Depends(get_current_user)) -> GetUserComponentsOutputSchema:
     """
     Get all components created by the user, optionally filtered by category.
     """
-    response = await run_sync_in_thread(component_service.get_user_components, user=current_user, category=body.category)
-    return response
+    response = await run_in_executor(DB_HEAVY, component_service.get_user_components, user=current_user, category=body.category)
+    return conditional_json_response(request, response, GetUserComponentsOutputSchema, etag=presigned_revision_etag(response, "preview_image_path"))
     
     
 
@@ -998,12 +1028,13 @@ async def component_service_get_user_components(body: BodyComponentServiceGetUse
 
 
 @app.post('/api/component_service/get_built_in_components', response_model=GetBuiltInComponentsOutputSchema, operation_id='component_service_get_built_in_components')
-async def component_service_get_built_in_components() -> GetBuiltInComponentsOutputSchema:
+async def component_service_get_built_in_components(request: Request) -> GetBuiltInComponentsOutputSchema:
     """
     Get all built-in components available to all users.
     """
-    response = await run_sync_in_thread(component_service.get_built_in_components)
-    return response
+    # Compiled from the manifests once, along with its ETag
+    catalog = get_catalog()
+    return encoded_json_response(request, catalog.body, catalog.etag)
     
     
 
@@ -1011,12 +1042,14 @@ async def component_service_get_built_in_components() -> GetBuiltInComponentsOut
 
 
 @app.post('/api/component_service/get_public_components', response_model=GetPublicComponentsOutputSchema, operation_id='component_service_get_public_components')
-async def component_service_get_public_components(body: BodyComponentServiceGetPublicComponents = Body(...)) -> GetPublicComponentsOutputSchema:
+async def component_service_get_public_components(request: Request, body: BodyComponentServiceGetPublicComponents = Body(...)) -> GetPublicComponentsOutputSchema:
     """
     Get all public custom components, optionally filtered by category.
     """
-    response = await run_sync_in_thread(component_service.get_public_components, category=body.category)
-    return response
+    payload = component_service.get_local_public_components_payload(body.category)
+    if payload is None:
+        payload = await run_in_executor(DB_HEAVY, component_service.get_public_components_payload, category=body.category)
+    return encoded_json_response(request, payload["body"].encode(), payload["etag"])
     
     
 
@@ -1024,12 +1057,25 @@ async def component_service_get_public_components(body: BodyComponentServiceGetP
 
 
 @app.post('/api/component_service/get_component', response_model=GetComponentOutputSchema, operation_id='component_service_get_component')
-async def component_service_get_component(body: BodyComponentServiceGetComponent = Body(...), current_user: User = Depends(get_current_user)) -> GetComponentOutputSchema:
+async def component_service_get_component(request: Request, body: BodyComponentServiceGetComponent = Body(...), current_user: User = Depends(get_current_user)) -> GetComponentOutputSchema:
     """
     Get a specific component with ownership verification.
     """
     response = await run_sync_in_thread(component_service.get_component, user=current_user, component_id=body.component_id)
-    return response
+    return conditional_json_response(request, response, GetComponentOutputSchema, etag=presigned_revision_etag(response, "preview_image_path"))
+    
+    
+
+
+
+
+@app.post('/api/component_service/search_components', response_model=SearchComponentsOutputSchema, operation_id='component_service_search_components')
+async def component_service_search_components(body: BodyComponentServiceSearchComponents = Body(...), current_user: User = Depends(get_current_user)) -> SearchComponentsOutputSchema:
+    """
+    Search the user's own components and public ones, with per-category facet counts.
+    """
+    response = await run_in_executor(DB_HEAVY, component_service.search_components, user=current_user, query=body.query, category=body.category, mine_only=body.mine_only, page=body.page, page_size=body.page_size)
+    return fast_json_response(response, SearchComponentsOutputSchema)
     
     
 
@@ -1041,7 +1087,7 @@ async def component_service_update_component(body: BodyComponentServiceUpdateCom
     """
     Update a custom component.
     """
-    response = await run_sync_in_thread(component_service.update_component, user=current_user, component_id=body.component_id, name=body.name, description=body.description, code=body.code, styles=body.styles, props_schema=body.props_schema, is_public=body.is_public)
+    response = await run_sync_in_thread(component_service.update_component, user=current_user, component_id=body.component_id, name=body.name, description=body.description, code=body.code, styles=body.styles, props_schema=body.props_schema, is_public=body.is_public, bump=body.bump)
     return response
     
     
@@ -1049,6 +1095,61 @@ async def component_service_update_component(body: BodyComponentServiceUpdateCom
 
 
 
+@app.post('/api/component_service/get_component_versions', response_model=GetComponentVersionsOutputSchema, operation_id='component_service_get_component_versions')
+async def component_service_get_component_versions(body: BodyComponentServiceGetComponentVersions = Body(...), current_user: User = Depends(get_current_user)) -> GetComponentVersionsOutputSchema:
+    """
+    List the published versions of a component, newest first.
+    """
+    response = await run_in_executor(DB_LIGHT, component_service.get_component_versions, user=current_user, component_id=body.component_id)
+    return fast_json_response(response, GetComponentVersionsOutputSchema)
+    
+    
+
+
+
+
+@app.post('/api/component_service/get_component_version', response_model=GetComponentVersionOutputSchema, operation_id='component_service_get_component_version')
+async def component_service_get_component_version(body: BodyComponentServiceGetComponentVersion = Body(...), current_user: User = Depends(get_current_user)) -> GetComponentVersionOutputSchema:
+    """
+    Get one immutable version of a component.
+    """
+    response = await run_in_executor(DB_LIGHT, component_service.get_component_version, user=current_user, component_id=body.component_id, version=body.version)
+    return fast_json_response(response, GetComponentVersionOutputSchema)
+    
+    
+
+
+
+
+@app.post('/api/component_service/get_component_usage', response_model=GetComponentUsageOutputSchema, operation_id='component_service_get_component_usage')
+async def component_service_get_component_usage(body: BodyComponentServiceGetComponentUsage = Body(...), current_user: User = Depends(get_current_user)) -> GetComponentUsageOutputSchema:
+    """
+    List the user's pages that use a component, optionally only those pinned to one version.
+    """
+    response = await run_in_executor(DB_HEAVY, component_service.get_component_usage, user=current_user, component_id=body.component_id, version=body.version)
+    return fast_json_response(response, GetComponentUsageOutputSchema)
+    
+    
+
+
+
+
+@app.post('/api/component_service/import_components', response_model=ImportComponentsOutputSchema, operation_id='component_service_import_components')
+async def component_service_import_components(file: UploadFile = File(...), current_user: User = Depends(get_current_user)) -> ImportComponentsOutputSchema:
+    """
+    Import components from an NDJSON file, one component per line.
+    """
+    # Large libraries take longer than a regular request; the upload is spooled to disk and read line by line, in
+    # the bulk executor so a long import holds none of the threads other requests wait on
+    request_context.set_deadline(config.bulk_request_timeout())
+    response = await run_in_executor(BULK, component_service.import_components, user=current_user, lines=file.file)
+    return fast_json_response(response, ImportComponentsOutputSchema)
+    
+    
+
+
+
+
 @app.post('/api/component_service/upload_component_preview', response_model=UploadComponentPreviewOutputSchema, operation_id='component_service_upload_component_preview')
 async def component_service_upload_component_preview(component_id: UUID = Form(...), preview_image: UploadFile = File(...), current_user: User = Depends(get_current_user)) -> UploadComponentPreviewOutputSchema:
     """
@@ -1061,7 +1162,7 @@ async def component_service_upload_component_preview(component_id: UUID = Form(.
         file_size = len(contents)
         preview_image = MediaFile(size=file_size, mime_type=content_type, bytes=contents)
 
-    response = await run_sync_in_thread(component_service.upload_component_preview, user=current_user, component_id=component_id, preview_image=preview_image)
+    response = await run_in_executor(STORAGE, component_service.upload_component_preview, user=current_user, component_id=component_id, preview_image=preview_image)
     return response
     
     
@@ -1070,11 +1171,11 @@ async def component_service_upload_component_preview(component_id: UUID = Form(.
 
 
 @app.post('/api/component_service/delete_component', response_model=DeleteComponentOutputSchema, operation_id='component_service_delete_component')
-async def component_service_delete_component(body: BodyComponentServiceDeleteComponent = Body(...), current_user: User = Depends(get_current_user)) -> DeleteComponentOutputSchema:
+async def component_service_delete_component(body: BodyComponentServiceDeleteComponent = Body(...), current_user: User = Depends(get_current_user_strict)) -> DeleteComponentOutputSchema:
     """
     Delete a custom component.
     """
-    response = await run_sync_in_thread(component_service.delete_component, user=current_user, component_id=body.component_id)
+    response = await run_in_executor(DB_HEAVY, component_service.delete_component, user=current_user, component_id=body.component_id)
     return response
     
     
@@ -1087,7 +1188,7 @@ async def component_service_validate_component_code(body: BodyComponentServiceVa
     """
     Validate React component code and return any errors or warnings.
     """
-    response = await run_sync_in_thread(component_service.validate_component_code, user=current_user, code=body.code)
+    response = await run_in_executor(CPU, component_service.validate_component_code, user=current_user, code=body.code)
     return response
     
     
@@ -1100,14 +1201,19 @@ async def media_service_upload_media(alt_text: Optional[str] = Form(None), file:
     """
     Upload a media file and create a database record.
     """
-    # Download file from the client
+    # Download file from the client, hashing each chunk as it arrives for content-addressed storage
     if file is not None:
         content_type = file.content_type or "application/octet-stream"
-        contents = await file.read()
+        digest = hashlib.sha256()
+        chunks = []
+        while chunk := await file.read(MEDIA_CHUNK_SIZE):
+            digest.update(chunk)
+            chunks.append(chunk)
+        contents = b"".join(chunks)
         file_size = len(contents)
-        file = MediaFile(size=file_size, mime_type=content_type, bytes=contents)
+        file = MediaFile(size=file_size, mime_type=content_type, bytes=contents, sha256=digest.hexdigest())
 
-    response = await run_sync_in_thread(media_service.upload_media, user=current_user, file=file, name=name, website_id=website_id, alt_text=alt_text, folder=folder, tags=tags)
+    response = await run_in_executor(STORAGE, media_service.upload_media, user=current_user, file=file, name=name, website_id=website_id, alt_text=alt_text, folder=folder, tags=tags)
     return response
     
     
@@ -1120,8 +1226,8 @@ async def media_service_get_user_media(body: BodyMediaServiceGetUserMedia = Body
     """
     Get media assets for a user, optionally filtered by website, folder, or type.
     """
-    response = await run_sync_in_thread(media_service.get_user_media, user=current_user, website_id=body.website_id, folder=body.folder, mime_type_filter=body.mime_type_filter)
-    return response
+    response = await run_in_executor(DB_HEAVY, media_service.get_user_media, user=current_user, website_id=body.website_id, folder=body.folder, mime_type_filter=body.mime_type_filter)
+    return fast_json_response(response, GetUserMediaOutputSchema)
     
     
 
@@ -1141,6 +1247,94 @@ async def media_service_get_media_asset(body: BodyMediaServiceGetMediaAsset = Bo
 
 
 
+@app.post('/api/media_service/get_media_url', response_model=GetMediaUrlOutputSchema, operation_id='media_service_get_media_url')
+async def media_service_get_media_url(body: BodyMediaServiceGetMediaUrl = Body(...), current_user: User = Depends(get_current_user)) -> GetMediaUrlOutputSchema:
+    """
+    Get a presigned URL for the best derivative of a media asset, plus srcsets per format.
+    """
+    response = await run_in_executor(STORAGE, media_service.get_media_url, user=current_user, asset_id=body.asset_id, width=body.width, mime_types=body.mime_types)
+    return response
+    
+    
+
+
+
+
+@app.post('/api/media_service/get_media_transform_url', response_model=GetMediaTransformUrlOutputSchema, operation_id='media_service_get_media_transform_url')
+async def media_service_get_media_transform_url(body: BodyMediaServiceGetMediaTransformUrl = Body(...), current_user: User = Depends(get_current_user)) -> GetMediaTransformUrlOutputSchema:
+    """
+    Get a signed URL of the transform endpoint for one of the user's images at the given size, fit, format and quality.
+    """
+    params = TransformParams(**body.model_dump(exclude={"asset_id"}))
+    try:
+        return await run_sync_in_thread(media_service.get_media_transform_url, user=current_user, asset_id=body.asset_id, params=params)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    
+    
+
+
+
+
+@app.get('/api/media_service/transform/{asset_id}', include_in_schema=False)
+async def media_service_transform(request: Request, asset_id: UUID, sig: str, exp: int, params: TransformParams = Depends()):
+    """
+    Serve a resized copy of a media asset for a signed transform URL, rendering it on first request.
+    """
+    if not verify_transform_signature(asset_id, params, sig, exp):
+        raise HTTPException(status_code=403, detail="Invalid or expired transform signature")
+    
+    # The output of a signed URL never changes, so caches may keep it until the signature expires
+    etag = transform_etag(asset_id, params)
+    headers = {"ETag": etag, **signed_url_cache_headers(exp)}
+    if is_not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    
+    try:
+        file = await run_in_executor(STORAGE, media_service.get_media_transform, asset_id=asset_id, params=params, signature=sig, expires=exp)
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Media asset not found")
+    
+    # Served from the open file, which stays readable if the cache evicts the entry meanwhile
+    stat = os.fstat(file.fileno())
+    if is_not_modified(request, etag, stat.st_mtime):
+        file.close()
+        return Response(status_code=304, headers=headers)
+    headers.update(file_headers(stat.st_size, stat.st_mtime))
+    return StreamingResponse(iter_file(file), media_type=params.mime_type, headers=headers)
+
+
+@app.get('/api/media_service/media/{asset_id}', include_in_schema=False)
+async def media_service_stream_media(request: Request, asset_id: UUID, sig: str, exp: int):
+    """
+    Stream the original file of a media asset for a signed proxy URL, honoring Range and conditional headers.
+    """
+    try:
+        stream = await run_in_executor(
+            STORAGE,
+            media_service.stream_media,
+            asset_id=asset_id,
+            signature=sig,
+            expires=exp,
+            range_header=request.headers.get("range"),
+            if_none_match=request.headers.get("if-none-match"),
+            if_modified_since=request.headers.get("if-modified-since"),
+        )
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Media asset not found")
+    
+    # Assets are immutable once uploaded, so the signed URL can be cached until it expires
+    headers = {**stream.headers, **signed_url_cache_headers(exp)}
+    if stream.body is None:
+        return Response(status_code=stream.status_code, headers=headers)
+    # Chunks are read from S3 only as fast as the client consumes them
+    return StreamingResponse(stream.iter_chunks(), status_code=stream.status_code, headers=headers)
+    
+    
+
+
+
+
 @app.post('/api/media_service/update_media_metadata', response_model=UpdateMediaMetadataOutputSchema, operation_id='media_service_update_media_metadata')
 async def media_service_update_media_metadata(body: BodyMediaServiceUpdateMediaMetadata = Body(...), current_user: User = Depends(get_current_user)) -> UpdateMediaMetadataOutputSchema:
     """
@@ -1155,11 +1349,24 @@ async def media_service_update_media_metadata(body: BodyMediaServiceUpdateMediaM
 
 
 @app.post('/api/media_service/delete_media_asset', response_model=DeleteMediaAssetOutputSchema, operation_id='media_service_delete_media_asset')
-async def media_service_delete_media_asset(body: BodyMediaServiceDeleteMediaAsset = Body(...), current_user: User = Depends(get_current_user)) -> DeleteMediaAssetOutputSchema:
+async def media_service_delete_media_asset(body: BodyMediaServiceDeleteMediaAsset = Body(...), current_user: User = Depends(get_current_user_strict)) -> DeleteMediaAssetOutputSchema:
     """
     Delete a media asset and its file from storage.
     """
-    response = await run_sync_in_thread(media_service.delete_media_asset, user=current_user, asset_id=body.asset_id)
+    response = await run_in_executor(STORAGE, media_service.delete_media_asset, user=current_user, asset_id=body.asset_id)
+    return response
+    
+    
+
+
+
+
+@app.post('/api/media_service/delete_media_assets', response_model=DeleteMediaAssetsOutputSchema, operation_id='media_service_delete_media_assets')
+async def media_service_delete_media_assets(body: BodyMediaServiceDeleteMediaAssets = Body(...), current_user: User = Depends(get_current_user_strict)) -> DeleteMediaAssetsOutputSchema:
+    """
+    Delete many media assets and their files, reporting assets and objects that could not be removed.
+    """
+    response = await run_in_executor(DB_HEAVY, media_service.delete_media_assets, user=current_user, asset_ids=body.asset_ids)
     return response
     
     
@@ -1172,8 +1379,8 @@ async def media_service_organize_media(body: BodyMediaServiceOrganizeMedia = Bod
     """
     Move multiple media assets to a different folder.
     """
-    response = await run_sync_in_thread(media_service.organize_media, user=current_user, asset_ids=body.asset_ids, target_folder=body.target_folder)
-    return response
+    response = await run_in_executor(DB_HEAVY, media_service.organize_media, user=current_user, asset_ids=body.asset_ids, target_folder=body.target_folder)
+    return fast_json_response(response, OrganizeMediaOutputSchema)
     
     
 
@@ -1194,12 +1401,12 @@ async def page_service_create_page(body: BodyPageServiceCreatePage = Body(...),
 
 
 @app.post('/api/page_service/get_website_pages', response_model=GetWebsitePagesOutputSchema, operation_id='page_service_get_website_pages')
-async def page_service_get_website_pages(body: BodyPageServiceGetWebsitePages = Body(...), current_user: User = Depends(get_current_user)) -> GetWebsitePagesOutputSchema:
+async def page_service_get_website_pages(request: Request, body: BodyPageServiceGetWebsitePages = Body(...), current_user: User = Depends(get_current_user)) -> GetWebsitePagesOutputSchema:
     """
     Get all pages for a website.
     """
-    response = await run_sync_in_thread(page_service.get_website_pages, user=current_user, website_id=body.website_id)
-    return response
+    response = await run_in_executor(DB_HEAVY, page_service.get_website_pages, user=current_user, website_id=body.website_id)
+    return conditional_json_response(request, response, GetWebsitePagesOutputSchema, etag=revision_etag(response, PAGE_REVISION_FIELDS))
     
     
 
@@ -1207,12 +1414,12 @@ async def page_service_get_website_pages(body: BodyPageServiceGetWebsitePages =
 
 
 @app.post('/api/page_service/get_page', response_model=GetPageOutputSchema, operation_id='page_service_get_page')
-async def page_service_get_page(body: BodyPageServiceGetPage = Body(...), current_user: User = Depends(get_current_user)) -> GetPageOutputSchema:
+async def page_service_get_page(request: Request, body: BodyPageServiceGetPage = Body(...), current_user: User = Depends(get_current_user)) -> GetPageOutputSchema:
     """
     Get a specific page with ownership verification.
     """
     response = await run_sync_in_thread(page_service.get_page, user=current_user, page_id=body.page_id)
-    return response
+    return conditional_json_response(request, response, GetPageOutputSchema, etag=revision_etag(response, PAGE_REVISION_FIELDS))
     
     
 
@@ -1225,7 +1432,20 @@ async def page_service_update_page_content(body: BodyPageServiceUpdatePageConten
     Update the content structure of a page.
     """
     response = await run_sync_in_thread(page_service.update_page_content, user=current_user, page_id=body.page_id, content_structure=body.content_structure)
-    return response
+    return fast_json_response(response, UpdatePageContentOutputSchema)
+    
+    
+
+
+
+
+@app.post('/api/page_service/get_page_components', response_model=GetPageComponentsOutputSchema, operation_id='page_service_get_page_components')
+async def page_service_get_page_components(body: BodyPageServiceGetPageComponents = Body(...), current_user: User = Depends(get_current_user)) -> GetPageComponentsOutputSchema:
+    """
+    List the components a page uses, with the version each instance is pinned to.
+    """
+    response = await run_in_executor(DB_LIGHT, page_service.get_page_components, user=current_user, page_id=body.page_id)
+    return fast_json_response(response, GetPageComponentsOutputSchema)
     
     
 
@@ -1259,11 +1479,11 @@ async def page_service_update_page_styles(body: BodyPageServiceUpdatePageStyles
 
 
 @app.post('/api/page_service/publish_page', response_model=PublishPageOutputSchema, operation_id='page_service_publish_page')
-async def page_service_publish_page(body: BodyPageServicePublishPage = Body(...), current_user: User = Depends(get_current_user)) -> PublishPageOutputSchema:
+async def page_service_publish_page(body: BodyPageServicePublishPage = Body(...), current_user: User = Depends(get_current_user_strict)) -> PublishPageOutputSchema:
     """
     Publish a page.
     """
-    response = await run_sync_in_thread(page_service.publish_page, user=current_user, page_id=body.page_id)
+    response = await run_in_executor(DB_HEAVY, page_service.publish_page, user=current_user, page_id=body.page_id)
     return response
     
     
@@ -1272,7 +1492,7 @@ async def page_service_publish_page(body: BodyPageServicePublishPage = Body(...)
 
 
 @app.post('/api/page_service/delete_page', response_model=DeletePageOutputSchema, operation_id='page_service_delete_page')
-async def page_service_delete_page(body: BodyPageServiceDeletePage = Body(...), current_user: User = Depends(get_current_user)) -> DeletePageOutputSchema:
+async def page_service_delete_page(body: BodyPageServiceDeletePage = Body(...), current_user: User = Depends(get_current_user_strict)) -> DeletePageOutputSchema:
     """
     Delete a page.
     """
@@ -1289,5 +1509,182 @@ async def page_service_reorder_pages(body: BodyPageServiceReorderPages = Body(..
     """
     Reorder pages by updating their sort_order values.
     """
-    response = await run_sync_in_thread(page_service.reorder_pages, user=current_user, website_id=body.website_id, page_orders=body.page_orders)
-    return response
+    response = await run_in_executor(DB_HEAVY, page_service.reorder_pages, user=current_user, website_id=body.website_id, page_orders=body.page_orders)
+    return fast_json_response(response, ReorderPagesOutputSchema)
+
+
+##############################################################################
+# Resource Routes
+##############################################################################
+
+# Cacheable GET equivalents of the read RPCs above. Per-user resources are private and revalidated with their ETag on
+# every use; built-in and public components are shared, so nginx and the CDN can answer most of those requests.
+# Static paths are registered before /api/components/{component_id} so they are not parsed as ids.
+
+
+@app.get('/api/websites', response_model=GetUserWebsitesOutputSchema, operation_id='get_websites')
+async def get_websites(request: Request, current_user: User = Depends(get_current_user)) -> GetUserWebsitesOutputSchema:
+    """
+    Get all websites belonging to the authenticated user.
+    """
+    response = await run_sync_in_thread(website_service.get_user_websites, user=current_user)
+    return conditional_json_response(request, response, GetUserWebsitesOutputSchema, etag=presigned_revision_etag(response, "favicon_path"), headers=private_cache_headers())
+
+
+@app.get('/api/websites/{website_id}', response_model=GetWebsiteOutputSchema, operation_id='get_website_resource')
+async def get_website_resource(request: Request, website_id: UUID, current_user: User = Depends(get_current_user)) -> GetWebsiteOutputSchema:
+    """
+    Get a specific website belonging to the authenticated user.
+    """
+    response = await run_sync_in_thread(website_service.get_website, user=current_user, website_id=website_id)
+    return conditional_json_response(request, response, GetWebsiteOutputSchema, etag=presigned_revision_etag(response, "favicon_path"), headers=private_cache_headers())
+
+
+@app.get('/api/websites/{website_id}/pages', response_model=GetWebsitePagesOutputSchema, operation_id='get_website_pages_resource')
+async def get_website_pages_resource(request: Request, website_id: UUID, current_user: User = Depends(get_current_user)) -> GetWebsitePagesOutputSchema:
+    """
+    Get all pages for a website.
+    """
+    response = await run_in_executor(DB_HEAVY, page_service.get_website_pages, user=current_user, website_id=website_id)
+    return conditional_json_response(request, response, GetWebsitePagesOutputSchema, etag=revision_etag(response, PAGE_REVISION_FIELDS), headers=private_cache_headers())
+
+
+@app.get('/api/pages/{page_id}', response_model=GetPageOutputSchema, operation_id='get_page_resource')
+async def get_page_resource(request: Request, page_id: UUID, current_user: User = Depends(get_current_user)) -> GetPageOutputSchema:
+    """
+    Get a specific page with ownership verification.
+    """
+    response = await run_sync_in_thread(page_service.get_page, user=current_user, page_id=page_id)
+    return conditional_json_response(request, response, GetPageOutputSchema, etag=revision_etag(response, PAGE_REVISION_FIELDS), headers=private_cache_headers())
+
+
+@app.get('/api/pages/{page_id}/components', response_model=GetPageComponentsOutputSchema, operation_id='get_page_components_resource')
+async def get_page_components_resource(request: Request, page_id: UUID, current_user: User = Depends(get_current_user)) -> GetPageComponentsOutputSchema:
+    """
+    List the components a page uses, with the version each instance is pinned to.
+    """
+    response = await run_in_executor(DB_LIGHT, page_service.get_page_components, user=current_user, page_id=page_id)
+    return conditional_json_response(request, response, GetPageComponentsOutputSchema, headers=private_cache_headers())
+
+
+@app.get('/api/components', response_model=GetUserComponentsOutputSchema, operation_id='get_components')
+async def get_components(request: Request, category: Optional[str] = Query(None), current_user: User = Depends(get_current_user)) -> GetUserComponentsOutputSchema:
+    """
+    Get all components created by the user, optionally filtered by category.
+    """
+    response = await run_in_executor(DB_HEAVY, component_service.get_user_components, user=current_user, category=category)
+    return conditional_json_response(request, response, GetUserComponentsOutputSchema, etag=presigned_revision_etag(response, "preview_image_path"), headers=private_cache_headers())
+
+
+@app.get('/api/components/built-in', response_model=GetBuiltInComponentsOutputSchema, operation_id='get_built_in_components_resource')
+async def get_built_in_components_resource(request: Request) -> GetBuiltInComponentsOutputSchema:
+    """
+    Get all built-in components available to all users.
+    """
+    catalog = get_catalog()
+    headers = public_cache_headers(config.built_in_cache_max_age())
+    return encoded_json_response(request, catalog.body, catalog.etag, headers=headers)
+
+
+@app.get('/api/components/public', response_model=GetPublicComponentsOutputSchema, operation_id='get_public_components_resource')
+async def get_public_components_resource(request: Request, category: Optional[str] = Query(None)) -> GetPublicComponentsOutputSchema:
+    """
+    Get all public custom components, optionally filtered by category.
+    """
+    payload = component_service.get_local_public_components_payload(category)
+    if payload is None:
+        payload = await run_in_executor(DB_HEAVY, component_service.get_public_components_payload, category=category)
+    headers = public_cache_headers(config.public_cache_max_age())
+    return encoded_json_response(request, payload["body"].encode(), payload["etag"], headers=headers)
+
+
+@app.get('/api/components/search', response_model=SearchComponentsOutputSchema, operation_id='search_public_components_resource')
+async def search_public_components_resource(request: Request, q: Optional[str] = Query(None), category: Optional[str] = Query(None), page: int = Query(1, ge=1), page_size: int = Query(24, ge=1, le=100)) -> SearchComponentsOutputSchema:
+    """
+    Search public components for the marketplace, one page at a time, with per-category facet counts.
+    """
+    response = await run_in_executor(DB_HEAVY, component_service.search_public_components, query=q, category=category, page=page, page_size=page_size)
+    headers = public_cache_headers(config.public_cache_max_age())
+    return conditional_json_response(request, response, SearchComponentsOutputSchema, headers=headers)
+
+
+@app.get('/api/components/export', include_in_schema=False)
+async def export_components(category: Optional[str] = Query(None), current_user: User = Depends(get_current_user)):
+    """
+    Download the user's custom components as NDJSON, streamed from the database as it is read.
+    """
+    lines = component_service.export_components(user=current_user, category=category)
+    headers = {"Content-Disposition": 'attachment; filename="components.ndjson"', **private_cache_headers()}
+    return StreamingResponse(lines, media_type="application/x-ndjson", headers=headers)
+
+
+@app.get('/api/components/compiled/{digest}.js', include_in_schema=False)
+async def get_compiled_component(request: Request, digest: str):
+    """
+    Serve a compiled custom component module. The URL is content-addressed, so caches may keep it indefinitely.
+    """
+    try:
+        stream = await run_in_executor(STORAGE, open_artifact, digest=digest, if_none_match=request.headers.get("if-none-match"))
+    except ValueError:
+        raise HTTPException(status_code=404, detail="Compiled component not found")
+    
+    headers = {**stream.headers, "Cache-Control": "public, max-age=31536000, immutable"}
+    if stream.body is None:
+        return Response(status_code=stream.status_code, headers=headers)
+    return StreamingResponse(stream.iter_chunks(), status_code=stream.status_code, headers=headers)
+
+
+@app.get('/api/components/{component_id}', response_model=GetComponentOutputSchema, operation_id='get_component_resource')
+async def get_component_resource(request: Request, component_id: UUID, current_user: User = Depends(get_current_user)) -> GetComponentOutputSchema:
+    """
+    Get a specific component with ownership verification.
+    """
+    response = await run_sync_in_thread(component_service.get_component, user=current_user, component_id=component_id)
+    return conditional_json_response(request, response, GetComponentOutputSchema, etag=presigned_revision_etag(response, "preview_image_path"), headers=private_cache_headers())
+
+
+@app.get('/api/components/{component_id}/usage', response_model=GetComponentUsageOutputSchema, operation_id='get_component_usage_resource')
+async def get_component_usage_resource(request: Request, component_id: str, version: Optional[str] = Query(None), current_user: User = Depends(get_current_user)) -> GetComponentUsageOutputSchema:
+    """
+    List the user's pages that use a component, optionally only those pinned to one version.
+    """
+    response = await run_in_executor(DB_HEAVY, component_service.get_component_usage, user=current_user, component_id=component_id, version=version)
+    return conditional_json_response(request, response, GetComponentUsageOutputSchema, headers=private_cache_headers())
+
+
+@app.get('/api/components/{component_id}/versions', response_model=GetComponentVersionsOutputSchema, operation_id='get_component_versions_resource')
+async def get_component_versions_resource(request: Request, component_id: UUID, current_user: User = Depends(get_current_user)) -> GetComponentVersionsOutputSchema:
+    """
+    List the published versions of a component, newest first.
+    """
+    response = await run_in_executor(DB_LIGHT, component_service.get_component_versions, user=current_user, component_id=component_id)
+    return conditional_json_response(request, response, GetComponentVersionsOutputSchema, headers=private_cache_headers())
+
+
+@app.get('/api/components/{component_id}/versions/{version}', response_model=GetComponentVersionOutputSchema, operation_id='get_component_version_resource')
+async def get_component_version_resource(request: Request, component_id: str, version: str, current_user: User = Depends(get_current_user)) -> GetComponentVersionOutputSchema:
+    """
+    Get one version of a component. Versions are immutable, so the response may be cached indefinitely.
+    """
+    response = await run_in_executor(DB_LIGHT, component_service.get_component_version, user=current_user, component_id=component_id, version=version)
+    headers = private_cache_headers(IMMUTABLE_MAX_AGE, immutable=True)
+    return conditional_json_response(request, response, GetComponentVersionOutputSchema, headers=headers)
+
+
+@app.get('/api/media', response_model=GetUserMediaOutputSchema, operation_id='get_media')
+async def get_media(website_id: Optional[UUID] = Query(None), folder: Optional[str] = Query(None), mime_type_filter: Optional[str] = Query(None), current_user: User = Depends(get_current_user)) -> GetUserMediaOutputSchema:
+    """
+    Get media assets for a user, optionally filtered by website, folder, or type.
+    """
+    response = await run_in_executor(DB_HEAVY, media_service.get_user_media, user=current_user, website_id=website_id, folder=folder, mime_type_filter=mime_type_filter)
+    # Presigned URLs differ on every call, so there is no stable ETag; a short max-age lets the browser reuse the list
+    return cached_json_response(response, GetUserMediaOutputSchema, private_cache_headers(config.media_cache_max_age()))
+
+
+@app.get('/api/media/{asset_id}', response_model=GetMediaAssetOutputSchema, operation_id='get_media_asset_resource')
+async def get_media_asset_resource(asset_id: UUID, current_user: User = Depends(get_current_user)) -> GetMediaAssetOutputSchema:
+    """
+    Get a specific media asset with ownership verification.
+    """
+    response = await run_sync_in_thread(media_service.get_media_asset, user=current_user, asset_id=asset_id)
+    return cached_json_response(response, GetMediaAssetOutputSchema, private_cache_headers(config.media_cache_max_age()))
@@ -0,0 +1,105 @@
+"""
+Response encoding cost for large page payloads.
+
+Compares FastAPI's default response_model path (dump, re-validate, jsonable_encoder, json.dumps) with
+fast_json_response (one pydantic-core dump_json) for a single large page and for a website's page list.
+
+    cd services && python -m benchmarks.json_responses
+"""
+
+from typing import List
+import asyncio
+import statistics
+import time
+import uuid
+
+from fastapi import FastAPI
+
+from api.responses import fast_json_response
+from benchmarks.middleware_overhead import call
+from core.page import Page
+
+ROUNDS = 5
+# Roughly the size of the largest pages in the editor: ~60 sections of ~25 components each
+SECTIONS = 60
+COMPONENTS_PER_SECTION = 25
+PAGES_PER_WEBSITE = 40
+
+
+def build_page(website_id: uuid.UUID, index: int) -> Page:
+    sections = []
+    for s in range(SECTIONS):
+        children = []
+        for c in range(COMPONENTS_PER_SECTION):
+            children.append({
+                "id": str(uuid.uuid4()),
+                "component_id": str(uuid.uuid4()),
+                "type": "Card",
+                "props": {
+                    "title": f"Card {s}-{c}",
+                    "description": "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 3,
+                    "image": {"src": f"https://cdn.example.com/{uuid.uuid4()}.webp", "alt": "", "width": 640},
+                    "tags": ["one", "two", "three"],
+                    "cta": {"label": "Read more", "href": f"/posts/{s}-{c}", "variant": "primary"},
+                },
+                "styles": {"padding": "16px", "margin": "0 auto", "maxWidth": "1200px"},
+            })
+        sections.append({"id": str(uuid.uuid4()), "type": "Section", "props": {"layout": "grid"}, "children": children})
+    return Page(
+        website_id=website_id,
+        title=f"Page {index}",
+        slug=f"page-{index}",
+        content_structure={"version": 1, "root": {"type": "Root", "children": sections}},
+        styles={"theme": "light", "fonts": ["Inter", "Georgia"]},
+    )
+
+
+def build_app(page: Page, pages: List[Page]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/default/page", response_model=Page)
+    async def default_page():
+        return page
+
+    @app.get("/fast/page", response_model=Page)
+    async def fast_page():
+        return fast_json_response(page, Page)
+
+    @app.get("/default/pages", response_model=List[Page])
+    async def default_pages():
+        return pages
+
+    @app.get("/fast/pages", response_model=List[Page])
+    async def fast_pages():
+        return fast_json_response(pages, List[Page])
+
+    return app
+
+
+async def measure(app: FastAPI, path: str, requests: int) -> float:
+    """Median milliseconds per request over ROUNDS rounds."""
+    await call(app, path)
+    rounds = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for _ in range(requests):
+            await call(app, path)
+        rounds.append((time.perf_counter() - start) / requests * 1000)
+    return statistics.median(rounds)
+
+
+async def main():
+    website_id = uuid.uuid4()
+    page = build_page(website_id, 0)
+    pages = [page] + [build_page(website_id, i) for i in range(1, PAGES_PER_WEBSITE)]
+    app = build_app(page, pages)
+    size = len(page.model_dump_json())
+    print(f"page: {size / 1024:.0f} KiB, website: {size * PAGES_PER_WEBSITE / 1024 / 1024:.1f} MiB")
+    for name, requests in (("page", 20), ("pages", 2)):
+        default = await measure(app, f"/default/{name}", requests)
+        fast = await measure(app, f"/fast/{name}", requests)
+        print(f"GET /{name}: default {default:7.1f} ms, fast {fast:7.1f} ms ({default / fast:.1f}x)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,135 @@
+"""
+Per-request overhead of the API middleware stack.
+
+Compares the previous @app.middleware("http") stack (log_requests + auth_cors_middleware, each a
+BaseHTTPMiddleware) against RequestMiddleware, both behind CORSMiddleware, on a trivial JSON route and an auth
+route. The ASGI app is called directly so only framework and middleware cost is measured.
+
+    cd services && python -m benchmarks.middleware_overhead
+"""
+
+from datetime import datetime
+import asyncio
+import statistics
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.middleware.cors import CORSMiddleware
+from loguru import logger
+
+from api.middleware import RequestMiddleware
+
+REQUESTS = 5000
+ROUNDS = 5
+AUTH_ORIGINS = ["https://example.com"]
+
+
+def get_auth_origins():
+    return AUTH_ORIGINS
+
+
+def add_routes(app: FastAPI):
+    @app.get("/api/ping")
+    async def ping():
+        return {"ok": True}
+
+    @app.get("/api/auth/ping")
+    async def auth_ping():
+        return {"ok": True}
+
+
+def build_before() -> FastAPI:
+    app = FastAPI()
+    add_routes(app)
+
+    @app.middleware("http")
+    async def log_requests(request: Request, call_next):
+        request_id = str(uuid.uuid4())[:8]
+        with logger.contextualize(request_id=request_id):
+            start_time = datetime.utcnow()
+            response = await call_next(request)
+            process_time = (datetime.utcnow() - start_time).total_seconds()
+            logger.info(f"{request.method} {request.url.path} ({response.status_code}) - {process_time:.3f}s")
+            return response
+
+    app.add_middleware(CORSMiddleware, allow_origins=AUTH_ORIGINS, allow_credentials=True)
+
+    async def auth_cors_middleware(request: Request, call_next):
+        if request.url.path.startswith("/api/auth"):
+            origin = request.headers.get("origin", "")
+            response = await call_next(request)
+            if origin in get_auth_origins():
+                response.headers["Access-Control-Allow-Origin"] = origin
+                response.headers["Access-Control-Allow-Credentials"] = "true"
+            else:
+                response.headers["Access-Control-Allow-Origin"] = ""
+            return response
+        return await call_next(request)
+
+    app.middleware("http")(auth_cors_middleware)
+    return app
+
+
+def build_after() -> FastAPI:
+    app = FastAPI()
+    add_routes(app)
+    app.add_middleware(CORSMiddleware, allow_origins=AUTH_ORIGINS, allow_credentials=True)
+    app.add_middleware(RequestMiddleware, get_auth_origins=get_auth_origins, rate_limits={})
+    return app
+
+
+async def call(app: FastAPI, path: str):
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"localhost"), (b"origin", b"https://example.com")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("localhost", 8000),
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    await app(scope, receive, send)
+
+
+async def measure(app: FastAPI, path: str) -> float:
+    """Median microseconds per request over ROUNDS rounds."""
+    for _ in range(200):
+        await call(app, path)
+    rounds = []
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        for _ in range(REQUESTS):
+            await call(app, path)
+        rounds.append((time.perf_counter() - start) / REQUESTS * 1e6)
+    return statistics.median(rounds)
+
+
+async def main():
+    # Both stacks log one line per request; drop the output so only formatting cost remains
+    logger.remove()
+    bare = FastAPI()
+    add_routes(bare)
+    apps = {"no middleware": bare, "before": build_before(), "after": build_after()}
+    for path in ("/api/ping", "/api/auth/ping"):
+        results = {name: await measure(app, path) for name, app in apps.items()}
+        print(f"GET {path}")
+        for name, micros in results.items():
+            overhead = micros - results["no middleware"]
+            print(f"  {name:<14} {micros:8.1f} us/request  (+{overhead:.1f} us middleware)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
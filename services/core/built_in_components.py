@@ -0,0 +1,324 @@
+"""
+Registry of built-in components, loaded from versioned manifests.
+
+Every file in core/built_ins (JSON, or YAML when PyYAML is installed) is a manifest, loaded in filename order:
+
+    {"manifest_version": 1, "components": [{"id": "hero-classic", "version": "1.0.0", "name": ..., ...}]}
+
+Adding a component is a new entry or file, with no code changes. Manifests are validated once and compiled into a
+BuiltInCatalog indexed by id, category and version, together with the encoded JSON list and its ETag. Deployments
+load the catalog written by `python -m core.built_in_components`, which skips parsing and validation as long as it
+was compiled from the current manifests. With BUILT_IN_COMPONENTS_HOT_RELOAD, edited manifests are picked up on
+the next lookup.
+"""
+
+from datetime import datetime
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Dict, List, Literal, Mapping, Optional, Sequence, Tuple
+from uuid import UUID
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+from pydantic import BaseModel, ConfigDict, Field, TypeAdapter
+
+from solar.config import config
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+# JSON decoding and pydantic validation errors are ValueErrors
+PARSE_ERRORS = (ValueError, yaml.YAMLError) if yaml is not None else (ValueError,)
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+MANIFEST_SUFFIXES = (".json", ".yaml", ".yml")
+DEFAULT_MANIFEST_DIR = Path(__file__).resolve().parent / "built_ins"
+DEFAULT_CATALOG_FILE = Path(__file__).resolve().parent / "built_ins.compiled.json"
+BUILT_IN_USER_ID = UUID("00000000-0000-0000-0000-000000000000")
+# Seconds between manifest mtime checks when hot reload is on
+RELOAD_CHECK_INTERVAL = 1.0
+
+
+class ManifestError(ValueError):
+    pass
+
+##############################################################################
+# Manifests
+##############################################################################
+
+
+class BuiltInComponentDefinition(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    # Saved pages and the frontend renderer refer to built-ins by these slugs, so they stay slugs rather than
+    # Component.id UUIDs and are validated as such here
+    id: str = Field(pattern=r"^[a-z0-9]+(-[a-z0-9]+)*$")
+    version: str = Field(pattern=r"^\d+\.\d+\.\d+$")
+    name: str
+    description: Optional[str] = None
+    category: str
+    code: str = ""
+    styles: str = ""
+    props_schema: Dict[str, Any] = {}
+
+
+class BuiltInComponent(BaseModel):
+    """
+    A built-in component as served to clients: the fields of a Component, with the manifest slug as its id since
+    saved pages and the frontend renderer refer to built-ins by slug.
+    """
+
+    id: str
+    user_id: UUID
+    name: str
+    description: Optional[str] = None
+    category: str
+    component_type: Literal["built-in"]
+    code: str = ""
+    styles: str = ""
+    props_schema: Dict[str, Any] = {}
+    preview_image_path: Optional[str] = None
+    compiled_url: Optional[str] = None
+    is_public: bool = False
+    version: str
+    created_at: datetime
+    updated_at: datetime
+
+
+class BuiltInComponentVersion(BaseModel):
+    """One version of a built-in component, shaped like a ComponentVersion with the slug as component_id."""
+
+    id: UUID
+    component_id: str
+    version: str
+    code: str = ""
+    styles: str = ""
+    props_schema: Dict[str, Any] = {}
+    compiled_url: Optional[str] = None
+    created_at: datetime
+
+
+class BuiltInManifest(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    manifest_version: int
+    components: List[BuiltInComponentDefinition]
+
+
+def manifest_paths(directory: Path) -> List[Path]:
+    return sorted(path for path in directory.iterdir() if path.suffix in MANIFEST_SUFFIXES and path.is_file())
+
+
+def read_manifest(path: Path) -> BuiltInManifest:
+    if path.suffix != ".json" and yaml is None:
+        raise ManifestError(f"{path.name}: PyYAML is required to load YAML manifests")
+    try:
+        raw = path.read_bytes()
+        data = json.loads(raw) if path.suffix == ".json" else yaml.safe_load(raw)
+        manifest = BuiltInManifest.model_validate(data)
+    except PARSE_ERRORS as e:
+        raise ManifestError(f"{path.name}: {e}") from e
+    if manifest.manifest_version != MANIFEST_VERSION:
+        raise ManifestError(f"{path.name}: unsupported manifest_version {manifest.manifest_version}")
+    return manifest
+
+
+def load_definitions(paths: Sequence[Path]) -> List[BuiltInComponentDefinition]:
+    """Validated definitions from all manifests; each (id, version) may be defined only once."""
+    definitions = []
+    defined_in = {}
+    for path in paths:
+        for definition in read_manifest(path).components:
+            key = (definition.id, definition.version)
+            if key in defined_in:
+                raise ManifestError(f"{path.name}: {definition.id}@{definition.version} is already defined in {defined_in[key]}")
+            defined_in[key] = path.name
+            definitions.append(definition)
+    return definitions
+
+
+def manifests_fingerprint(paths: Sequence[Path]) -> str:
+    """Hash of the manifests' names and contents, recorded in the compiled catalog to detect staleness."""
+    digest = hashlib.sha256(MANIFEST_VERSION.to_bytes(2, "big"))
+    for path in paths:
+        digest.update(path.name.encode() + b"\x00" + path.read_bytes() + b"\x00")
+    return digest.hexdigest()
+
+
+def manifests_updated_at(paths: Sequence[Path]) -> datetime:
+    """The newest manifest mtime, so every worker of a deployment stamps the catalog identically."""
+    return datetime.fromtimestamp(int(max((path.stat().st_mtime for path in paths), default=0)))
+
+
+def _semver(version: str) -> Tuple[int, ...]:
+    return tuple(int(part) for part in version.split("."))
+
+##############################################################################
+# Catalog
+##############################################################################
+
+
+class BuiltInCatalog:
+    """
+    Immutable view of the built-in components with their pre-encoded JSON list.
+
+    `components` and `by_id` hold the latest version of each id, `by_version` every (id, version). The models are
+    shared between requests and must not be modified. They are built with model_construct from definitions that
+    were already validated against BuiltInComponentDefinition, whose fields BuiltInComponent shares.
+    """
+
+    def __init__(self, definitions: Sequence[Dict[str, Any]], updated_at: datetime, fingerprint: str):
+        versions = {}
+        for definition in definitions:
+            component = BuiltInComponent.model_construct(
+                **definition,
+                user_id=BUILT_IN_USER_ID,
+                component_type="built-in",
+                created_at=updated_at,
+                updated_at=updated_at,
+            )
+            versions[(component.id, component.version)] = component
+
+        latest = {}
+        for component in versions.values():
+            current = latest.get(component.id)
+            if current is None or _semver(component.version) > _semver(current.version):
+                latest[component.id] = component
+
+        by_category = {}
+        for component in latest.values():
+            by_category.setdefault(component.category, []).append(component)
+
+        self.fingerprint = fingerprint
+        self.updated_at = updated_at
+        self.components: Tuple[BuiltInComponent, ...] = tuple(latest.values())
+        self.by_id: Mapping[str, BuiltInComponent] = MappingProxyType(latest)
+        self.by_version: Mapping[Tuple[str, str], BuiltInComponent] = MappingProxyType(versions)
+        self.by_category: Mapping[str, Tuple[BuiltInComponent, ...]] = MappingProxyType(
+            {category: tuple(components) for category, components in by_category.items()}
+        )
+        self.body: bytes = TypeAdapter(List[BuiltInComponent]).dump_json(list(self.components))
+        self.etag: str = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+
+    def get(self, component_id: str, version: Optional[str] = None) -> Optional[BuiltInComponent]:
+        if version is None:
+            return self.by_id.get(component_id)
+        return self.by_version.get((component_id, version))
+
+
+def compile_catalog(directory: Path, catalog_file: Path) -> BuiltInCatalog:
+    """Validate the manifests and write them as one catalog file that load_catalog can trust."""
+    paths = manifest_paths(directory)
+    definitions = [definition.model_dump() for definition in load_definitions(paths)]
+    catalog = BuiltInCatalog(definitions, manifests_updated_at(paths), manifests_fingerprint(paths))
+    compiled = {
+        "manifest_version": MANIFEST_VERSION,
+        "fingerprint": catalog.fingerprint,
+        "updated_at": catalog.updated_at.isoformat(),
+        "components": definitions,
+    }
+    temp_file = catalog_file.with_name(f".{catalog_file.name}.{os.getpid()}")
+    temp_file.write_text(json.dumps(compiled, ensure_ascii=False))
+    temp_file.replace(catalog_file)
+    return catalog
+
+
+def load_catalog(directory: Path, catalog_file: Path) -> BuiltInCatalog:
+    """The compiled catalog when it matches the manifests, otherwise one built by validating the manifests."""
+    paths = manifest_paths(directory)
+    fingerprint = manifests_fingerprint(paths)
+    try:
+        compiled = json.loads(catalog_file.read_bytes())
+    except FileNotFoundError:
+        compiled = None
+    except ValueError:
+        logger.warning(f"Ignoring unreadable built-in catalog {catalog_file}")
+        compiled = None
+
+    if compiled is not None and compiled.get("fingerprint") == fingerprint:
+        return BuiltInCatalog(compiled["components"], datetime.fromisoformat(compiled["updated_at"]), fingerprint)
+    if compiled is not None:
+        logger.warning(f"Built-in catalog {catalog_file} is stale; loading manifests from {directory}")
+
+    definitions = [definition.model_dump() for definition in load_definitions(paths)]
+    return BuiltInCatalog(definitions, manifests_updated_at(paths), fingerprint)
+
+##############################################################################
+# Registry
+##############################################################################
+
+
+class BuiltInRegistry:
+    """
+    Holds the current catalog. With hot reload, manifest mtimes are checked at most every RELOAD_CHECK_INTERVAL
+    and the catalog is rebuilt when they change; a manifest that fails validation or can't be read (say, mid-save)
+    keeps the previous catalog.
+    """
+
+    def __init__(self, directory: Path, catalog_file: Path, hot_reload: bool):
+        self.directory = directory
+        self.catalog_file = catalog_file
+        self.hot_reload = hot_reload
+        self._lock = threading.Lock()
+        self._signature = self._manifest_signature()
+        self._checked_at = time.monotonic()
+        self._catalog = load_catalog(directory, catalog_file)
+
+    @property
+    def catalog(self) -> BuiltInCatalog:
+        if self.hot_reload and time.monotonic() - self._checked_at >= RELOAD_CHECK_INTERVAL:
+            self._reload_if_changed()
+        return self._catalog
+
+    def _manifest_signature(self) -> Tuple:
+        signature = []
+        for path in manifest_paths(self.directory):
+            stat = path.stat()
+            signature.append((path.name, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def _reload_if_changed(self):
+        with self._lock:
+            if time.monotonic() - self._checked_at < RELOAD_CHECK_INTERVAL:
+                return
+            self._checked_at = time.monotonic()
+            try:
+                signature = self._manifest_signature()
+            except OSError as e:
+                # A manifest replaced between listing and stat; the next check sees the settled directory
+                logger.warning(f"Could not check built-in manifests: {e}")
+                return
+            if signature == self._signature:
+                return
+            # Recorded before loading so a broken manifest is reported once, not on every check
+            self._signature = signature
+            try:
+                self._catalog = load_catalog(self.directory, self.catalog_file)
+            except (ManifestError, OSError) as e:
+                logger.error(f"Keeping the previous built-in catalog: {e}")
+                return
+            logger.info(f"Reloaded {len(self._catalog.by_version)} built-in components")
+
+
+registry = BuiltInRegistry(
+    config.built_in_components_dir() or DEFAULT_MANIFEST_DIR,
+    config.built_in_catalog_file() or DEFAULT_CATALOG_FILE,
+    config.built_in_components_hot_reload(),
+)
+
+
+def get_catalog() -> BuiltInCatalog:
+    return registry.catalog
+
+
+if __name__ == "__main__":
+    catalog = compile_catalog(registry.directory, registry.catalog_file)
+    print(f"Compiled {len(catalog.by_version)} built-in components into {registry.catalog_file}")
@@ -16,6 +16,7 @@ class Component(Table):
     styles: Optional[str] = None  # CSS/Tailwind styles
     props_schema: Dict = {}  # JSON schema for component properties
     preview_image_path: Optional[str] = None  # Preview image in media bucket
+    compiled_url: Optional[str] = None  # Compiled ES module of custom code, see core.component_compiler
     is_public: bool = False  # Whether other users can use this component
     version: str = "1.0.0"
     created_at: datetime = ColumnDetails(default_factory=datetime.now)
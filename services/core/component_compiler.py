@@ -0,0 +1,430 @@
+"""
+Compiler for custom component code.
+
+Component code is saved as JSX; browsers would have to transpile it on every render. On save it is compiled here
+instead, in the same single pass over the code that component_validation uses: JSX elements become
+React.createElement calls (the classic runtime), comments and insignificant whitespace are dropped, and the result
+is an ES module whose default export is the component. The artifact is stored in the bucket under the SHA-256 of
+the source and COMPILER_VERSION, so unchanged code is never compiled or uploaded twice, and it is served with
+immutable caching from ARTIFACT_ROUTE.
+
+The builder does not load artifacts yet: ComponentRenderer still shows custom components as a summary card.
+Rendering them needs a sandboxed frame with an import map for "react", so the artifact URL is only recorded
+(Component.compiled_url) for now.
+"""
+
+from typing import List, Optional, Tuple
+import hashlib
+import html
+import json
+import logging
+import re
+
+from botocore.exceptions import ClientError
+from solar.cache import TTLCache
+from solar.media import MediaFile, MediaStream, save_to_bucket, stream_from_bucket
+from core.component_validation import (
+    CLOSING,
+    JS_TOKEN,
+    JSX_ATTRIBUTE_NAME,
+    JSX_NAME,
+    JSX_SPACE,
+    JSX_TEXT,
+    KEYWORDS_BEFORE_EXPRESSION,
+    MAX_NESTING,
+    STRING,
+    CodeSyntaxError,
+)
+
+logger = logging.getLogger(__name__)
+
+# Part of every artifact hash; bump it when the output of the compiler changes
+COMPILER_VERSION = "2"
+ARTIFACT_ROUTE = "/api/components/compiled"
+ARTIFACT_MIME_TYPE = "text/javascript"
+ARTIFACT_PREFIX = "components/compiled"
+PRAGMA = "React.createElement"
+FRAGMENT = "React.Fragment"
+REACT_IMPORT = re.compile(r"\bimport\s+(?:\*\s+as\s+)?React\b")
+ARTIFACT_NAME = re.compile(r"^[0-9a-f]{64}$")
+DECLARATION_KEYWORDS = ("function", "class", "const", "let", "var")
+# export { Hero as default }, matched on the compiled module, which has no comments left
+DEFAULT_EXPORT_CLAUSE = re.compile(r"\bexport\{[^{}]*\bas default\b")
+
+# Hashes uploaded by this process, so re-saving unchanged code skips the PUT
+_uploaded = TTLCache(4096)
+UPLOADED_TTL = 24 * 3600  # seconds
+
+
+def _is_word(char: str) -> bool:
+    return char.isalnum() or char in "_$" or ord(char) > 127
+
+##############################################################################
+# Compiler
+##############################################################################
+
+
+class _Compiler:
+    def __init__(self, code: str):
+        self.code = code
+        self.length = len(code)
+        self.out: List[str] = []
+        self.last: Tuple[str, str] = ("", "")
+        # Whitespace skipped since the last write: "", " " or "\n"
+        self.gap = ""
+        self.depth = 0
+        self.has_default_export = False
+        # Top-level functions, classes and variables, in order, and those of them declared with `export`
+        self.declared: List[str] = []
+        self.exported: List[str] = []
+        self._exporting = False
+
+    # Output ------------------------------------------------------------------
+
+    def write(self, text: str):
+        if self.gap and self.out:
+            previous, first = self.out[-1][-1], text[0]
+            if self.gap == "\n" and previous not in "{([;,:=" and first not in ")]};,.?:":
+                # Kept where automatic semicolon insertion may depend on it
+                self.out.append("\n")
+            elif (_is_word(previous) and (_is_word(first) or (first == "." and previous.isdigit()))) \
+                    or (previous in "+-/" and first == previous):
+                self.out.append(" ")
+        self.gap = ""
+        self.out.append(text)
+
+    def skip(self, text: str):
+        if "\n" in text:
+            self.gap = "\n"
+        elif not self.gap:
+            self.gap = " "
+
+    def _enter(self, start: int):
+        self.depth += 1
+        if self.depth > MAX_NESTING:
+            raise CodeSyntaxError("Code is nested too deeply", start, start + 1)
+
+    def _expression_allowed(self) -> bool:
+        kind, value = self.last
+        if kind in ("number", "string", "template", "regex", "jsx"):
+            return False
+        if kind == "name":
+            return value in KEYWORDS_BEFORE_EXPRESSION
+        if kind == "punct":
+            return value not in (")", "]", "}", "++", "--")
+        return True
+
+    # JavaScript --------------------------------------------------------------
+
+    def compile_js(self, pos: int, until_brace: bool = False) -> int:
+        """Like _Scanner.scan_js, writing the compiled tokens. With until_brace the closing `}` is not written."""
+        code = self.code
+        stack: List[str] = []
+        while pos < self.length:
+            char = code[pos]
+            if char == "/" and code.startswith("//", pos):
+                end = code.find("\n", pos)
+                end = self.length if end < 0 else end
+                self.skip(code[pos:end])
+                pos = end
+                continue
+            if char == "/" and code.startswith("/*", pos):
+                end = code.find("*/", pos + 2)
+                if end < 0:
+                    raise CodeSyntaxError("Unterminated comment", pos, self.length)
+                self.skip(code[pos:end + 2])
+                pos = end + 2
+                continue
+            if char in STRING:
+                match = STRING[char].match(code, pos)
+                if match is None:
+                    raise CodeSyntaxError("Unterminated string", pos, pos + 1)
+                self.write(match.group())
+                self.last = ("string", "")
+                pos = match.end()
+                continue
+            if char == "`":
+                pos = self.compile_template(pos)
+                continue
+            if char == "/" and self._expression_allowed():
+                pos = self.compile_regex(pos)
+                continue
+            if char == "<" and self._expression_allowed() and pos + 1 < self.length \
+                    and (code[pos + 1] == ">" or code[pos + 1].isalpha() or code[pos + 1] in "_$"):
+                pos = self.compile_jsx_element(pos)
+                self.last = ("jsx", "")
+                continue
+
+            match = JS_TOKEN.match(code, pos)
+            if match is None:
+                raise CodeSyntaxError(f"Unexpected character {char!r}", pos, pos + 1)
+            kind, value, end = match.lastgroup, match.group(), match.end()
+            if kind == "space":
+                self.skip(value)
+                pos = end
+                continue
+            top_level = not stack and not until_brace and self.depth == 0
+            if kind == "punct" and value in CLOSING:
+                stack.append(value)
+            elif kind == "punct" and value in (")", "]", "}"):
+                if not stack:
+                    if until_brace and value == "}":
+                        return end
+                    raise CodeSyntaxError(f"Unexpected '{value}'", pos, end)
+                if CLOSING[stack.pop()] != value:
+                    raise CodeSyntaxError(f"Mismatched '{value}'", pos, end)
+            if top_level and kind == "name":
+                self._track_declaration(value)
+            self.write(value)
+            self.last = (kind, value)
+            pos = end
+
+        if stack or until_brace:
+            raise CodeSyntaxError("Unclosed bracket", pos, pos)
+        return pos
+
+    def _track_declaration(self, name: str):
+        if name == "export":
+            self._exporting = True
+        elif name == "default" and self.last == ("name", "export"):
+            self.has_default_export = True
+        elif self.last[0] == "name" and self.last[1] in DECLARATION_KEYWORDS:
+            self.declared.append(name)
+            if self._exporting:
+                self.exported.append(name)
+            self._exporting = False
+        elif name not in DECLARATION_KEYWORDS and name != "async":
+            self._exporting = False
+
+    def compile_template(self, start: int) -> int:
+        code = self.code
+        pos = start + 1
+        chunk_start = start
+        self._enter(start)
+        while pos < self.length:
+            char = code[pos]
+            if char == "\\":
+                pos += 2
+            elif char == "`":
+                self.write(code[chunk_start:pos + 1])
+                self.depth -= 1
+                self.last = ("template", "")
+                return pos + 1
+            elif char == "$" and code.startswith("${", pos):
+                self.write(code[chunk_start:pos + 2])
+                self.last = ("punct", "${")
+                pos = self.compile_js(pos + 2, until_brace=True)
+                self.gap = ""
+                chunk_start = pos - 1
+            else:
+                pos += 1
+        raise CodeSyntaxError("Unterminated template literal", start, self.length)
+
+    def compile_regex(self, start: int) -> int:
+        code = self.code
+        pos = start + 1
+        in_class = False
+        while pos < self.length and code[pos] != "\n":
+            char = code[pos]
+            if char == "\\":
+                pos += 2
+                continue
+            if char == "[":
+                in_class = True
+            elif char == "]":
+                in_class = False
+            elif char == "/" and not in_class:
+                pos += 1
+                while pos < self.length and (code[pos].isalnum() or code[pos] in "_$"):
+                    pos += 1
+                self.write(code[start:pos])
+                self.last = ("regex", "")
+                return pos
+            pos += 1
+        raise CodeSyntaxError("Unterminated regular expression", start, pos)
+
+    # JSX ---------------------------------------------------------------------
+
+    def _space(self, pos: int) -> int:
+        return JSX_SPACE.match(self.code, pos).end()
+
+    def _expression(self, pos: int) -> int:
+        """Compile the JavaScript inside a JSX `{...}` starting at the brace; returns the position after `}`."""
+        self.last = ("punct", "{")
+        end = self.compile_js(pos + 1, until_brace=True)
+        self.gap = ""
+        return end
+
+    def compile_jsx_element(self, start: int) -> int:
+        code = self.code
+        self._enter(start)
+        pos = self._space(start + 1)
+        name = ""
+        if code[pos] != ">":
+            match = JSX_NAME.match(code, pos)
+            if match is None:
+                raise CodeSyntaxError("Expected a JSX tag name", pos, pos + 1)
+            name = match.group()
+            pos = match.end()
+        if not name:
+            tag = FRAGMENT
+        elif "." not in name and (name[0].islower() or "-" in name or ":" in name):
+            tag = json.dumps(name)
+        else:
+            tag = name
+        self.write(f"{PRAGMA}({tag},")
+
+        # Attributes, as an object literal (or null)
+        has_props = False
+        while True:
+            pos = self._space(pos)
+            if pos >= self.length:
+                raise CodeSyntaxError(f"Unclosed JSX tag <{name}>", start, self.length)
+            if code.startswith("/>", pos) or code[pos] == ">":
+                break
+            self.write("," if has_props else "{")
+            has_props = True
+            if code[pos] == "{":
+                pos = self._expression(pos)
+                continue
+            match = JSX_ATTRIBUTE_NAME.match(code, pos)
+            if match is None:
+                raise CodeSyntaxError(f"Unexpected {code[pos]!r} in JSX tag <{name}>", pos, pos + 1)
+            attribute = match.group()
+            self.write((attribute if re.fullmatch(r"[A-Za-z_$][\w$]*", attribute) else json.dumps(attribute)) + ":")
+            pos = self._space(match.end())
+            if pos < self.length and code[pos] == "=":
+                pos = self._space(pos + 1)
+                if pos < self.length and code[pos] in "\"'":
+                    end = code.find(code[pos], pos + 1)
+                    if end < 0:
+                        raise CodeSyntaxError("Unterminated JSX attribute string", pos, self.length)
+                    self.write(json.dumps(html.unescape(code[pos + 1:end]), ensure_ascii=False))
+                    pos = end + 1
+                elif pos < self.length and code[pos] == "{":
+                    pos = self._expression(pos)
+                elif pos < self.length and code[pos] == "<":
+                    pos = self.compile_jsx_element(pos)
+                else:
+                    raise CodeSyntaxError(f"Expected a value for JSX attribute {attribute}", pos, pos + 1)
+            else:
+                self.write("true")
+        self.write("}" if has_props else "null")
+
+        if code.startswith("/>", pos):
+            self.write(")")
+            self.depth -= 1
+            return pos + 2
+
+        # Children
+        pos += 1
+        while True:
+            text_end = JSX_TEXT.match(code, pos).end()
+            text = _jsx_text(code[pos:text_end])
+            if text:
+                self.write("," + json.dumps(text, ensure_ascii=False))
+            pos = text_end
+            if pos >= self.length:
+                raise CodeSyntaxError(f"Unclosed JSX element <{name}>", start, start + 1)
+            if code[pos] == "{":
+                inner = self._space(pos + 1)
+                if inner < self.length and code[inner] == "}":
+                    # Empty container, typically {/* comment */}
+                    pos = inner + 1
+                    continue
+                self.write(",")
+                pos = self._expression(pos)
+            elif code.startswith("</", pos):
+                close_start = pos
+                pos = self._space(pos + 2)
+                match = JSX_NAME.match(code, pos)
+                closing = match.group() if match else ""
+                pos = self._space(match.end() if match else pos)
+                if closing != name or pos >= self.length or code[pos] != ">":
+                    raise CodeSyntaxError(f"Expected </{name}>", close_start, pos)
+                self.write(")")
+                self.depth -= 1
+                return pos + 1
+            else:
+                self.write(",")
+                pos = self.compile_jsx_element(pos)
+
+
+def _jsx_text(raw: str) -> str:
+    """JSX text as React sees it: lines trimmed, whitespace-only lines dropped, the rest joined by single spaces."""
+    if not raw or (raw.isspace() and "\n" in raw):
+        return ""
+    lines = raw.split("\n")
+    kept = []
+    for index, line in enumerate(lines):
+        if index > 0:
+            line = line.lstrip(" \t\r")
+        if index < len(lines) - 1:
+            line = line.rstrip(" \t\r")
+        if line:
+            kept.append(line)
+    return html.unescape(" ".join(kept))
+
+
+def compile_component(code: str) -> str:
+    """Compile JSX component code into a minified ES module with the component as its default export."""
+    compiler = _Compiler(code)
+    compiler.compile_js(0)
+    module = "".join(compiler.out)
+    if not compiler.has_default_export and not DEFAULT_EXPORT_CLAUSE.search(module) and compiler.declared:
+        # Code written for the editor just declares the component, or exports it by name; export the first
+        # PascalCase declaration as the default, preferring exported ones
+        candidates = compiler.exported or compiler.declared
+        name = next((name for name in candidates if name[0].isupper()), candidates[-1])
+        module += f";export default {name};"
+    if not REACT_IMPORT.search(code):
+        module = 'import React from"react";\n' + module
+    return module
+
+##############################################################################
+# Artifacts
+##############################################################################
+
+
+def artifact_hash(code: str) -> str:
+    return hashlib.sha256(f"{COMPILER_VERSION}\x00{code}".encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def artifact_path(digest: str) -> str:
+    return f"{ARTIFACT_PREFIX}/{digest[:2]}/{digest}.js"
+
+
+def artifact_url(digest: str) -> str:
+    return f"{ARTIFACT_ROUTE}/{digest}.js"
+
+
+def publish_artifact(code: str) -> Optional[str]:
+    """
+    Compile and store the code unless an artifact for it already exists; returns the artifact URL, or None when
+    compiling or uploading failed (the component is still saved, and renders from its source).
+    """
+    digest = artifact_hash(code)
+    if _uploaded.get(digest) is None:
+        try:
+            compiled = compile_component(code).encode()
+            save_to_bucket(MediaFile(size=len(compiled), mime_type=ARTIFACT_MIME_TYPE, bytes=compiled), artifact_path(digest))
+        except CodeSyntaxError as e:
+            logger.warning(f"Could not compile component code: {e}")
+            return None
+        except Exception as e:
+            logger.warning(f"Could not store compiled component {digest}: {e}")
+            return None
+        _uploaded.set(digest, True, UPLOADED_TTL)
+    return artifact_url(digest)
+
+
+def open_artifact(digest: str, if_none_match: Optional[str] = None) -> MediaStream:
+    """Open a compiled artifact for streaming; raises ValueError for names that are not artifacts or don't exist."""
+    if not ARTIFACT_NAME.match(digest):
+        raise ValueError("Compiled component not found")
+    try:
+        return stream_from_bucket(artifact_path(digest), if_none_match=if_none_match)
+    except ClientError as e:
+        if e.response.get("ResponseMetadata", {}).get("HTTPStatusCode") == 404:
+            raise ValueError("Compiled component not found") from e
+        raise
@@ -0,0 +1,265 @@
+"""
+Validation of component instance props against the component's props_schema.
+
+A props_schema maps prop names to {type, default, options?, required?}. compile_props_schema turns one into a
+validator: a list of per-prop checks picked once from the schema, so validating an instance is a loop over
+closures rather than a walk of the schema. Validators are cached by component id and version; versions never
+change once published, so a cached validator stays correct for as long as it is kept.
+
+Validators fill in defaults for missing props and coerce values the property panel may send in another form
+("12" for a number, "true" for a boolean). A cleared field ("" or whitespace) counts as missing, except for string
+props, where an empty string is a value. Props not described by the schema are passed through unchanged.
+"""
+
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import copy
+import math
+import re
+import uuid
+
+from solar.cache import TTLCache
+from core.built_in_components import get_catalog
+from core.component_version import ComponentVersion, version_id
+
+VALIDATOR_CACHE_ENTRIES = 4096
+VALIDATOR_CACHE_TTL = 24 * 3600  # seconds
+MAX_PROP_ERRORS = 20
+
+_validators = TTLCache(VALIDATOR_CACHE_ENTRIES)
+
+# Hex and named colors; functional colors (rgb(), hsl(var(--primary)), color-mix(...)) are checked by _is_color
+COLOR = re.compile(r"^(?:#(?:[\da-fA-F]{3,4}|[\da-fA-F]{6}|[\da-fA-F]{8})|[a-zA-Z]+)$")
+COLOR_FUNCTION = re.compile(r"^[a-z][a-z-]*\([^;{}\\\"'<>]*\)$")
+SCRIPT_URL = re.compile(r"^\s*(?:javascript|vbscript|data:text/html)", re.IGNORECASE)
+NUMBER = re.compile(r"^\s*-?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?\s*$")
+
+PropsValidator = Callable[[Dict[str, Any]], Tuple[Dict[str, Any], List[str]]]
+
+
+class InvalidComponentProps(ValueError):
+    """Props of component instances on a page don't match their schemas; `errors` lists every problem."""
+
+    def __init__(self, errors: List[str]):
+        shown = "; ".join(errors[:MAX_PROP_ERRORS])
+        more = f" (and {len(errors) - MAX_PROP_ERRORS} more)" if len(errors) > MAX_PROP_ERRORS else ""
+        super().__init__(f"Invalid component props: {shown}{more}")
+        self.errors = errors[:MAX_PROP_ERRORS]
+
+# A check returns the normalized value, or raises ValueError with what was expected
+PropCheck = Callable[[Any], Any]
+
+##############################################################################
+# Checks
+##############################################################################
+
+
+def _check_string(value: Any) -> Any:
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return str(value)
+    raise ValueError("expected a string")
+
+
+def _check_number(value: Any) -> Any:
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return value
+    if isinstance(value, str) and NUMBER.match(value):
+        number = float(value)
+        if math.isfinite(number):
+            return int(number) if number.is_integer() else number
+    raise ValueError("expected a number")
+
+
+def _check_boolean(value: Any) -> Any:
+    if isinstance(value, bool):
+        return value
+    if value in ("true", "false"):
+        return value == "true"
+    raise ValueError("expected true or false")
+
+
+def _is_color(value: str) -> bool:
+    if COLOR.match(value):
+        return True
+    if not COLOR_FUNCTION.match(value):
+        return False
+    # Nested functions are fine as long as every parenthesis is balanced
+    depth = 0
+    for char in value:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+            if depth < 0:
+                return False
+    return depth == 0
+
+
+def _check_color(value: Any) -> Any:
+    if isinstance(value, str) and _is_color(value.strip()):
+        return value.strip()
+    raise ValueError("expected a color")
+
+
+def _check_image(value: Any) -> Any:
+    if not isinstance(value, str):
+        raise ValueError("expected an image URL")
+    if SCRIPT_URL.match(value):
+        raise ValueError("script URLs are not allowed")
+    return value
+
+
+def _select_check(options: List[Any]) -> PropCheck:
+    allowed = frozenset(options)
+    expected = "expected one of " + ", ".join(str(option) for option in options[:10])
+
+    def check(value: Any) -> Any:
+        if not isinstance(value, (str, int, float)) or value not in allowed:
+            raise ValueError(expected)
+        return value
+
+    return check
+
+
+def _any(value: Any) -> Any:
+    return value
+
+
+CHECKS: Dict[str, PropCheck] = {
+    "string": _check_string,
+    "number": _check_number,
+    "boolean": _check_boolean,
+    "color": _check_color,
+    "image": _check_image,
+}
+
+##############################################################################
+# Compiler
+##############################################################################
+
+
+def _prop_check(definition: Dict[str, Any]) -> PropCheck:
+    prop_type = definition.get("type")
+    if prop_type == "select":
+        options = definition.get("options")
+        if isinstance(options, list) and options and all(isinstance(option, (str, int, float)) for option in options):
+            return _select_check(options)
+        return _check_string
+    # Types the builder doesn't know are passed through, as the renderer receives them
+    return CHECKS.get(prop_type, _any)
+
+
+def compile_props_schema(schema: Optional[Dict[str, Any]]) -> PropsValidator:
+    """
+    Compile a props_schema into a validator that takes an instance's props and returns the normalized props (with
+    defaults filled in) and a list of errors, empty when the props are valid.
+    """
+    props = []
+    for key, definition in (schema or {}).items():
+        if not isinstance(definition, dict):
+            continue
+        has_default = "default" in definition and definition["default"] is not None
+        default = definition.get("default")
+        # Defaults are copied per instance only when they are mutable
+        copy_default = isinstance(default, (dict, list))
+        blank_is_missing = definition.get("type") != "string"
+        props.append((
+            key, _prop_check(definition), has_default, default, copy_default, bool(definition.get("required")),
+            blank_is_missing,
+        ))
+
+    def validate(values: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+        normalized = dict(values)
+        errors = []
+        for key, check, has_default, default, copy_default, required, blank_is_missing in props:
+            value = normalized.get(key)
+            if value is None or (blank_is_missing and isinstance(value, str) and not value.strip()):
+                if has_default:
+                    normalized[key] = copy.deepcopy(default) if copy_default else default
+                elif required:
+                    errors.append(f"{key}: is required")
+                continue
+            try:
+                normalized[key] = check(value)
+            except ValueError as e:
+                errors.append(f"{key}: {e}")
+        return normalized, errors
+
+    return validate
+
+
+def _cache_key(component_id: str, version: str) -> str:
+    return f"{component_id}@{version}"
+
+
+def get_props_validators(keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], PropsValidator]:
+    """
+    Validators for (component_id, version) pairs, compiled on first use. Schemas of custom components are loaded in
+    one query; pairs whose version isn't known are left out.
+    """
+    validators = {}
+    catalog = get_catalog()
+    missing: Dict[str, Tuple[str, str]] = {}
+    for component_id, version in set(keys):
+        validator = _validators.get(_cache_key(component_id, version))
+        if validator is not None:
+            validators[(component_id, version)] = validator
+            continue
+        built_in = catalog.get(component_id, version)
+        if built_in is not None:
+            validator = compile_props_schema(built_in.props_schema)
+            _validators.set(_cache_key(component_id, version), validator, VALIDATOR_CACHE_TTL)
+            validators[(component_id, version)] = validator
+            continue
+        try:
+            missing[str(version_id(uuid.UUID(component_id), version))] = (component_id, version)
+        except ValueError:
+            continue
+
+    if missing:
+        results = ComponentVersion.sql(
+            "SELECT id, props_schema FROM component_versions WHERE id = ANY(%(ids)s::uuid[])",
+            {"ids": list(missing)}
+        )
+        for result in results:
+            key = missing[str(result["id"])]
+            validator = compile_props_schema(result["props_schema"])
+            _validators.set(_cache_key(*key), validator, VALIDATOR_CACHE_TTL)
+            validators[key] = validator
+    return validators
+
+
+def normalize_component_props(content_structure: Dict) -> Dict:
+    """
+    Validate the props of every pinned component instance in the page's content against the schema of its version,
+    replacing them with the normalized props. Raises InvalidComponentProps listing the invalid props; instances of
+    components that can't be found are left as they are.
+    """
+    instances: List[Dict] = [
+        instance for instance in (content_structure or {}).get("components") or []
+        if isinstance(instance, dict) and instance.get("componentId") and instance.get("componentVersion")
+    ]
+    if not instances:
+        return content_structure
+    validators = get_props_validators(
+        (str(instance["componentId"]), str(instance["componentVersion"])) for instance in instances
+    )
+
+    errors = []
+    for instance in instances:
+        validator = validators.get((str(instance["componentId"]), str(instance["componentVersion"])))
+        if validator is None:
+            continue
+        props = instance.get("props")
+        if props is None:
+            props = {}
+        elif not isinstance(props, dict):
+            errors.append(f"{instance.get('id') or instance['componentId']}: props must be an object")
+            continue
+        instance["props"], problems = validator(props)
+        errors.extend(f"{instance.get('id') or instance['componentId']}.{problem}" for problem in problems)
+
+    if errors:
+        raise InvalidComponentProps(errors)
+    return content_structure
@@ -0,0 +1,224 @@
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import BaseModel
+from solar.media import generate_presigned_url
+from core.component import Component
+import threading
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PAGE_SIZE = 24
+MAX_PAGE_SIZE = 100
+# Text search configuration for names, categories and descriptions; props_schema keys use 'simple' (no stemming)
+SEARCH_CONFIG = "english"
+
+# The search document of a component: name (A), category (B), description (C) and props_schema keys (D), with
+# camelCase keys split into words. It is wrapped in an IMMUTABLE function so it can back an expression index.
+SEARCH_SCHEMA_STATEMENTS = (
+    f"""
+    CREATE OR REPLACE FUNCTION component_search_document(name text, category text, description text, props_schema jsonb)
+    RETURNS tsvector LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+        SELECT setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(name, '')), 'A')
+            || setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(category, '')), 'B')
+            || setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'C')
+            || setweight(to_tsvector('simple', coalesce((
+                SELECT string_agg(regexp_replace(key, '([a-z0-9])([A-Z])', '\\1 \\2', 'g'), ' ')
+                FROM jsonb_object_keys(CASE WHEN jsonb_typeof(props_schema) = 'object' THEN props_schema ELSE '{{}}'::jsonb END) AS key
+            ), '')), 'D')
+    $$
+    """,
+    """
+    CREATE INDEX CONCURRENTLY IF NOT EXISTS components_search_idx ON components
+    USING GIN (component_search_document(name, category, description, props_schema))
+    """,
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS components_public_category_idx ON components (category) WHERE is_public",
+)
+TRIGRAM_SCHEMA_STATEMENTS = (
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX CONCURRENTLY IF NOT EXISTS components_name_trgm_idx ON components USING GIN (name gin_trgm_ops)",
+)
+SEARCH_INDEXES = ("components_search_idx", "components_public_category_idx", "components_name_trgm_idx")
+# Session advisory lock held while the schema is built, so only one process builds it
+SCHEMA_LOCK_KEY = 0x636f6d70  # "comp"
+# How often a process that found the schema missing or still building looks again
+SCHEMA_RECHECK_INTERVAL = 60  # seconds
+
+# Set from the catalog once the function and indexes exist; until then searches fall back to ILIKE
+_full_text_ready = False
+_trigram_ready = False
+_schema_checked_at = 0.0
+_schema_lock = threading.Lock()
+
+
+class ComponentSearchResult(BaseModel):
+    hits: List[Component]
+    total: int
+    page: int
+    page_size: int
+    # Matches per category for the query, ignoring the category filter so every facet stays selectable
+    facets: Dict[str, int]
+
+
+def _valid_indexes(cursor) -> List[str]:
+    cursor.execute(
+        """
+        SELECT c.relname AS name FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+        WHERE i.indisvalid AND c.relname = ANY(%(names)s)
+        """,
+        {"names": list(SEARCH_INDEXES)}
+    )
+    return [row["name"] for row in cursor.fetchall()]
+
+
+def _refresh_readiness(cursor):
+    """Set the ready flags from what the catalog has; an index still being built (or left invalid) doesn't count."""
+    global _full_text_ready, _trigram_ready, _schema_checked_at
+    cursor.execute("SELECT to_regprocedure('component_search_document(text,text,text,jsonb)') IS NOT NULL AS ready")
+    has_function = cursor.fetchone()["ready"]
+    indexes = _valid_indexes(cursor)
+    _full_text_ready = has_function and "components_search_idx" in indexes
+    _trigram_ready = _full_text_ready and "components_name_trgm_idx" in indexes
+    _schema_checked_at = time.monotonic()
+
+
+def _build_search_schema(cursor):
+    # A failed concurrent build leaves an invalid index behind that IF NOT EXISTS would keep; drop it to rebuild
+    valid = _valid_indexes(cursor)
+    for name in SEARCH_INDEXES:
+        if name not in valid:
+            cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    try:
+        for statement in SEARCH_SCHEMA_STATEMENTS:
+            cursor.execute(statement)
+    except Exception as e:
+        logger.warning(f"Component full-text search unavailable, falling back to ILIKE: {e}")
+        return
+    try:
+        for statement in TRIGRAM_SCHEMA_STATEMENTS:
+            cursor.execute(statement)
+    except Exception as e:
+        # CREATE EXTENSION needs privileges the database user may not have
+        logger.warning(f"pg_trgm unavailable, component search will not match misspellings: {e}")
+
+
+def ensure_search_schema():
+    """
+    Create the search function and indexes if missing. Indexes are built CONCURRENTLY so writes to components go on
+    meanwhile, and under an advisory lock so that of all the workers starting at once only one builds them; the
+    others only read the catalog, and look again every SCHEMA_RECHECK_INTERVAL until the indexes are ready. Runs
+    outside any request deadline; `python -m core.component_search` runs it as a deploy step.
+    """
+    with _schema_lock:
+        try:
+            with Component.session() as cursor:
+                _refresh_readiness(cursor)
+                if _trigram_ready:
+                    return
+                cursor.execute("SELECT pg_try_advisory_lock(%(key)s) AS locked", {"key": SCHEMA_LOCK_KEY})
+                if not cursor.fetchone()["locked"]:
+                    return
+                try:
+                    _build_search_schema(cursor)
+                finally:
+                    cursor.execute("SELECT pg_advisory_unlock(%(key)s)", {"key": SCHEMA_LOCK_KEY})
+                _refresh_readiness(cursor)
+        except Exception as e:
+            logger.warning(f"Could not check the component search schema: {e}")
+
+
+def _recheck_search_schema():
+    """Look at the catalog again if the schema wasn't ready at the last check, at most every SCHEMA_RECHECK_INTERVAL."""
+    if _trigram_ready or time.monotonic() - _schema_checked_at < SCHEMA_RECHECK_INTERVAL:
+        return
+    if not _schema_lock.acquire(blocking=False):
+        return
+    try:
+        with Component.session() as cursor:
+            _refresh_readiness(cursor)
+    except Exception as e:
+        logger.warning(f"Could not check the component search schema: {e}")
+    finally:
+        _schema_lock.release()
+
+
+def _match_clause(query: Optional[str]) -> Tuple[str, str, Dict[str, Any]]:
+    """SQL condition and rank expression for the search text, using whichever search support is in place."""
+    if not query:
+        return "true", "0", {}
+    params = {"query": query}
+    if not _full_text_ready:
+        escaped = query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        params["pattern"] = f"%{escaped}%"
+        return "(c.name ILIKE %(pattern)s OR c.description ILIKE %(pattern)s)", "0", params
+
+    document = "component_search_document(c.name, c.category, c.description, c.props_schema)"
+    tsquery = f"websearch_to_tsquery('{SEARCH_CONFIG}', %(query)s)"
+    condition = f"{document} @@ {tsquery}"
+    rank = f"ts_rank_cd({document}, {tsquery})"
+    if _trigram_ready:
+        # Fuzzy name matches (query <% name, served by the trigram index) catch misspellings the stemmed
+        # tsquery misses
+        condition = f"({condition} OR %(query)s <%% c.name)"
+        rank = f"({rank} + word_similarity(%(query)s, c.name))"
+    return condition, rank, params
+
+
+def search(
+    visibility: str,
+    visibility_params: Dict[str, Any],
+    query: Optional[str] = None,
+    category: Optional[str] = None,
+    page: int = 1,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> ComponentSearchResult:
+    """
+    Ranked, paginated components matching `query` within `visibility` (an SQL condition on alias c), with
+    per-category facet counts. Without a query, components are listed newest first.
+    """
+    page = max(1, page)
+    page_size = min(max(1, page_size), MAX_PAGE_SIZE)
+    query = (query or "").strip() or None
+    if query:
+        _recheck_search_schema()
+    condition, rank, params = _match_clause(query)
+    params.update(visibility_params)
+    where = f"({visibility}) AND {condition}"
+
+    facet_rows = Component.sql(
+        f"SELECT c.category, count(*) AS count FROM components c WHERE {where} GROUP BY c.category",
+        params
+    )
+    facets = {row["category"]: row["count"] for row in facet_rows}
+    total = facets.get(category, 0) if category else sum(facets.values())
+    if total <= (page - 1) * page_size:
+        return ComponentSearchResult(hits=[], total=total, page=page, page_size=page_size, facets=facets)
+
+    if category:
+        where += " AND c.category = %(category)s"
+        params["category"] = category
+    params.update({"limit": page_size, "offset": (page - 1) * page_size})
+    results = Component.sql(
+        f"""
+        SELECT c.* FROM components c
+        WHERE {where}
+        ORDER BY {rank} DESC, c.updated_at DESC, c.id
+        LIMIT %(limit)s OFFSET %(offset)s
+        """,
+        params
+    )
+
+    # Only the returned page is presigned
+    hits = []
+    for result in results:
+        component = Component(**result)
+        if component.preview_image_path:
+            component.preview_image_path = generate_presigned_url(component.preview_image_path)
+        hits.append(component)
+    return ComponentSearchResult(hits=hits, total=total, page=page, page_size=page_size, facets=facets)
+
+
+if __name__ == "__main__":
+    ensure_search_schema()
+    print(f"Component search: full-text {'ready' if _full_text_ready else 'unavailable'}, "
+          f"trigram {'ready' if _trigram_ready else 'unavailable'}")
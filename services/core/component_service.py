@@ -1,11 +1,38 @@
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Set, Union
 from uuid import UUID
+from pydantic import TypeAdapter
 from solar.access import User, authenticated, public
+from solar.cache import TieredCache
+from solar.config import config
+from solar.context import without_deadline
 from solar.media import MediaFile, save_to_bucket, generate_presigned_url
 from core.component import Component
+from core.built_in_components import BuiltInComponent, BuiltInComponentVersion, get_catalog
+from core.component_search import ComponentSearchResult, DEFAULT_PAGE_SIZE, search
+from core.component_validation import validate_code
+from core.component_compiler import publish_artifact
+from core.component_version import ComponentVersion, bump_version, required_bump, save_version, version_id
+from core.component_usage import pages_using_component, touch_unpinned_pages
+from core.component_transfer import ImportResult, export_lines, import_lines
 from datetime import datetime
+import hashlib
 import json
 
+# Serialized get_public_components results by category, shared across workers; "*" holds the unfiltered list
+public_components_cache = TieredCache(
+    "public_components",
+    config.public_components_cache_max_entries(),
+    max_local_ttl=config.public_components_local_ttl(),
+)
+ALL_CATEGORIES = "*"
+_components_adapter = TypeAdapter(List[Component])
+
+def _check_code(code: str):
+    """Reject code the validation engine reports errors for; warnings don't block saving."""
+    result = validate_code(code)
+    if not result["valid"]:
+        raise ValueError(f"Invalid component code: {'; '.join(result['errors'][:5])}")
+
 @authenticated
 def create_custom_component(user: User, name: str, code: str, 
                            description: Optional[str] = None,
@@ -13,12 +40,7 @@ def create_custom_component(user: User, name: str, code: str,
                            styles: Optional[str] = None,
                            props_schema: Optional[Dict] = None) -> Component:
     """Create a new custom React component."""
-    # Validate component code (basic validation)
-    if not code.strip():
-        raise ValueError("Component code cannot be empty")
-    
-    if not code.strip().startswith("function") and not code.strip().startswith("const") and not code.strip().startswith("export"):
-        raise ValueError("Component code must be a valid React component")
+    _check_code(code)
     
     component = Component(
         user_id=user.id,
@@ -29,9 +51,11 @@ def create_custom_component(user: User, name: str, code: str,
         code=code,
         styles=styles or "",
         props_schema=props_schema or {},
-        is_public=False
+        is_public=False,
+        compiled_url=publish_artifact(code)
     )
     component.sync()
+    save_version(component.model_dump())
     return component
 
 @authenticated
@@ -59,627 +83,9 @@ def get_user_components(user: User, category: Optional[str] = None) -> List[Comp
     return components
 
 @public
-def get_built_in_components() -> List[Component]:
+def get_built_in_components() -> List[BuiltInComponent]:
     """Get all built-in components available to all users."""
-    
-    # Define built-in components with consistent UUIDs
-    built_in_components = [
-        # Exit Intent Components
-        {
-            "id": "exit-intent-discount",
-            "user_id": "00000000-0000-0000-0000-000000000000",
-            "name": "Exit Intent - Discount Offer",
-            "description": "Last-chance discount modal triggered when users are about to leave",
-            "category": "Exit Intent",
-            "component_type": "built-in",
-            "code": "",
-            "styles": "",
-            "props_schema": {
-                "enabled": {
-                    "type": "boolean",
-                    "default": True,
-                    "description": "Enable exit intent detection"
-                },
-                "delay": {
-                    "type": "number",
-                    "default": 3000,
-                    "description": "Delay before activation (milliseconds)"
-                },
-                "threshold": {
-                    "type": "number",
-                    "default": 20,
-                    "description": "Mouse threshold for detection (pixels)"
-                },
-                "aggressive": {
-                    "type": "boolean",
-                    "default": False,
-                    "description": "Use aggressive detection (tab switching, etc.)"
-                },
-                "urgencyText": {
-                    "type": "string",
-                    "default": "WAIT! Don't Leave Yet",
-                    "description": "Urgency message"
-                },
-                "discount": {
-                    "type": "string",
-                    "default": "20% OFF",
-                    "description": "Discount amount"
-                },
-                "subtitle": {
-                    "type": "string",
-                    "default": "Get an exclusive discount before you go!",
-                    "description": "Modal subtitle"
-                },
-                "terms": {
-                    "type": "string",
-                    "default": "Valid for 24 hours. One-time use only.",
-                    "description": "Terms and conditions"
-                },
-                "cookieExpire": {
-                    "type": "number",
-                    "default": 1,
-                    "description": "Days before showing again"
-                }
-            },
-            "is_public": False,
-            "version": "1.0.0",
-            "created_at": datetime.now(),
-            "updated_at": datetime.now()
-        },
-        {
-            "id": "exit-intent-freebie",
-            "user_id": "00000000-0000-0000-0000-000000000000",
-            "name": "Exit Intent - Free Resource",
-            "description": "Free download offer modal triggered on exit intent",
-            "category": "Exit Intent",
-            "component_type": "built-in",
-            "code": "",
-            "styles": "",
-            "props_schema": {
-                "enabled": {
-                    "type": "boolean",
-                    "default": True,
-                    "description": "Enable exit intent detection"
-                },
-                "delay": {
-                    "type": "number",
-                    "default": 5000,
-                    "description": "Delay before activation (milliseconds)"
-                },
-                "threshold": {
-                    "type": "number",
-                    "default": 20,
-                    "description": "Mouse threshold for detection (pixels)"
-                },
-                "title": {
-                    "type": "string",
-                    "default": "Free Resource",
-                    "description": "Modal title"
-                },
-                "subtitle": {
-                    "type": "string",
-                    "default": "Download our exclusive guide before you leave!",
-                    "description": "Modal subtitle"
-                },
-                "benefits": {
-                    "type": "string",
-                    "default": "Comprehensive guide (PDF)\nActionable tips and strategies\nBonus templates included",
-                    "description": "List of benefits (one per line)",
-                    "multiline": True
-                },
-                "cookieExpire": {
-                    "type": "number",
-                    "default": 7,
-                    "description": "Days before showing again"
-                }
-            },
-            "is_public": False,
-            "version": "1.0.0",
-            "created_at": datetime.now(),
-            "updated_at": datetime.now()
-        },
-        {
-            "id": "exit-intent-newsletter",
-            "user_id": "00000000-0000-0000-0000-000000000000",
-            "name": "Exit Intent - Newsletter Signup",
-            "description": "Newsletter subscription modal triggered on exit intent",
-            "category": "Exit Intent",
-            "component_type": "built-in",
-            "code": "",
-            "styles": "",
-            "props_schema": {
-                "enabled": {
-                    "type": "boolean",
-                    "default": True,
-                    "description": "Enable exit intent detection"
-                },
-                "delay": {
-                    "type": "number",
-                    "default": 10000,
-                    "description": "Delay before activation (milliseconds)"
-                },
-                "threshold": {
-                    "type": "number",
-                    "default": 20,
-                    "description": "Mouse threshold for detection (pixels)"
-                },
-                "title": {
-                    "type": "string",
-                    "default": "Stay Connected",
-                    "description": "Modal title"
-                },
-                "subtitle": {
-                    "type": "string",
-                    "default": "Get weekly tips and insights delivered to your inbox",
-                    "description": "Modal subtitle"
-                },
-                "description": {
-                    "type": "string",
-                    "default": "Join 10,000+ subscribers who get actionable insights every week",
-                    "description": "Newsletter description"
-                },
-                "cookieExpire": {
-                    "type": "number",
-                    "default": 30,
-                    "description": "Days before showing again"
-                }
-            },
-            "is_public": False,
-            "version": "1.0.0",
-            "created_at": datetime.now(),
-            "updated_at": datetime.now()
-        },
-        {
-            "id": "exit-intent-demo",
-            "user_id": "00000000-0000-0000-0000-000000000000",
-            "name": "Exit Intent - Demo Request",
-            "description": "Quick demo scheduling modal triggered on exit intent",
-            "category": "Exit Intent",
-            "component_type": "built-in",
-            "code": "",
-            "styles": "",
-            "props_schema": {
-                "enabled": {
-                    "type": "boolean",
-                    "default": True,
-                    "description": "Enable exit intent detection"
-                },
-                "delay": {
-                    "type": "number",
-                    "default": 7000,
-                    "description": "Delay before activation (milliseconds)"
-                },
-                "threshold": {
-                    "type": "number",
-                    "default": 20,
-                    "description": "Mouse threshold for detection (pixels)"
-                },
-                "title": {
-                    "type": "string",
-                    "default": "Quick Demo?",
-                    "description": "Modal title"
-                },
-                "subtitle": {
-                    "type": "string",
-                    "default": "See how it works in just 5 minutes",
-                    "description": "Modal subtitle"
-                },
-                "demoPoints": {
-                    "type": "string",
-                    "default": "Live product walkthrough\nKey features demonstration\nQ&A with product expert",
-                    "description": "Demo highlights (one per line)",
-                    "multiline": True
-                },
-                "cookieExpire": {
-                    "type": "number",
-                    "default": 3,
-                    "description": "Days before showing again"
-                }
-            },
-            "is_public": False,
-            "version": "1.0.0",
-            "created_at": datetime.now(),
-            "updated_at": datetime.now()
-        },
-        {
-            "id": "exit-intent-survey",
-            "user_id": "00000000-0000-0000-0000-000000000000",
-            "name": "Exit Intent - Feedback Survey",
-            "description": "Quick feedback survey modal triggered on exit intent",
-            "category": "Exit Intent",
-            "component_type": "built-in",
-            "code": "",
-            "styles": "",
-            "props_schema": {
-                "enabled": {
-                    "type": "boolean",
-                    "default": True,
-                    "description": "Enable exit intent detection"
-                },
-                "delay": {
-                    "type": "number",
-                    "default": 2000,
-                    "description": "Delay before activation (milliseconds)"
-                },
-                "threshold": {
-                    "type": "number",
-                    "default": 20,
-                    "description": "Mouse threshold for detection (pixels)"
-                },
-                "title": {
-                    "type": "string",
-                    "default": "Quick Question",
-                    "description": "Modal title"
-                },
-                "subtitle": {
-                    "type": "string",
-                    "default": "Help us improve - what made you want to leave?",
-                    "description": "Modal subtitle"
-                },
-                "options": {
-                    "type": "string",
-                    "default": "Too expensive\nNot what I was looking for\nNeed to think about it\nFound a better alternative\nJust browsing",
-                    "description": "Survey options (one per line)",
-                    "multiline": True
-                },
-                "cookieExpire": {
-                    "type": "number",
-                    "default": 7,
-                    "description": "Days before showing again"
-                }
-            },
-            "is_public": False,
-            "version": "1.0.0",
-            "created_at": datetime.now(),
-            "updated_at": datetime.now()
-        },
-        {
-            "id": "exit-intent-social",
-            "user_id": "00000000-0000-0000-0000-000000000000",
-            "name": "Exit Intent - Social Follow",
-            "description": "Social media follow modal triggered on exit intent",
-            "category": "Exit Intent",
-            "component_type": "built-in",
-            "code": "",
-            "styles": "",
-            "props_schema": {
-                "enabled": {
-                    "type": "boolean",
-                    "default": True,
-                    "description": "Enable exit intent detection"
-                },
-                "delay": {
-                    "type": "number",
-                    "default": 15000,
-                    "description": "Delay before activation (milliseconds)"
-                },
-                "threshold": {
-                    "type": "number",
-                    "default": 20,
-                    "description": "Mouse threshold for detection (pixels)"
-                },
-                "title": {
-                    "type": "string",
-                    "default": "Follow Us",
-                    "description": "Modal title"
-                },
-                "subtitle": {
-                    "type": "string",
-                    "default": "Stay updated with our latest content and offers",
-                    "description": "Modal subtitle"
-                },
-                "facebookUrl": {
-                    "type": "string",
-                    "default": "https://facebook.com/yourpage",
-                    "description": "Facebook page URL"
-                },
-                "twitterUrl": {
-                    "type": "string",
-                    "default": "https://twitter.com/yourhandle",
-                    "description": "Twitter profile URL"
-                },
-                "linkedinUrl": {
-                    "type": "string",
-                    "default": "https://linkedin.com/company/yourcompany",
-                    "description": "LinkedIn page URL"
-                },
-                "instagramUrl": {
-                    "type": "string",
-                    "default": "https://instagram.com/yourhandle",
-                    "description": "Instagram profile URL"
-                },
-                "cookieExpire": {
-                    "type": "number",
-                    "default": 14,
-                    "description": "Days before showing again"
-                }
-            },
-            "is_public": False,
-            "version": "1.0.0",
-            "created_at": datetime.now(),
-            "updated_at": datetime.now()
-        },
-        # Exit Intent Funnel Templates
-        {
-            "id": "exit-intent-ecommerce-funnel",
-            "user_id": "00000000-0000-0000-0000-000000000000",
-            "name": "Exit Intent - E-commerce Funnel",
-            "description": "Complete exit intent funnel for e-commerce sites",
-            "category": "Exit Intent",
-            "component_type": "built-in",
-            "code": "",
-            "styles": "",
-            "props_schema": {
-                "primaryOffer": {
-                    "type": "select",
-                    "options": ["discount", "free-shipping", "bundle"],
-                    "default": "discount",
-                    "description": "Primary exit offer type"
-                },
-                "discountAmount": {
-                    "type": "string",
-                    "default": "15%",
-                    "description": "Discount percentage or amount"
-                },
-                "minimumOrder": {
-                    "type": "string",
-                    "default": "$50",
-                    "description": "Minimum order for offer"
-                },
-                "urgencyTimer": {
-                    "type": "boolean",
-                    "default": True,
-                    "description": "Show countdown timer"
-                },
-                "socialProof": {
-                    "type": "string",
-                    "default": "Join 25,000+ happy customers",
-                    "description": "Social proof message"
-                }
-            },
-            "is_public": False,
-            "version": "1.0.0",
-            "created_at": datetime.now(),
-            "updated_at": datetime.now()
-        },
-        {
-            "id": "exit-intent-saas-funnel",
-            "user_id": "00000000-0000-0000-0000-000000000000",
-            "name": "Exit Intent - SaaS Funnel",
-            "description": "Complete exit intent funnel for SaaS products",
-            "category": "Exit Intent",
-            "component_type": "built-in",
-            "code": "",
-            "styles": "",
-            "props_schema": {
-                "primaryOffer": {
-                    "type": "select",
-                    "options": ["extended-trial", "demo", "free-tier"],
-                    "default": "extended-trial",
-                    "description": "Primary exit offer type"
-                },
-                "trialExtension": {
-                    "type": "string",
-                    "default": "30 days",
-                    "description": "Extended trial duration"
-                },
-                "demoLength": {
-                    "type": "string",
-                    "default": "15 minutes",
-                    "description": "Demo duration"
-                },
-                "valueProposition": {
-                    "type": "string",
-                    "default": "See why 10,000+ teams choose us",
-                    "description": "Main value proposition"
-                },
-                "riskReversal": {
-                    "type": "string",
-                    "default": "No credit card required • Cancel anytime",
-                    "description": "Risk reversal message"
-                }
-            },
-            "is_public": False,
-            "version": "1.0.0",
-            "created_at": datetime.now(),
-            "updated_at": datetime.now()
-        },
-        {
-            "id": "exit-intent-lead-gen-funnel",
-            "user_id": "00000000-0000-0000-0000-000000000000",
-            "name": "Exit Intent - Lead Generation Funnel",
-            "description": "Complete exit intent funnel for lead generation",
-            "category": "Exit Intent",
-            "component_type": "built-in",
-            "code": "",
-            "styles": "",
-            "props_schema": {
-                "primaryOffer": {
-                    "type": "select",
-                    "options": ["ebook", "webinar", "consultation", "checklist"],
-                    "default": "ebook",
-                    "description": "Primary lead magnet type"
-                },
-                "leadMagnetTitle": {
-                    "type": "string",
-                    "default": "Ultimate Guide to [Your Topic]",
-                    "description": "Lead magnet title"
-                },
-                "leadMagnetDescription": {
-                    "type": "string",
-                    "default": "Get the complete guide that helped 5,000+ professionals",
-                    "description": "Lead magnet description"
-                },
-                "benefits": {
-                    "type": "string",
-                    "default": "Step-by-step strategies\nReal-world examples\nActionable templates\nBonus resources",
-                    "description": "Lead magnet benefits (one per line)",
-                    "multiline": True
-                },
-                "socialProof": {
-                    "type": "string",
-                    "default": "Downloaded by 5,000+ professionals",
-                    "description": "Social proof for lead magnet"
-                }
-            },
-            "is_public": False,
-            "version": "1.0.0",
-            "created_at": datetime.now(),
-            "updated_at": datetime.now()
-        },
-        # Hero Sections (keeping existing ones)
-        {
-            "id": "hero-classic",
-            "user_id": "00000000-0000-0000-0000-000000000000",
-            "name": "Hero Section - Classic",
-            "description": "Traditional centered hero with title, subtitle, and CTA button",
-            "category": "Heroes",
-            "component_type": "built-in",
-            "code": "",
-            "styles": "",
-            "props_schema": {
-                "title": {
-                    "type": "string",
-                    "default": "Transform Your Business Today",
-                    "description": "Main hero title",
-                    "required": True
-                },
-                "subtitle": {
-                    "type": "string",
-                    "default": "Discover powerful solutions that drive growth and success for your company",
-                    "description": "Supporting subtitle text",
-                    "multiline": True
-                },
-                "buttonText": {
-                    "type": "string",
-                    "default": "Get Started Free",
-                    "description": "Primary CTA button text"
-                },
-                "buttonLink": {
-                    "type": "string",
-                    "default": "#signup",
-                    "description": "Primary CTA button link"
-                },
-                "secondaryButtonText": {
-                    "type": "string",
-                    "default": "",
-                    "description": "Secondary button text (optional)"
-                },
-                "secondaryButtonLink": {
-                    "type": "string",
-                    "default": "#learn-more",
-                    "description": "Secondary button link"
-                },
-                "backgroundImage": {
-                    "type": "image",
-                    "default": "",
-                    "description": "Background image (optional)"
-                },
-                "backgroundColor": {
-                    "type": "color",
-                    "default": "#1f2937",
-                    "description": "Background color"
-                },
-                "textColor": {
-                    "type": "color",
-                    "default": "#ffffff",
-                    "description": "Text color"
-                },
-                "textAlign": {
-                    "type": "select",
-                    "options": ["left", "center", "right"],
-                    "default": "center",
-                    "description": "Text alignment"
-                }
-            },
-            "is_public": False,
-            "version": "1.0.0",
-            "created_at": datetime.now(),
-            "updated_at": datetime.now()
-        },
-        # Basic Components (keeping existing ones)
-        {
-            "id": "text-block",
-            "user_id": "00000000-0000-0000-0000-000000000000",
-            "name": "Text Block",
-            "description": "Simple text content with rich formatting options",
-            "category": "Content",
-            "component_type": "built-in",
-            "code": "",
-            "styles": "",
-            "props_schema": {
-                "text": {
-                    "type": "string", 
-                    "default": "Your text here",
-                    "description": "The text content to display",
-                    "multiline": True,
-                    "required": True
-                },
-                "fontSize": {
-                    "type": "select", 
-                    "options": ["xs", "sm", "base", "lg", "xl", "2xl", "3xl"], 
-                    "default": "base",
-                    "description": "Font size of the text"
-                },
-                "textAlign": {
-                    "type": "select", 
-                    "options": ["left", "center", "right", "justify"], 
-                    "default": "left",
-                    "description": "Text alignment"
-                },
-                "color": {
-                    "type": "color", 
-                    "default": "#000000",
-                    "description": "Text color"
-                }
-            },
-            "is_public": False,
-            "version": "1.0.0",
-            "created_at": datetime.now(),
-            "updated_at": datetime.now()
-        },
-        {
-            "id": "heading",
-            "user_id": "00000000-0000-0000-0000-000000000000",
-            "name": "Heading",
-            "description": "Heading text with different levels (H1-H6)",
-            "category": "Content",
-            "component_type": "built-in",
-            "code": "",
-            "styles": "",
-            "props_schema": {
-                "text": {
-                    "type": "string", 
-                    "default": "Your heading here",
-                    "description": "Heading text",
-                    "required": True
-                },
-                "level": {
-                    "type": "select", 
-                    "options": ["h1", "h2", "h3", "h4", "h5", "h6"], 
-                    "default": "h2",
-                    "description": "Heading level"
-                },
-                "textAlign": {
-                    "type": "select", 
-                    "options": ["left", "center", "right"], 
-                    "default": "left",
-                    "description": "Text alignment"
-                },
-                "color": {
-                    "type": "color", 
-                    "default": "#000000",
-                    "description": "Text color"
-                }
-            },
-            "is_public": False,
-            "version": "1.0.0",
-            "created_at": datetime.now(),
-            "updated_at": datetime.now()
-        }
-    ]
-    
-    return [Component(**comp) for comp in built_in_components]
+    return list(get_catalog().components)
 
 @public
 def get_public_components(category: Optional[str] = None) -> List[Component]:
@@ -704,16 +110,49 @@ def get_public_components(category: Optional[str] = None) -> List[Component]:
     
     return components
 
+@public
+def get_public_components_payload(category: Optional[str] = None) -> Dict[str, str]:
+    """
+    get_public_components as a serialized JSON body and its ETag, cached per category across workers.
+
+    The body carries presigned preview URLs, so PUBLIC_COMPONENTS_CACHE_TTL must stay well below their expiry; the
+    ETag hashes the body so a client never revalidates into URLs that have already expired.
+    """
+    key = category or ALL_CATEGORIES
+    payload = public_components_cache.get(key)
+    if payload is None:
+        body = _components_adapter.dump_json(get_public_components(category)).decode()
+        payload = {"body": body, "etag": '"' + hashlib.sha256(body.encode()).hexdigest()[:32] + '"'}
+        public_components_cache.set(key, payload, config.public_components_cache_ttl())
+    return payload
+
+def get_local_public_components_payload(category: Optional[str] = None) -> Optional[Dict[str, str]]:
+    """This worker's cached payload, if any, so a hit can be served without a thread hop."""
+    return public_components_cache.get_local(category or ALL_CATEGORIES)
+
+def invalidate_public_components(category: str):
+    """Drop the cached listings a public component appears in, after it was published, changed or removed."""
+    public_components_cache.delete(ALL_CATEGORIES)
+    public_components_cache.delete(category)
+
+@public
+def search_public_components(query: Optional[str] = None, category: Optional[str] = None,
+                             page: int = 1, page_size: int = DEFAULT_PAGE_SIZE) -> ComponentSearchResult:
+    """Search public components by name, description, category and props, with per-category facet counts."""
+    return search("c.is_public", {}, query=query, category=category, page=page, page_size=page_size)
+
+@authenticated
+def search_components(user: User, query: Optional[str] = None, category: Optional[str] = None,
+                      mine_only: bool = False, page: int = 1,
+                      page_size: int = DEFAULT_PAGE_SIZE) -> ComponentSearchResult:
+    """Search the user's own components and, unless mine_only, public ones, with per-category facet counts."""
+    visibility = "c.user_id = %(user_id)s" if mine_only else "c.user_id = %(user_id)s OR c.is_public"
+    return search(visibility, {"user_id": user.id}, query=query, category=category, page=page, page_size=page_size)
+
 @authenticated
 def get_component(user: User, component_id: UUID) -> Component:
-    """Get a specific component with ownership verification."""
-    # First check built-in components
-    built_in_components = get_built_in_components()
-    for component in built_in_components:
-        if component.id == str(component_id):
-            return component
-    
-    # Then check user's components and public components
+    """Get a specific custom component with ownership verification; built-ins are served by get_built_in_components."""
+    # Check user's components and public components
     results = Component.sql(
         "SELECT * FROM components WHERE id = %(component_id)s AND (user_id = %(user_id)s OR is_public = true)",
         {"component_id": str(component_id), "user_id": user.id}
@@ -732,8 +171,12 @@ def get_component(user: User, component_id: UUID) -> Component:
 def update_component(user: User, component_id: UUID, name: Optional[str] = None,
                     description: Optional[str] = None, code: Optional[str] = None,
                     styles: Optional[str] = None, props_schema: Optional[Dict] = None,
-                    is_public: Optional[bool] = None) -> Component:
-    """Update a custom component."""
+                    is_public: Optional[bool] = None, bump: Optional[str] = None) -> Component:
+    """
+    Update a custom component. Changing its code, styles or props_schema publishes a new immutable version, bumped
+    as required_bump describes unless `bump` ("major", "minor" or "patch") is given; pages keep the version they
+    pinned.
+    """
     # Verify ownership
     existing = Component.sql(
         "SELECT * FROM components WHERE id = %(component_id)s AND user_id = %(user_id)s",
@@ -741,13 +184,14 @@ def update_component(user: User, component_id: UUID, name: Optional[str] = None,
     )
     if not existing:
         raise ValueError("Component not found or access denied")
+    current = existing[0]
     
     # Build update query dynamically
-    updates = ["updated_at = %(updated_at)s", "version = %(version)s"]
+    updates = ["updated_at = %(updated_at)s"]
     params = {
         "component_id": str(component_id), 
         "updated_at": datetime.now(),
-        "version": "1.0.1"  # Simple versioning
+        "previous_version": current["version"],
     }
     
     if name is not None:
@@ -756,28 +200,104 @@ def update_component(user: User, component_id: UUID, name: Optional[str] = None,
     if description is not None:
         updates.append("description = %(description)s")
         params["description"] = description
-    if code is not None:
-        # Basic validation
-        if not code.strip():
-            raise ValueError("Component code cannot be empty")
+    if code is not None and code != current["code"]:
+        _check_code(code)
         updates.append("code = %(code)s")
         params["code"] = code
-    if styles is not None:
+        updates.append("compiled_url = %(compiled_url)s")
+        params["compiled_url"] = publish_artifact(code)
+    if styles is not None and styles != current["styles"]:
         updates.append("styles = %(styles)s")
         params["styles"] = styles
-    if props_schema is not None:
+    if props_schema is not None and props_schema != current["props_schema"]:
         updates.append("props_schema = %(props_schema)s")
         params["props_schema"] = props_schema
     if is_public is not None:
         updates.append("is_public = %(is_public)s")
         params["is_public"] = is_public
     
-    Component.sql(
-        f"UPDATE components SET {', '.join(updates)} WHERE id = %(component_id)s",
+    new_version = any(field in params for field in ("code", "styles", "props_schema"))
+    if new_version:
+        # Versions from before versioning existed are recorded before they are replaced
+        save_version(current)
+        updates.append("version = %(version)s")
+        bump = bump or required_bump(current["props_schema"], params.get("props_schema", current["props_schema"]))
+        params["version"] = bump_version(current["version"], bump)
+    
+    # The version check turns a concurrent update into an error instead of two different contents for one version
+    updated = Component.sql(
+        f"UPDATE components SET {', '.join(updates)} WHERE id = %(component_id)s AND version = %(previous_version)s RETURNING id",
         params
     )
+    if not updated:
+        raise ValueError("Component was modified concurrently, reload it and try again")
+    if current["is_public"] or is_public:
+        invalidate_public_components(current["category"])
     
-    return get_component(user, component_id)
+    component = get_component(user, component_id)
+    if new_version:
+        save_version(component.model_dump())
+        touch_unpinned_pages(str(component_id))
+    return component
+
+@authenticated
+def get_component_usage(user: User, component_id: str, version: Optional[str] = None) -> List[Dict]:
+    """List the user's pages that use a component, optionally only those pinned to one version."""
+    return pages_using_component(component_id, user_id=user.id, version=version)
+
+@authenticated
+def get_component_versions(user: User, component_id: UUID) -> List[ComponentVersion]:
+    """List the published versions of a component, newest first."""
+    _check_component_access(user, component_id)
+    results = ComponentVersion.sql(
+        "SELECT * FROM component_versions WHERE component_id = %(component_id)s ORDER BY created_at DESC",
+        {"component_id": str(component_id)}
+    )
+    return [ComponentVersion(**result) for result in results]
+
+@authenticated
+def get_component_version(user: User, component_id: str, version: str) -> Union[ComponentVersion, BuiltInComponentVersion]:
+    """Get one version of a component. Versions never change, so callers may cache them indefinitely."""
+    built_in = get_catalog().get(component_id, version)
+    if built_in is not None:
+        # Built-ins keep their slug as component_id, like in the catalog
+        return BuiltInComponentVersion(
+            id=version_id(built_in.id, version),
+            component_id=built_in.id,
+            version=version,
+            code=built_in.code,
+            styles=built_in.styles,
+            props_schema=built_in.props_schema,
+            compiled_url=None,
+            created_at=built_in.created_at,
+        )
+    
+    current = _check_component_access(user, component_id)
+    results = ComponentVersion.sql(
+        "SELECT * FROM component_versions WHERE id = %(id)s",
+        {"id": str(version_id(component_id, version))}
+    )
+    if results:
+        return ComponentVersion(**results[0])
+    if current["version"] == version:
+        # Components that haven't changed since versioning was introduced only have their current version
+        return ComponentVersion(id=version_id(component_id, version), component_id=current["id"], version=version,
+                                code=current["code"], styles=current["styles"], props_schema=current["props_schema"],
+                                compiled_url=current["compiled_url"], created_at=current["updated_at"])
+    raise ValueError("Component version not found")
+
+def _check_component_access(user: User, component_id) -> Dict:
+    try:
+        component_id = UUID(str(component_id))
+    except ValueError:
+        raise ValueError("Component not found or access denied")
+    results = Component.sql(
+        "SELECT * FROM components WHERE id = %(component_id)s AND (user_id = %(user_id)s OR is_public = true)",
+        {"component_id": str(component_id), "user_id": user.id}
+    )
+    if not results:
+        raise ValueError("Component not found or access denied")
+    return results[0]
 
 @authenticated
 def upload_component_preview(user: User, component_id: UUID, preview_image: MediaFile) -> Component:
@@ -798,6 +318,8 @@ def upload_component_preview(user: User, component_id: UUID, preview_image: Medi
         "UPDATE components SET preview_image_path = %(preview_image_path)s, updated_at = %(updated_at)s WHERE id = %(component_id)s",
         {"preview_image_path": file_path, "updated_at": datetime.now(), "component_id": str(component_id)}
     )
+    if existing[0]["is_public"]:
+        invalidate_public_components(existing[0]["category"])
     
     return get_component(user, component_id)
 
@@ -816,48 +338,42 @@ def delete_component(user: User, component_id: UUID) -> bool:
         "DELETE FROM components WHERE id = %(component_id)s",
         {"component_id": str(component_id)}
     )
+    if existing[0]["is_public"]:
+        invalidate_public_components(existing[0]["category"])
+    touch_unpinned_pages(str(component_id))
     
     return True
 
 @authenticated
-def validate_component_code(user: User, code: str) -> Dict:
-    """Validate React component code and return any errors or warnings."""
+def export_components(user: User, category: Optional[str] = None) -> Iterator[bytes]:
+    """Stream the user's custom components as NDJSON, one component per line."""
+    return export_lines(user.id, category)
+
+@authenticated
+def import_components(user: User, lines: Iterable[bytes]) -> ImportResult:
+    """
+    Create or update components from NDJSON lines. Invalid lines are skipped and reported; components the user
+    already owns (matched by id) get a new version when their content changed. An import that runs out of time
+    returns with complete=False and the line to resume from.
+    """
+    public_categories: Set[str] = set()
+    new_versions: List[str] = []
     try:
-        # Basic validation checks
-        errors = []
-        warnings = []
-        
-        if not code.strip():
-            errors.append("Component code cannot be empty")
-            return {"valid": False, "errors": errors, "warnings": warnings}
-        
-        # Check for basic React component structure
-        code_lower = code.lower()
-        if "function" not in code_lower and "const" not in code_lower and "export" not in code_lower:
-            errors.append("Code must define a React component function")
-        
-        # Check for return statement or JSX
-        if "return" not in code_lower and "=>" not in code_lower:
-            warnings.append("Component should return JSX")
-        
-        # Check for potentially dangerous patterns
-        dangerous_patterns = ["eval(", "Function(", "setTimeout(", "setInterval("]
-        for pattern in dangerous_patterns:
-            if pattern in code:
-                warnings.append(f"Potentially unsafe pattern detected: {pattern}")
-        
-        return {
-            "valid": len(errors) == 0,
-            "errors": errors,
-            "warnings": warnings
-        }
-    
-    except Exception as e:
-        return {
-            "valid": False,
-            "errors": [f"Validation error: {str(e)}"],
-            "warnings": []
-        }
+        return import_lines(user.id, lines, config.component_import_batch_size(), public_categories, new_versions)
+    finally:
+        # Batches written before a failure stay committed, so their caches are invalidated either way
+        with without_deadline():
+            for category in public_categories:
+                invalidate_public_components(category)
+            touch_unpinned_pages(*new_versions)
+
+@authenticated
+def validate_component_code(user: User, code: str) -> Dict:
+    """
+    Validate React component code. Returns valid, errors and warnings as "Line L:C: message" strings, and the
+    positioned diagnostics for the editor.
+    """
+    return validate_code(code)
 
 # Global instance
 component_service = ComponentService()
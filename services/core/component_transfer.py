@@ -0,0 +1,348 @@
+"""
+Bulk import and export of custom components as NDJSON, one component per line:
+
+    {"id": "...", "name": "Hero", "description": null, "category": "custom", "code": "...", "styles": "",
+     "props_schema": {...}, "is_public": false, "version": "1.2.0"}
+
+Export streams rows from a server-side cursor and encodes them as they arrive. Import reads lines as they are
+uploaded. Every batch is validated in a process pool (the tokenizer is pure Python, so threads would not run it in
+parallel), compiled and stored by a few threads of its own, and written with one INSERT for new components and one
+UPDATE for existing ones. Lines that fail are reported by line number and don't stop the import.
+
+The deadline is only checked between batches: a batch that has started is written in full, and when the time left
+is shorter than the longest batch so far the import stops and reports the line to resume from. The caller runs the
+import in the bulk executor, so it holds none of the threads interactive requests wait on.
+"""
+
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple, Union
+from uuid import UUID, uuid4
+from datetime import datetime
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+import multiprocessing
+import time
+from pydantic import BaseModel, ConfigDict, Field, ValidationError
+from psycopg.types.json import Jsonb
+from solar.config import config
+from solar.context import remaining_time, without_deadline
+from solar.media import BULK_STORAGE_WORKERS
+from core.component import Component
+from core.component_compiler import publish_artifact
+from core.component_validation import validate_code
+from core.component_version import bump_version, required_bump, save_versions
+
+EXPORT_FIELDS = ("id", "name", "description", "category", "code", "styles", "props_schema", "is_public", "version")
+# Exported lines are sent in chunks of about this size rather than one write per component
+EXPORT_CHUNK_BYTES = 64 * 1024
+MAX_IMPORT_ERRORS = 100
+# Smaller imports are validated inline; starting worker processes would take longer than the validation
+PARALLEL_VALIDATION_MIN_RECORDS = 50
+VALIDATION_CHUNK_SIZE = 16
+
+COMPONENT_COLUMNS = (
+    "id", "user_id", "name", "description", "category", "component_type", "code", "styles", "props_schema",
+    "preview_image_path", "compiled_url", "is_public", "version", "created_at", "updated_at",
+)
+# Casts for columns whose type isn't text, as VALUES rows are not typed by a target table in an UPDATE ... FROM
+COLUMN_CASTS = {
+    "id": "::uuid", "user_id": "::uuid", "props_schema": "::jsonb", "is_public": "::boolean",
+    "created_at": "::timestamp", "updated_at": "::timestamp",
+}
+
+
+class ComponentRecord(BaseModel):
+    model_config = ConfigDict(extra="ignore")
+
+    # An id the importing user already owns updates that component; any other id is replaced with a new one
+    id: Optional[UUID] = None
+    name: str = Field(min_length=1)
+    description: Optional[str] = None
+    category: str = "custom"
+    code: str
+    styles: Optional[str] = None
+    props_schema: Dict = {}
+    is_public: bool = False
+    version: Optional[str] = Field(None, pattern=r"^\d+\.\d+\.\d+$")
+
+
+class ImportResult(BaseModel):
+    created: int = 0
+    updated: int = 0
+    failed: int = 0
+    # {"line": number, "error": message}, for the first MAX_IMPORT_ERRORS failed lines
+    errors: List[Dict[str, Any]] = []
+    # False when the deadline stopped the import between batches; nothing from resume_line on was imported
+    complete: bool = True
+    resume_line: Optional[int] = None
+
+    def fail(self, line: int, error: str):
+        self.failed += 1
+        if len(self.errors) < MAX_IMPORT_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+##############################################################################
+# Export
+##############################################################################
+
+
+def export_lines(user_id, category: Optional[str] = None) -> Iterator[bytes]:
+    """NDJSON of the user's custom components, oldest first, in chunks of about EXPORT_CHUNK_BYTES."""
+    conditions = ["user_id = %(user_id)s", "component_type = 'custom'"]
+    params = {"user_id": str(user_id)}
+    if category:
+        conditions.append("category = %(category)s")
+        params["category"] = category
+    rows = Component.stream(
+        f"SELECT {', '.join(EXPORT_FIELDS)} FROM components WHERE {' AND '.join(conditions)} ORDER BY created_at, id",
+        params
+    )
+
+    chunk: List[bytes] = []
+    size = 0
+    for row in rows:
+        line = ComponentRecord.model_construct(**row).model_dump_json().encode() + b"\n"
+        chunk.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield b"".join(chunk)
+            chunk, size = [], 0
+    if chunk:
+        yield b"".join(chunk)
+
+##############################################################################
+# Import
+##############################################################################
+
+
+def _parse_lines(lines: Iterable[bytes]) -> Iterator[Tuple[int, Union[ComponentRecord, str]]]:
+    """(line number, record) for every non-blank line, or (line number, error) for lines that aren't records."""
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            yield number, ComponentRecord.model_validate_json(line)
+        except ValidationError as e:
+            problems = "; ".join(f"{'.'.join(str(part) for part in error['loc']) or 'line'}: {error['msg']}" for error in e.errors()[:5])
+            yield number, f"Invalid component: {problems}"
+
+
+class _Validator:
+    """Validates batches of code inline, or in a process pool started on the first batch that is large enough."""
+
+    def __init__(self):
+        self.pool: Optional[Executor] = None
+
+    def validate(self, codes: List[str]) -> List[Dict]:
+        if len(codes) < PARALLEL_VALIDATION_MIN_RECORDS and self.pool is None:
+            return [validate_code(code) for code in codes]
+        if self.pool is None:
+            # spawn: forking a process that runs threads (executors, log queues) can copy held locks
+            self.pool = ProcessPoolExecutor(
+                max_workers=config.component_import_workers(), mp_context=multiprocessing.get_context("spawn")
+            )
+        return list(self.pool.map(validate_code, codes, chunksize=VALIDATION_CHUNK_SIZE))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+
+
+def _batches(lines: Iterable[bytes], batch_size: int) -> Iterator[Tuple[List[Tuple[int, ComponentRecord]], List[Tuple[int, str]], int]]:
+    """
+    Records in batches of batch_size, each with the lines that failed to parse since the previous batch and the first
+    line number it covers.
+    """
+    seen: Set[UUID] = set()
+    batch: List[Tuple[int, ComponentRecord]] = []
+    failures: List[Tuple[int, str]] = []
+    first_line = None
+    for number, record in _parse_lines(lines):
+        if first_line is None:
+            first_line = number
+        if isinstance(record, str):
+            failures.append((number, record))
+        elif record.id is not None and record.id in seen:
+            failures.append((number, f"Component {record.id} appears more than once"))
+        else:
+            if record.id is not None:
+                seen.add(record.id)
+            batch.append((number, record))
+        if len(batch) >= batch_size or len(failures) >= batch_size:
+            yield batch, failures, first_line
+            batch, failures, first_line = [], [], None
+    if first_line is not None:
+        yield batch, failures, first_line
+
+
+def import_lines(user_id, lines: Iterable[bytes], batch_size: int, public_categories: Set[str],
+                 new_versions: List[str]) -> ImportResult:
+    """
+    Import NDJSON component records for a user. The categories of public components that changed and the ids of
+    updated components that got a new version are added to `public_categories` and `new_versions` as each batch is
+    committed, for the caller to invalidate even if a later batch fails.
+    """
+    result = ImportResult()
+    validator = _Validator()
+    longest_batch = 0.0
+
+    try:
+        for batch, failures, first_line in _batches(lines, batch_size):
+            remaining = remaining_time()
+            if remaining is not None and remaining < longest_batch:
+                result.complete = False
+                result.resume_line = first_line
+                break
+            started = time.monotonic()
+            for number, error in failures:
+                result.fail(number, error)
+            if batch:
+                # A started batch is written in full; stopping inside it would leave published artifacts unused
+                with without_deadline():
+                    _import_batch(user_id, batch, validator, result, public_categories, new_versions)
+            longest_batch = max(longest_batch, time.monotonic() - started)
+    finally:
+        validator.close()
+    return result
+
+
+def _import_batch(user_id, batch: List[Tuple[int, ComponentRecord]], validator: _Validator, result: ImportResult,
+                  public_categories: Set[str], new_versions: List[str]):
+    valid: List[Tuple[int, ComponentRecord]] = []
+    for (number, record), outcome in zip(batch, validator.validate([record.code for _, record in batch])):
+        if outcome["valid"]:
+            valid.append((number, record))
+        else:
+            result.fail(number, "Invalid component code: " + "; ".join(outcome["errors"][:5]))
+    if not valid:
+        return
+
+    with ThreadPoolExecutor(max_workers=min(BULK_STORAGE_WORKERS, len(valid))) as pool:
+        artifacts = list(pool.map(publish_artifact, [record.code for _, record in valid]))
+
+    ids = [str(record.id) for _, record in valid if record.id is not None]
+    existing = {}
+    if ids:
+        results = Component.sql(
+            "SELECT * FROM components WHERE id = ANY(%(ids)s::uuid[])",
+            {"ids": ids}
+        )
+        existing = {str(row["id"]): row for row in results}
+
+    now = datetime.now()
+    # (line number, component, row it replaces or None)
+    writes: List[Tuple[int, Component, Optional[Dict]]] = []
+    for (number, record), artifact in zip(valid, artifacts):
+        current = existing.get(str(record.id)) if record.id is not None else None
+        styles = record.styles or ""
+        if current is None or str(current["user_id"]) != str(user_id):
+            # Ids taken by another user's component are never reused
+            component_id = record.id if record.id is not None and current is None else uuid4()
+            version, created_at, preview_image_path = record.version or "1.0.0", now, None
+            current = None
+        else:
+            component_id = current["id"]
+            created_at, preview_image_path = current["created_at"], current["preview_image_path"]
+            version = current["version"]
+            if (record.code, styles, record.props_schema) != (current["code"], current["styles"] or "", current["props_schema"] or {}):
+                version = bump_version(version, required_bump(current["props_schema"], record.props_schema))
+        writes.append((number, Component(
+            id=component_id,
+            user_id=user_id,
+            name=record.name,
+            description=record.description,
+            category=record.category,
+            component_type="custom",
+            code=record.code,
+            styles=styles,
+            props_schema=record.props_schema,
+            preview_image_path=preview_image_path,
+            compiled_url=artifact,
+            is_public=record.is_public,
+            version=version,
+            created_at=created_at,
+            updated_at=now,
+        ), current))
+
+    # The versions being replaced are recorded first, as update_component does
+    save_versions([current for _, component, current in writes if current is not None and component.version != current["version"]])
+    inserted = _insert_components([component for _, component, current in writes if current is None])
+    updated = _update_components([(component, current["version"]) for _, component, current in writes if current is not None])
+
+    saved = []
+    for number, component, current in writes:
+        component_id = str(component.id)
+        if current is None:
+            if component_id not in inserted:
+                result.fail(number, f"Component {component_id} was created concurrently; import it again to update it")
+                continue
+            result.created += 1
+        else:
+            if component_id not in updated:
+                result.fail(number, f"Component {component_id} was changed while importing; import it again")
+                continue
+            result.updated += 1
+            if component.version != current["version"]:
+                new_versions.append(component_id)
+            if current["is_public"]:
+                public_categories.add(current["category"])
+        if component.is_public:
+            public_categories.add(component.category)
+        saved.append(component.model_dump())
+    save_versions(saved)
+
+
+def _component_values(components: List[Component], extra: Optional[Dict[str, List[Any]]] = None) -> Tuple[str, Dict[str, Any]]:
+    """VALUES rows for components in COMPONENT_COLUMNS order, followed by the `extra` columns, and their params."""
+    rows = []
+    params = {}
+    for index, component in enumerate(components):
+        values = component.model_dump(include=set(COMPONENT_COLUMNS))
+        values["props_schema"] = Jsonb(values["props_schema"] or {})
+        placeholders = []
+        for column in COMPONENT_COLUMNS:
+            params[f"{column}_{index}"] = str(values[column]) if column in ("id", "user_id") else values[column]
+            placeholders.append(f"%({column}_{index})s{COLUMN_CASTS.get(column, '')}")
+        for column, column_values in (extra or {}).items():
+            params[f"{column}_{index}"] = column_values[index]
+            placeholders.append(f"%({column}_{index})s")
+        rows.append(f"({', '.join(placeholders)})")
+    return ", ".join(rows), params
+
+
+def _insert_components(components: List[Component]) -> Set[str]:
+    """Insert new components; returns the ids that were inserted (an id created meanwhile is left alone)."""
+    if not components:
+        return set()
+    values, params = _component_values(components)
+    results = Component.sql(
+        f"""
+        INSERT INTO components ({', '.join(COMPONENT_COLUMNS)})
+        VALUES {values}
+        ON CONFLICT (id) DO NOTHING
+        RETURNING id
+        """,
+        params
+    )
+    return {str(row["id"]) for row in results}
+
+
+def _update_components(updates: List[Tuple[Component, str]]) -> Set[str]:
+    """
+    Update components still at the version they were read at, as update_component does, so a concurrent edit is
+    never overwritten; returns the ids that were updated.
+    """
+    if not updates:
+        return set()
+    components = [component for component, _ in updates]
+    values, params = _component_values(components, {"previous_version": [version for _, version in updates]})
+    assignments = ", ".join(f"{column} = imported.{column}" for column in COMPONENT_COLUMNS if column not in ("id", "user_id", "created_at"))
+    results = Component.sql(
+        f"""
+        UPDATE components SET {assignments}
+        FROM (VALUES {values}) AS imported ({', '.join(COMPONENT_COLUMNS)}, previous_version)
+        WHERE components.id = imported.id AND components.user_id = imported.user_id
+            AND components.version = imported.previous_version
+        RETURNING components.id
+        """,
+        params
+    )
+    return {str(row["id"]) for row in results}
@@ -0,0 +1,190 @@
+"""
+Index of which pages use which components.
+
+update_page_content calls index_page_usage with the saved content_structure, which writes only the difference
+between the page's previous and new usage rows, so "where is this component used" and "what does this page use"
+are indexed lookups instead of a walk over every page's JSON. Pages saved before versioning hold instances without
+a componentVersion; they render the latest version, so touch_unpinned_pages marks exactly those pages as changed
+when a component changes. Pages are rendered by the client from their content, so marking them changed (a new
+revision ETag) is all a component change needs; there is no server-rendered copy to rebuild.
+
+Instances nested in other instances (under children, slots or props) are indexed like top-level ones.
+
+Pages saved before the index existed are indexed by `python -m core.component_usage`.
+"""
+
+from solar import Table, ColumnDetails
+from typing import Any, Dict, Iterator, List, Optional
+from datetime import datetime
+from collections import Counter
+from core.page import Page
+import uuid
+
+USAGE_NAMESPACE = uuid.UUID("0d3c1f57-6a2b-4e8e-b1c4-93a7f5e2d861")
+REINDEX_BATCH_SIZE = 500
+# Deeper content is not walked; the builder nests far less than this
+MAX_CONTENT_DEPTH = 64
+
+class ComponentUsage(Table):
+    __tablename__ = "component_usages"
+
+    id: uuid.UUID = ColumnDetails(primary_key=True)  # usage_id(page_id, component_id, component_version)
+    page_id: uuid.UUID
+    website_id: uuid.UUID
+    component_id: str  # Component UUID, or the slug of a built-in
+    component_version: Optional[str] = None  # None for instances that follow the latest version
+    instance_count: int = 0
+    updated_at: datetime = ColumnDetails(default_factory=datetime.now)
+
+
+def usage_id(page_id, component_id: str, component_version: Optional[str]) -> uuid.UUID:
+    return uuid.uuid5(USAGE_NAMESPACE, f"{page_id}:{component_id}@{component_version or ''}")
+
+
+def iter_instances(content_structure: Optional[Dict]) -> Iterator[Dict[str, Any]]:
+    """Every component instance in a page's content, nested ones included, parents before their children."""
+    stack = [(component, 1) for component in reversed((content_structure or {}).get("components") or [])]
+    while stack:
+        value, depth = stack.pop()
+        if depth > MAX_CONTENT_DEPTH:
+            continue
+        if isinstance(value, dict):
+            if value.get("componentId"):
+                yield value
+            children = list(value.values())
+        elif isinstance(value, list):
+            children = value
+        else:
+            continue
+        stack.extend((child, depth + 1) for child in reversed(children) if isinstance(child, (dict, list)))
+
+
+def count_usage(content_structure: Optional[Dict]) -> Counter:
+    """Instances per (component_id, component_version) in a page's content."""
+    counts: Counter = Counter()
+    for instance in iter_instances(content_structure):
+        counts[(str(instance["componentId"]), instance.get("componentVersion") or None)] += 1
+    return counts
+
+
+def index_page_usage(page_id, website_id, content_structure: Optional[Dict]) -> None:
+    """Bring the page's usage rows in line with its content, writing only rows that changed."""
+    counts = count_usage(content_structure)
+    existing = ComponentUsage.sql(
+        "SELECT id, component_id, component_version, instance_count FROM component_usages WHERE page_id = %(page_id)s",
+        {"page_id": str(page_id)}
+    )
+    current = {(row["component_id"], row["component_version"]): row for row in existing}
+
+    removed = [str(row["id"]) for key, row in current.items() if key not in counts]
+    if removed:
+        ComponentUsage.sql(
+            "DELETE FROM component_usages WHERE id = ANY(%(ids)s::uuid[])",
+            {"ids": removed}
+        )
+
+    now = datetime.now()
+    changed = [
+        ComponentUsage(
+            id=usage_id(page_id, component_id, version),
+            page_id=page_id,
+            website_id=website_id,
+            component_id=component_id,
+            component_version=version,
+            instance_count=count,
+            updated_at=now,
+        )
+        for (component_id, version), count in counts.items()
+        if (component_id, version) not in current or current[(component_id, version)]["instance_count"] != count
+    ]
+    if changed:
+        ComponentUsage.sync_many(changed)
+
+
+def remove_page_usage(page_id) -> None:
+    ComponentUsage.sql("DELETE FROM component_usages WHERE page_id = %(page_id)s", {"page_id": str(page_id)})
+
+
+def remove_website_usage(website_id) -> None:
+    ComponentUsage.sql(
+        "DELETE FROM component_usages WHERE website_id = %(website_id)s", {"website_id": str(website_id)}
+    )
+
+
+def pages_using_component(component_id: str, user_id=None, version: Optional[str] = None) -> List[Dict]:
+    """
+    Pages using a component (optionally one version of it), with the version they pinned and how many instances
+    they hold. With user_id, only pages of that user's websites.
+    """
+    conditions = ["u.component_id = %(component_id)s"]
+    params = {"component_id": str(component_id)}
+    if version is not None:
+        conditions.append("u.component_version = %(version)s")
+        params["version"] = version
+    if user_id is not None:
+        conditions.append("w.user_id = %(user_id)s")
+        params["user_id"] = user_id
+    return ComponentUsage.sql(
+        f"""
+        SELECT u.page_id, u.website_id, p.title, p.slug, p.is_published, u.component_version, u.instance_count
+        FROM component_usages u
+        JOIN pages p ON p.id = u.page_id
+        JOIN websites w ON w.id = u.website_id
+        WHERE {' AND '.join(conditions)}
+        ORDER BY u.website_id, p.sort_order, p.title
+        """,
+        params
+    )
+
+
+def components_used_by_page(page_id) -> List[ComponentUsage]:
+    results = ComponentUsage.sql(
+        "SELECT * FROM component_usages WHERE page_id = %(page_id)s ORDER BY component_id, component_version",
+        {"page_id": str(page_id)}
+    )
+    return [ComponentUsage(**result) for result in results]
+
+
+def touch_unpinned_pages(*component_ids: str) -> int:
+    """
+    Mark the pages that render the latest version of the given components as updated, so their revision ETags
+    change; pages that pinned a version are unaffected. Returns the number of pages touched.
+    """
+    if not component_ids:
+        return 0
+    touched = Page.sql(
+        """
+        UPDATE pages SET updated_at = %(updated_at)s
+        WHERE id IN (
+            SELECT page_id FROM component_usages WHERE component_id = ANY(%(component_ids)s) AND component_version IS NULL
+        )
+        RETURNING id
+        """,
+        {"component_ids": [str(component_id) for component_id in component_ids], "updated_at": datetime.now()}
+    )
+    return len(touched)
+
+
+def reindex_all_pages(batch_size: int = REINDEX_BATCH_SIZE) -> int:
+    """Index every page, in id order and batch_size pages at a time; returns the number of pages indexed."""
+    indexed = 0
+    last_id: Optional[str] = None
+    while True:
+        results = Page.sql(
+            f"""
+            SELECT id, website_id, content_structure FROM pages
+            {'WHERE id > %(last_id)s' if last_id else ''}
+            ORDER BY id LIMIT %(limit)s
+            """,
+            {"last_id": last_id, "limit": batch_size}
+        )
+        for result in results:
+            index_page_usage(result["id"], result["website_id"], result["content_structure"])
+        indexed += len(results)
+        if len(results) < batch_size:
+            return indexed
+        last_id = str(results[-1]["id"])
+
+
+if __name__ == "__main__":
+    print(f"Indexed component usage of {reindex_all_pages()} pages")
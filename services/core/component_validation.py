@@ -0,0 +1,500 @@
+"""
+Validation engine for custom component code.
+
+The code is scanned once by a JavaScript/JSX tokenizer that tracks brackets, template literals, regex literals and
+JSX elements with their attributes. Rules run on that token stream as it is produced, so they see syntax rather than
+text: `eval` in a comment or string is ignored, `window .eval` is still a member access, an `onClick={handler}`
+prop is fine while an `onclick="..."` string handler is not. Results are cached by the SHA-256 of the code, so
+re-validating unchanged code (validate-on-keystroke, save after validate) is a dictionary lookup.
+
+Diagnostics carry 1-based line and column ranges for the editor.
+"""
+
+from bisect import bisect_right
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import re
+
+from solar.cache import TTLCache
+
+MAX_CODE_LENGTH = 50000
+MAX_DIAGNOSTICS = 100
+MAX_NESTING = 200
+VALIDATION_CACHE_ENTRIES = 2048
+VALIDATION_CACHE_TTL = 3600  # seconds
+
+_results = TTLCache(VALIDATION_CACHE_ENTRIES)
+
+ERROR = "error"
+WARNING = "warning"
+
+# Calls that load modules
+BLOCKED_CALLS = {
+    "require": "require() is not allowed",
+}
+TIMER_CALLS = ("setTimeout", "setInterval")
+# Names that reach the global object; any member access on them is blocked
+GLOBAL_OBJECTS = ("window", "global", "globalThis", "self", "top", "parent", "frames", "opener")
+# Names that evaluate strings as code or reach the network. Any reference is blocked, as a property too
+# (self.eval) and not only when called, since an alias (const e = eval), a comma expression ((0, eval)(...)) or
+# an optional call (eval?.(...)) calls them just as well.
+BLOCKED_IDENTIFIERS = {
+    "eval": "eval is not allowed",
+    "Function": "The Function constructor is not allowed",
+    "fetch": "Network requests (fetch) are not allowed",
+    "XMLHttpRequest": "Network requests (XMLHttpRequest) are not allowed",
+    "__proto__": "Access to __proto__ is not allowed",
+}
+# Property names that are blocked when read through a computed member access (obj["innerHTML"])
+BLOCKED_PROPERTIES = {"innerHTML", "outerHTML", "__proto__", "constructor", "defaultView", *BLOCKED_IDENTIFIERS}
+HTML_SINK_PROPERTIES = ("innerHTML", "outerHTML")
+ASSIGNMENT_OPERATORS = {"=", "+=", "||=", "&&=", "??="}
+
+# After these keywords an expression starts, so `/` begins a regex and `<` a JSX element
+KEYWORDS_BEFORE_EXPRESSION = {
+    "return", "typeof", "instanceof", "in", "of", "new", "delete", "void", "throw", "case", "do", "else",
+    "yield", "await", "extends",
+}
+DECLARATION_KEYWORDS = ("const", "let", "var")
+CLOSING = {"(": ")", "[": "]", "{": "}"}
+
+JS_TOKEN = re.compile(r"""
+    (?P<space>[\s\ufeff]+)
+  | (?P<number>(?:0[xXoObB][\da-fA-F_]+|(?:\d[\d_]*\.?[\d_]*|\.\d[\d_]*)(?:[eE][+-]?\d+)?)n?)
+  | (?P<name>[A-Za-z_$\u0080-\uffff][\w$\u0080-\uffff]*)
+  | (?P<punct>\?\?=|\?\.(?!\d)|\.\.\.|===|!==|\*\*=|<<=|>>>=|>>>|>>=|=>|==|!=|<=|>=|&&=|\|\|=|\?\?|&&|\|\||\+\+|--
+        |\+=|-=|\*=|/=|%=|&=|\|=|\^=|\*\*|<<|>>|[{}()\[\];,<>+\-*/%&|^!~?:=.@\#])
+""", re.VERBOSE)
+STRING = {
+    '"': re.compile(r'"(?:[^"\\\n]|\\[\s\S])*"'),
+    "'": re.compile(r"'(?:[^'\\\n]|\\[\s\S])*'"),
+}
+JSX_NAME = re.compile(r"[A-Za-z_$][\w$\-]*(?:[.:][A-Za-z_$][\w$\-]*)*")
+JSX_ATTRIBUTE_NAME = re.compile(r"[A-Za-z_$][\w$\-]*(?::[A-Za-z_$][\w$\-]*)?")
+JSX_SPACE = re.compile(r"(?:\s+|//[^\n]*|/\*[\s\S]*?\*/)*")
+JSX_TEXT = re.compile(r"[^<{]*")
+STRING_ESCAPE = re.compile(r"\\(?:x([\da-fA-F]{2})|u\{([\da-fA-F]+)\}|u([\da-fA-F]{4})|([\s\S]))")
+# Browsers ignore ASCII whitespace and control characters in and before a URL scheme
+URL_IGNORED = re.compile(r"[\x00-\x20]+")
+
+
+class CodeSyntaxError(Exception):
+    def __init__(self, message: str, start: int, end: int):
+        super().__init__(message)
+        self.start = start
+        self.end = end
+
+
+def _unescape(raw: str) -> str:
+    """The value of a JavaScript string literal body, so escapes cannot hide blocked names."""
+    def replace(match):
+        hex_code, braced, unicode_code, other = match.groups()
+        code = hex_code or braced or unicode_code
+        if code is not None:
+            try:
+                return chr(int(code, 16))
+            except (ValueError, OverflowError):
+                return ""
+        return other
+    return STRING_ESCAPE.sub(replace, raw)
+
+
+def _is_javascript_url(value: str) -> bool:
+    return URL_IGNORED.sub("", value).lower().startswith("javascript:")
+
+##############################################################################
+# Scanner
+##############################################################################
+
+
+class _Scanner:
+    """
+    Single-pass tokenizer for JavaScript with JSX. Significant tokens are handed to _on_token as (kind, value,
+    start, end); JSX elements and attributes to _on_jsx_element and _on_jsx_attribute. Syntax errors raise
+    CodeSyntaxError with the offending range.
+    """
+
+    def __init__(self, code: str):
+        self.code = code
+        self.length = len(code)
+        self.diagnostics: List[Tuple[str, str, str, int, int]] = []
+        # Last two significant tokens, most recent last
+        self.history: List[Tuple[str, str, int, int]] = [("", "", 0, 0), ("", "", 0, 0)]
+        self.depth = 0
+        self.top_level_brackets = 0
+        self.defines_component = False
+        self.renders = False
+        self._pending_timer: Optional[Tuple[str, int, int]] = None
+        self._pending_sink: Optional[Tuple[str, int, int]] = None
+
+    def report(self, severity: str, rule: str, message: str, start: int, end: int):
+        if len(self.diagnostics) < MAX_DIAGNOSTICS:
+            self.diagnostics.append((severity, rule, message, start, end))
+
+    def _enter(self, start: int):
+        self.depth += 1
+        if self.depth > MAX_NESTING:
+            raise CodeSyntaxError("Code is nested too deeply", start, start + 1)
+
+    # Context -----------------------------------------------------------------
+
+    def _expression_allowed(self) -> bool:
+        """Whether the next token starts an expression (vs. continuing one), deciding regex and JSX vs operators."""
+        kind, value, _, _ = self.history[-1]
+        if kind in ("number", "string", "template", "regex", "jsx"):
+            return False
+        if kind == "name":
+            return value in KEYWORDS_BEFORE_EXPRESSION
+        if kind == "punct":
+            return value not in (")", "]", "}", "++", "--")
+        return True
+
+    # JavaScript ------------------------------------------------------------
+
+    def scan_js(self, pos: int, until_brace: bool = False) -> int:
+        """
+        Scan JavaScript from pos. With until_brace, stop after the `}` closing an enclosing `${` or JSX `{` and
+        return the position after it; otherwise scan to the end of the code.
+        """
+        code = self.code
+        stack: List[Tuple[str, int]] = []
+        while pos < self.length:
+            char = code[pos]
+            if char == "/" and code.startswith("//", pos):
+                end = code.find("\n", pos)
+                pos = self.length if end < 0 else end
+                continue
+            if char == "/" and code.startswith("/*", pos):
+                end = code.find("*/", pos + 2)
+                if end < 0:
+                    raise CodeSyntaxError("Unterminated comment", pos, self.length)
+                pos = end + 2
+                continue
+            if char in STRING:
+                match = STRING[char].match(code, pos)
+                if match is None:
+                    line_end = code.find("\n", pos)
+                    raise CodeSyntaxError("Unterminated string", pos, self.length if line_end < 0 else line_end)
+                self._token("string", _unescape(match.group()[1:-1]), pos, match.end())
+                pos = match.end()
+                continue
+            if char == "`":
+                pos = self.scan_template(pos)
+                continue
+            if char == "/" and self._expression_allowed():
+                pos = self.scan_regex(pos)
+                continue
+            if char == "<" and self._expression_allowed() and pos + 1 < self.length \
+                    and (code[pos + 1] == ">" or code[pos + 1].isalpha() or code[pos + 1] in "_$"):
+                pos = self.scan_jsx_element(pos)
+                self._token("jsx", "", pos, pos)
+                continue
+
+            match = JS_TOKEN.match(code, pos)
+            if match is None:
+                raise CodeSyntaxError(f"Unexpected character {char!r}", pos, pos + 1)
+            kind = match.lastgroup
+            end = match.end()
+            if kind == "space":
+                pos = end
+                continue
+            value = match.group()
+            if kind == "punct" and value in CLOSING:
+                stack.append((value, pos))
+                if not until_brace and len(stack) == 1 and self.depth == 0:
+                    self.top_level_brackets += 1
+            elif kind == "punct" and value in (")", "]", "}"):
+                if not stack:
+                    if until_brace and value == "}":
+                        return end
+                    raise CodeSyntaxError(f"Unexpected '{value}'", pos, end)
+                opening, opened_at = stack.pop()
+                if CLOSING[opening] != value:
+                    raise CodeSyntaxError(f"Expected '{CLOSING[opening]}' to close '{opening}' but found '{value}'", pos, end)
+            self._token(kind, value, pos, end, top_level=not stack and not until_brace and self.depth == 0)
+            pos = end
+
+        if stack:
+            opening, opened_at = stack[-1]
+            raise CodeSyntaxError(f"Unclosed '{opening}'", opened_at, opened_at + 1)
+        if until_brace:
+            raise CodeSyntaxError("Unclosed '{'", pos, pos)
+        return pos
+
+    def scan_template(self, start: int) -> int:
+        code = self.code
+        pos = start + 1
+        chunk_start = pos
+        self._enter(start)
+        while pos < self.length:
+            char = code[pos]
+            if char == "\\":
+                pos += 2
+            elif char == "`":
+                self._template_chunk(chunk_start, pos)
+                self.depth -= 1
+                self._token("template", "", start, pos + 1)
+                return pos + 1
+            elif char == "$" and code.startswith("${", pos):
+                self._template_chunk(chunk_start, pos)
+                # The substitution starts a fresh expression
+                self.history.append(("punct", "${", pos, pos + 2))
+                pos = self.scan_js(pos + 2, until_brace=True)
+                chunk_start = pos
+            else:
+                pos += 1
+        raise CodeSyntaxError("Unterminated template literal", start, self.length)
+
+    def _template_chunk(self, start: int, end: int):
+        if _is_javascript_url(_unescape(self.code[start:end])):
+            self.report(ERROR, "javascript-url", "javascript: URLs are not allowed", start, end)
+
+    def scan_regex(self, start: int) -> int:
+        code = self.code
+        pos = start + 1
+        in_class = False
+        while pos < self.length:
+            char = code[pos]
+            if char == "\n":
+                break
+            if char == "\\":
+                pos += 2
+                continue
+            if char == "[":
+                in_class = True
+            elif char == "]":
+                in_class = False
+            elif char == "/" and not in_class:
+                pos += 1
+                while pos < self.length and (code[pos].isalnum() or code[pos] in "_$"):
+                    pos += 1
+                self._token("regex", "", start, pos)
+                return pos
+            pos += 1
+        raise CodeSyntaxError("Unterminated regular expression", start, pos)
+
+    # JSX ---------------------------------------------------------------------
+
+    def _skip_jsx_space(self, pos: int) -> int:
+        return JSX_SPACE.match(self.code, pos).end()
+
+    def scan_jsx_element(self, start: int) -> int:
+        """Scan a JSX element or fragment starting at `<` and return the position after it."""
+        code = self.code
+        self._enter(start)
+        self.renders = True
+        pos = self._skip_jsx_space(start + 1)
+        name = ""
+        if pos < self.length and code[pos] != ">":
+            match = JSX_NAME.match(code, pos)
+            if match is None:
+                raise CodeSyntaxError("Expected a JSX tag name", pos, pos + 1)
+            name = match.group()
+            self._on_jsx_element(name, match.start(), match.end())
+            pos = match.end()
+
+        # Attributes
+        while True:
+            pos = self._skip_jsx_space(pos)
+            if pos >= self.length:
+                raise CodeSyntaxError(f"Unclosed JSX tag <{name}>", start, self.length)
+            if code.startswith("/>", pos):
+                self.depth -= 1
+                return pos + 2
+            if code[pos] == ">":
+                pos += 1
+                break
+            if code[pos] == "{":
+                # Spread attribute: {...props}
+                self.history.append(("punct", "{", pos, pos + 1))
+                pos = self.scan_js(pos + 1, until_brace=True)
+                continue
+            match = JSX_ATTRIBUTE_NAME.match(code, pos)
+            if match is None:
+                raise CodeSyntaxError(f"Unexpected {code[pos]!r} in JSX tag <{name}>", pos, pos + 1)
+            attribute, attribute_start = match.group(), match.start()
+            pos = self._skip_jsx_space(match.end())
+            if pos < self.length and code[pos] == "=":
+                pos = self._skip_jsx_space(pos + 1)
+                if pos < self.length and code[pos] in "\"'":
+                    end = code.find(code[pos], pos + 1)
+                    if end < 0:
+                        raise CodeSyntaxError("Unterminated JSX attribute string", pos, self.length)
+                    self._on_jsx_attribute(attribute, code[pos + 1:end], attribute_start, end + 1)
+                    pos = end + 1
+                elif pos < self.length and code[pos] == "{":
+                    self._on_jsx_attribute(attribute, None, attribute_start, pos)
+                    self.history.append(("punct", "{", pos, pos + 1))
+                    pos = self.scan_js(pos + 1, until_brace=True)
+                elif pos < self.length and code[pos] == "<":
+                    self._on_jsx_attribute(attribute, None, attribute_start, pos)
+                    pos = self.scan_jsx_element(pos)
+                else:
+                    raise CodeSyntaxError(f"Expected a value for JSX attribute {attribute}", attribute_start, pos)
+            else:
+                self._on_jsx_attribute(attribute, None, attribute_start, match.end())
+
+        # Children
+        while True:
+            pos = JSX_TEXT.match(code, pos).end()
+            if pos >= self.length:
+                raise CodeSyntaxError(f"Unclosed JSX element <{name}>", start, start + len(name) + 1)
+            if code[pos] == "{":
+                self.history.append(("punct", "{", pos, pos + 1))
+                pos = self.scan_js(pos + 1, until_brace=True)
+            elif code.startswith("</", pos):
+                close_start = pos
+                pos = self._skip_jsx_space(pos + 2)
+                match = JSX_NAME.match(code, pos)
+                closing = match.group() if match else ""
+                pos = self._skip_jsx_space(match.end() if match else pos)
+                if closing != name:
+                    raise CodeSyntaxError(f"Expected </{name}> but found </{closing}>", close_start, pos)
+                if pos >= self.length or code[pos] != ">":
+                    raise CodeSyntaxError(f"Expected '>' to close </{name}>", close_start, pos)
+                self.depth -= 1
+                return pos + 1
+            else:
+                pos = self.scan_jsx_element(pos)
+
+    # Rules -------------------------------------------------------------------
+
+    def _token(self, kind: str, value: str, start: int, end: int, top_level: bool = False):
+        previous_kind, previous, _, _ = self.history[-1]
+        before_previous = self.history[-2][1] if self.history[-2][0] in ("name", "punct") else ""
+        after_dot = previous_kind == "punct" and previous in (".", "?.")
+        # Whether the previous name is a property (obj.eval) rather than a free identifier
+        previous_is_property = self.history[-2][0] == "punct" and self.history[-2][1] in (".", "?.")
+
+        if self._pending_timer is not None:
+            timer, timer_start, timer_end = self._pending_timer
+            self._pending_timer = None
+            if kind in ("string", "template"):
+                self.report(ERROR, "string-timer", f"{timer}() with a string evaluates it as code; pass a function", timer_start, end)
+        if self._pending_sink is not None:
+            sink, sink_start, sink_end = self._pending_sink
+            self._pending_sink = None
+            if kind == "punct" and value in ASSIGNMENT_OPERATORS:
+                self.report(ERROR, "html-sink", f"Assigning to {sink} is not allowed", sink_start, end)
+
+        if kind == "name":
+            if top_level and value in ("function", "class", "export"):
+                self.defines_component = True
+            if value in BLOCKED_IDENTIFIERS:
+                self.report(ERROR, "blocked-identifier", BLOCKED_IDENTIFIERS[value], start, end)
+            if after_dot:
+                if value in HTML_SINK_PROPERTIES:
+                    self._pending_sink = (value, start, end)
+                elif value == "constructor":
+                    self.report(ERROR, "constructor-access", "Access to .constructor is not allowed", start, end)
+                elif value == "defaultView":
+                    self.report(ERROR, "global-object", "Access to .defaultView is not allowed", start, end)
+                elif value in ("write", "writeln") and before_previous == "document":
+                    self.report(ERROR, "document-write", "document.write() is not allowed", start, end)
+                elif value == "env" and before_previous == "process":
+                    self.report(ERROR, "process-env", "process.env is not available to components", start, end)
+                elif value == "createElement":
+                    self.renders = True
+
+        elif kind == "punct":
+            if value == "(" and previous_kind == "name":
+                callee_start, callee_end = self.history[-1][2], self.history[-1][3]
+                if previous in BLOCKED_CALLS and not previous_is_property:
+                    self.report(ERROR, "blocked-call", BLOCKED_CALLS[previous], callee_start, callee_end)
+                elif previous == "import":
+                    self.report(ERROR, "dynamic-import", "Dynamic import() is not allowed", callee_start, callee_end)
+                elif previous in TIMER_CALLS:
+                    self._pending_timer = (previous, callee_start, callee_end)
+            elif value in (".", "?.", "[") and previous_kind == "name" and previous in GLOBAL_OBJECTS \
+                    and not previous_is_property:
+                self.report(ERROR, "global-object", f"Access to {previous} is not allowed", self.history[-1][2], end)
+            elif value == "=" and top_level and previous_kind == "name" and before_previous in DECLARATION_KEYWORDS:
+                self.defines_component = True
+
+        elif kind == "string":
+            if previous_kind == "punct" and previous == "[" and value in BLOCKED_PROPERTIES:
+                if value in HTML_SINK_PROPERTIES:
+                    self._pending_sink = (value, start, end)
+                else:
+                    self.report(ERROR, "computed-access", f"Access to {value} is not allowed", start, end)
+            if _is_javascript_url(value):
+                self.report(ERROR, "javascript-url", "javascript: URLs are not allowed", start, end)
+
+        self.history = [self.history[-1], (kind, value, start, end)]
+
+    def _on_jsx_element(self, name: str, start: int, end: int):
+        if name.lower() == "script":
+            self.report(ERROR, "script-element", "<script> elements are not allowed", start, end)
+
+    def _on_jsx_attribute(self, name: str, value: Optional[str], start: int, end: int):
+        if name == "dangerouslySetInnerHTML":
+            self.report(ERROR, "dangerous-html", "dangerouslySetInnerHTML is not allowed", start, end)
+        elif value is not None and name.lower().startswith("on") and len(name) > 2:
+            self.report(ERROR, "inline-handler", f"String event handlers are not allowed; pass a function to {name}", start, end)
+        elif value is not None and _is_javascript_url(value):
+            self.report(ERROR, "javascript-url", "javascript: URLs are not allowed", start, end)
+
+
+##############################################################################
+# Validation
+##############################################################################
+
+
+def _validate(code: str) -> Dict[str, Any]:
+    scanner = _Scanner(code)
+    if not code.strip():
+        scanner.report(ERROR, "empty", "Component code cannot be empty", 0, 0)
+    elif len(code) > MAX_CODE_LENGTH:
+        scanner.report(ERROR, "too-large", f"Component code must be at most {MAX_CODE_LENGTH} characters", MAX_CODE_LENGTH, len(code))
+    else:
+        try:
+            scanner.scan_js(0)
+        except CodeSyntaxError as e:
+            scanner.report(ERROR, "syntax", str(e), e.start, e.end)
+        else:
+            if not scanner.defines_component:
+                scanner.report(ERROR, "no-component", "Code must define a React component function", 0, 0)
+            if not scanner.renders:
+                scanner.report(WARNING, "no-jsx", "Component should return JSX", 0, 0)
+
+    line_starts = [0] + [match.end() for match in re.finditer("\n", code)]
+
+    def position(offset: int) -> Tuple[int, int]:
+        line = bisect_right(line_starts, offset)
+        return line, offset - line_starts[line - 1] + 1
+
+    diagnostics, errors, warnings = [], [], []
+    for severity, rule, message, start, end in sorted(scanner.diagnostics, key=lambda d: d[3]):
+        line, column = position(start)
+        end_line, end_column = position(max(start, end))
+        diagnostics.append({
+            "severity": severity,
+            "rule": rule,
+            "message": message,
+            "line": line,
+            "column": column,
+            "end_line": end_line,
+            "end_column": end_column,
+        })
+        text = f"Line {line}:{column}: {message}" if rule not in ("empty", "too-large", "no-component", "no-jsx") else message
+        (errors if severity == ERROR else warnings).append(text)
+    return {"valid": not errors, "errors": errors, "warnings": warnings, "diagnostics": diagnostics}
+
+
+def validate_code(code: str) -> Dict[str, Any]:
+    """
+    Validate component code, returning {"valid", "errors", "warnings", "diagnostics"}; errors and warnings are
+    the diagnostics' messages prefixed with their position. Results are cached by code hash.
+    """
+    key = hashlib.sha256(code.encode("utf-8", "surrogatepass")).hexdigest()
+    result = _results.get(key)
+    if result is None:
+        result = _validate(code)
+        _results.set(key, result, VALIDATION_CACHE_TTL)
+    # Callers get their own lists; the cached result is shared
+    return {
+        "valid": result["valid"],
+        "errors": list(result["errors"]),
+        "warnings": list(result["warnings"]),
+        "diagnostics": list(result["diagnostics"]),
+    }
@@ -0,0 +1,147 @@
+from solar import Table, ColumnDetails
+from typing import Optional, List, Dict, Iterable, Tuple
+from datetime import datetime
+from core.component import Component
+from core.built_in_components import get_catalog
+from psycopg.types.json import Jsonb
+import uuid
+
+# Namespace for version ids: every (component_id, version) has exactly one row, which is never updated
+VERSION_NAMESPACE = uuid.UUID("5b0c6f2e-8f3c-4c61-9a57-1f6b2c9d4e10")
+BUMPS = ("major", "minor", "patch")
+
+class ComponentVersion(Table):
+    __tablename__ = "component_versions"
+
+    id: uuid.UUID = ColumnDetails(primary_key=True)  # version_id(component_id, version)
+    component_id: uuid.UUID  # Reference to the component
+    version: str  # Semantic version, MAJOR.MINOR.PATCH
+    code: Optional[str] = None
+    styles: Optional[str] = None
+    props_schema: Dict = {}
+    compiled_url: Optional[str] = None
+    created_at: datetime = ColumnDetails(default_factory=datetime.now)
+
+
+def version_id(component_id, version: str) -> uuid.UUID:
+    return uuid.uuid5(VERSION_NAMESPACE, f"{component_id}@{version}")
+
+
+def parse_version(version: str) -> Tuple[int, int, int]:
+    try:
+        major, minor, patch = (int(part) for part in version.split("."))
+    except (AttributeError, ValueError):
+        raise ValueError(f"Invalid component version {version!r}")
+    return major, minor, patch
+
+
+def bump_version(version: str, bump: str) -> str:
+    major, minor, patch = parse_version(version)
+    if bump == "major":
+        return f"{major + 1}.0.0"
+    if bump == "minor":
+        return f"{major}.{minor + 1}.0"
+    if bump == "patch":
+        return f"{major}.{minor}.{patch + 1}"
+    raise ValueError(f"Invalid version bump {bump!r}, expected one of {', '.join(BUMPS)}")
+
+
+def required_bump(old_schema: Optional[Dict], new_schema: Optional[Dict]) -> str:
+    """
+    The smallest bump that describes a props_schema change for pages using the component: removing a prop,
+    changing its type or making it required breaks existing props (major), adding an optional prop does not
+    (minor), and anything else, including code and style changes, is a patch.
+    """
+    old_schema, new_schema = old_schema or {}, new_schema or {}
+    for key, old in old_schema.items():
+        new = new_schema.get(key)
+        if new is None:
+            return "major"
+        if isinstance(old, dict) and isinstance(new, dict):
+            if old.get("type") != new.get("type") or (new.get("required") and not old.get("required")):
+                return "major"
+    for key, new in new_schema.items():
+        if key not in old_schema and isinstance(new, dict) and new.get("required") and "default" not in new:
+            return "major"
+    if set(new_schema) - set(old_schema):
+        return "minor"
+    return "patch"
+
+
+def save_version(component: Dict) -> None:
+    """Record the content of a components row as its current version; an existing version is left untouched."""
+    save_versions([component])
+
+
+def save_versions(components: List[Dict]) -> None:
+    """save_version for many components rows, in one statement."""
+    if not components:
+        return
+    rows = []
+    params = {}
+    for index, component in enumerate(components):
+        rows.append(
+            f"(%(id_{index})s, %(component_id_{index})s, %(version_{index})s, %(code_{index})s, %(styles_{index})s, "
+            f"%(props_schema_{index})s, %(compiled_url_{index})s, %(created_at_{index})s)"
+        )
+        params.update({
+            f"id_{index}": str(version_id(component["id"], component["version"])),
+            f"component_id_{index}": str(component["id"]),
+            f"version_{index}": component["version"],
+            f"code_{index}": component.get("code"),
+            f"styles_{index}": component.get("styles"),
+            f"props_schema_{index}": Jsonb(component.get("props_schema") or {}),
+            f"compiled_url_{index}": component.get("compiled_url"),
+            f"created_at_{index}": component.get("updated_at") or datetime.now(),
+        })
+    ComponentVersion.sql(
+        f"""
+        INSERT INTO component_versions (id, component_id, version, code, styles, props_schema, compiled_url, created_at)
+        VALUES {', '.join(rows)}
+        ON CONFLICT (id) DO NOTHING
+        """,
+        params
+    )
+
+
+def current_versions(component_ids: Iterable[str]) -> Dict[str, str]:
+    """Latest version of each component id, built-in slugs included; unknown ids are left out."""
+    catalog = get_catalog()
+    versions = {}
+    custom_ids = []
+    for component_id in set(component_ids):
+        built_in = catalog.get(component_id)
+        if built_in is not None:
+            versions[component_id] = built_in.version
+            continue
+        try:
+            custom_ids.append(str(uuid.UUID(component_id)))
+        except ValueError:
+            continue
+    if custom_ids:
+        results = Component.sql(
+            "SELECT id, version FROM components WHERE id = ANY(%(ids)s::uuid[])",
+            {"ids": custom_ids}
+        )
+        for result in results:
+            versions[str(result["id"])] = result["version"]
+    return versions
+
+
+def pin_component_versions(content_structure: Dict) -> Dict:
+    """
+    Pin every component instance in the page's content to a version: instances without a componentVersion get the
+    component's current version, so later changes to the component don't alter the page until it is re-pinned.
+    """
+    instances: List[Dict] = [
+        instance for instance in (content_structure or {}).get("components") or []
+        if isinstance(instance, dict) and instance.get("componentId") and not instance.get("componentVersion")
+    ]
+    if not instances:
+        return content_structure
+    versions = current_versions(str(instance["componentId"]) for instance in instances)
+    for instance in instances:
+        version = versions.get(str(instance["componentId"]))
+        if version is not None:
+            instance["componentVersion"] = version
+    return content_structure
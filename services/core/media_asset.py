@@ -12,10 +12,12 @@ class MediaAsset(Table):
     name: str
     original_filename: str
     file_path: str  # Path in media bucket
+    content_hash: Optional[str] = None  # SHA-256 of the stored blob, None for legacy per-upload objects
     file_size: int  # Size in bytes
     mime_type: str
     alt_text: Optional[str] = None
     tags: List[str] = []
     folder: Optional[str] = None  # Organization folder
+    derivatives: Dict = {}  # Resized/re-encoded variants keyed by name, e.g. "640w.webp"
     created_at: datetime = ColumnDetails(default_factory=datetime.now)
     updated_at: datetime = ColumnDetails(default_factory=datetime.now)
@@ -0,0 +1,236 @@
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import List, Optional, Dict
+from uuid import UUID
+from io import BytesIO
+from psycopg.types.json import Jsonb
+from PIL import Image, ImageOps, features
+from solar.config import config
+from solar.media import (MediaFile, save_to_bucket, get_from_bucket, delete_from_bucket, delete_many_from_bucket,
+                         generate_presigned_url)
+from core.media_asset import MediaAsset
+import multiprocessing
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Widths (in px) rendered for responsive srcsets; widths at or above the source width are skipped
+DERIVATIVE_WIDTHS = (320, 640, 960, 1280, 1920)
+DERIVABLE_MIME_TYPES = {"image/jpeg", "image/png", "image/webp"}
+DERIVATIVE_QUALITY = {"image/avif": 55, "image/webp": 75, "image/jpeg": 80}
+PIL_FORMATS = {"image/avif": "AVIF", "image/webp": "WEBP", "image/jpeg": "JPEG", "image/png": "PNG"}
+
+_process_pool = None
+_dispatch_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_process_pool() -> ProcessPoolExecutor:
+    """Worker processes for image encoding, kept off the API threads and the GIL."""
+    global _process_pool
+    with _pool_lock:
+        if _process_pool is None:
+            _process_pool = ProcessPoolExecutor(
+                max_workers=config.media_derivative_workers(),
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+    return _process_pool
+
+
+def get_dispatch_pool() -> ThreadPoolExecutor:
+    """Threads that fetch sources, wait on the process pool and upload the results."""
+    global _dispatch_pool
+    with _pool_lock:
+        if _dispatch_pool is None:
+            _dispatch_pool = ThreadPoolExecutor(
+                max_workers=config.media_derivative_workers(),
+                thread_name_prefix="media-derivatives",
+            )
+    return _dispatch_pool
+
+
+def fallback_format(mime_type: str) -> str:
+    """The universally supported format variants are also produced in (PNG keeps transparency)."""
+    return "image/png" if mime_type == "image/png" else "image/jpeg"
+
+
+def derivative_formats(mime_type: str) -> List[str]:
+    """Output formats in order of preference."""
+    formats = ["image/webp", fallback_format(mime_type)]
+    if features.check("avif"):
+        formats.insert(0, "image/avif")
+    return formats
+
+
+def variant_name(width: int, mime_type: str) -> str:
+    return f"{width}w.{mime_type.split('/')[-1]}"
+
+
+def encode_image(image: Image.Image, mime_type: str, quality: Optional[int] = None) -> bytes:
+    if mime_type == "image/jpeg" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    elif image.mode not in ("RGB", "RGBA", "L", "LA"):
+        image = image.convert("RGBA")
+    options = {}
+    if mime_type in DERIVATIVE_QUALITY:
+        options["quality"] = quality or DERIVATIVE_QUALITY[mime_type]
+    if mime_type in ("image/jpeg", "image/png"):
+        options["optimize"] = True
+    out = BytesIO()
+    image.save(out, format=PIL_FORMATS[mime_type], **options)
+    return out.getvalue()
+
+
+def render_derivatives(data: bytes, mime_type: str) -> List[Dict]:
+    """
+    Render width-stepped variants of an image in every derivative format.
+
+    Runs inside a worker process, so it only takes and returns plain picklable values.
+    """
+    with Image.open(BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        image.load()
+
+    formats = derivative_formats(mime_type)
+    widths = [width for width in DERIVATIVE_WIDTHS if width < image.width]
+    variants = []
+    for width in widths + [image.width]:
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.Resampling.LANCZOS)
+        for output_format in formats:
+            # The original already covers full width in its own format
+            if width == image.width and output_format in (mime_type, fallback_format(mime_type)):
+                continue
+            encoded = encode_image(resized, output_format)
+            variants.append({"width": width, "height": height, "mime_type": output_format, "bytes": encoded})
+    return variants
+
+
+def _asset_exists(asset_id: UUID) -> bool:
+    return bool(MediaAsset.sql("SELECT 1 FROM media_assets WHERE id = %(asset_id)s", {"asset_id": str(asset_id)}))
+
+
+def _blob_in_use(asset: MediaAsset) -> bool:
+    """Whether another asset still references the blob whose derivatives (under its content hash) were written."""
+    if not asset.content_hash:
+        return False
+    return bool(MediaAsset.sql(
+        "SELECT 1 FROM media_assets WHERE content_hash = %(content_hash)s LIMIT 1",
+        {"content_hash": asset.content_hash}
+    ))
+
+
+def generate_derivatives(asset_id: UUID) -> Dict:
+    """Render, upload and record derivatives for a media asset. Blocks; request paths use schedule_derivatives."""
+    results = MediaAsset.sql(
+        "SELECT * FROM media_assets WHERE id = %(asset_id)s",
+        {"asset_id": str(asset_id)}
+    )
+    if not results:
+        return {}
+    asset = MediaAsset(**results[0])
+    if asset.mime_type not in DERIVABLE_MIME_TYPES:
+        return {}
+
+    # Derivatives are stored per content hash, so an asset sharing the same blob may already have them
+    derivatives = None
+    if asset.content_hash:
+        shared = MediaAsset.sql(
+            "SELECT derivatives FROM media_assets WHERE content_hash = %(content_hash)s AND id != %(asset_id)s AND derivatives != '{}'::jsonb LIMIT 1",
+            {"content_hash": asset.content_hash, "asset_id": str(asset_id)}
+        )
+        if shared:
+            derivatives = shared[0]["derivatives"]
+
+    if derivatives is None:
+        source = get_from_bucket(asset.file_path)
+        rendered = get_process_pool().submit(render_derivatives, source.bytes, asset.mime_type).result()
+        # Rendering takes a while; don't write objects for an asset deleted meanwhile, whose delete has already
+        # released the blob and removed the derivatives it knew about
+        if not _asset_exists(asset_id):
+            return {}
+        prefix = f"derivatives/{asset.content_hash or asset.id}"
+        derivatives = {}
+        for variant in rendered:
+            name = variant_name(variant["width"], variant["mime_type"])
+            file_path = save_to_bucket(
+                MediaFile(size=len(variant["bytes"]), mime_type=variant["mime_type"], bytes=variant["bytes"]),
+                f"{prefix}/{name}"
+            )
+            derivatives[name] = {
+                "width": variant["width"],
+                "height": variant["height"],
+                "mime_type": variant["mime_type"],
+                "file_size": len(variant["bytes"]),
+                "file_path": file_path,
+            }
+
+    updated = MediaAsset.sql(
+        "UPDATE media_assets SET derivatives = %(derivatives)s WHERE id = %(asset_id)s RETURNING id",
+        {"derivatives": Jsonb(derivatives), "asset_id": str(asset_id)}
+    )
+    if not updated:
+        # Deleted while uploading: nothing references these objects any more unless another asset still holds the blob
+        if not _blob_in_use(asset):
+            delete_many_from_bucket([derivative["file_path"] for derivative in derivatives.values()])
+        return {}
+    return derivatives
+
+
+def _log_failure(future: Future):
+    if future.exception() is not None:
+        logger.error(f"Derivative generation failed: {future.exception()}")
+
+
+def schedule_derivatives(asset: MediaAsset) -> Optional[Future]:
+    """Queue derivative generation for an asset without waiting for it."""
+    if asset.mime_type not in DERIVABLE_MIME_TYPES:
+        return None
+    future = get_dispatch_pool().submit(generate_derivatives, asset.id)
+    future.add_done_callback(_log_failure)
+    return future
+
+
+def delete_derivatives(asset: MediaAsset):
+    """Remove an asset's derivative objects from the bucket."""
+    for derivative in asset.derivatives.values():
+        delete_from_bucket(derivative["file_path"])
+
+
+def select_derivative(asset: MediaAsset, width: Optional[int] = None,
+                      mime_types: Optional[List[str]] = None) -> Optional[Dict]:
+    """
+    Pick the smallest derivative at least `width` wide, in the first acceptable format that has one.
+
+    Without a width the largest derivative is chosen. Returns None when nothing matches, in which
+    case the original should be served.
+    """
+    for mime_type in mime_types or derivative_formats(asset.mime_type):
+        candidates = sorted(
+            (d for d in asset.derivatives.values() if d["mime_type"] == mime_type),
+            key=lambda d: d["width"]
+        )
+        if not candidates:
+            continue
+        if width is None:
+            return candidates[-1]
+        for candidate in candidates:
+            if candidate["width"] >= width:
+                return candidate
+        return candidates[-1]
+    return None
+
+
+def build_srcsets(asset: MediaAsset, expires_in: int = 3600) -> Dict[str, str]:
+    """Presigned `srcset` strings for each derivative format, keyed by mime type."""
+    srcsets = {}
+    for mime_type in derivative_formats(asset.mime_type):
+        candidates = sorted(
+            (d for d in asset.derivatives.values() if d["mime_type"] == mime_type),
+            key=lambda d: d["width"]
+        )
+        if candidates:
+            srcsets[mime_type] = ", ".join(
+                f"{generate_presigned_url(d['file_path'], expires_in)} {d['width']}w" for d in candidates
+            )
+    return srcsets
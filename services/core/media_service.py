@@ -1,24 +1,55 @@
-from typing import List, Optional
+from typing import BinaryIO, List, Optional, Dict
 from uuid import UUID
-from solar.access import User, authenticated
-from solar.media import MediaFile, save_to_bucket, generate_presigned_url, delete_from_bucket
+from solar.access import User, authenticated, public
+from solar.config import config
+from solar.context import without_deadline
+from solar.media import (MediaFile, save_blob, release_blob, release_blobs, generate_presigned_url, delete_from_bucket,
+                         delete_many_from_bucket, copy_many_in_bucket, get_client, MediaStream, stream_from_bucket,
+                         media_signature_expiry, sign_media, verify_media_signature)
 from core.media_asset import MediaAsset
+from core.media_derivatives import DERIVABLE_MIME_TYPES, schedule_derivatives, delete_derivatives, select_derivative, build_srcsets
+from core.media_transforms import TransformParams, THUMBNAIL_SIZE, thumbnail_url, transform_url, verify_transform_signature, get_transformed_media, purge_transforms
 from datetime import datetime
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on assets per bulk call, keeps the id array and the DeleteObjects fan-out bounded
+MAX_BULK_MEDIA_ASSETS = 10000
+
+def media_proxy_url(asset_id: UUID) -> Optional[str]:
+    """Signed, expiring path of the streaming media proxy for an asset, if media URLs can be signed."""
+    if config.media_signing_secret(throw_if_missing=False) is None:
+        return None
+    expires = media_signature_expiry()
+    return f"/api/media_service/media/{asset_id}?exp={expires}&sig={sign_media(str(asset_id), expires)}"
+
+def _presign_asset(asset: MediaAsset) -> MediaAsset:
+    """Replace bucket paths on the asset and its derivatives with presigned URLs."""
+    asset.file_path = generate_presigned_url(asset.file_path)
+    asset.derivatives = {
+        name: {**derivative, "file_path": generate_presigned_url(derivative["file_path"])}
+        for name, derivative in asset.derivatives.items()
+    }
+    # Thumbnails are rendered lazily by the transform endpoint instead of downloading the original
+    thumbnail = thumbnail_url(asset)
+    if thumbnail:
+        asset.derivatives["thumbnail"] = {
+            "width": THUMBNAIL_SIZE,
+            "height": THUMBNAIL_SIZE,
+            "mime_type": "image/webp",
+            "file_path": thumbnail
+        }
+    return asset
 
 @authenticated
 def upload_media(user: User, file: MediaFile, name: str, 
                 website_id: Optional[UUID] = None, alt_text: Optional[str] = None,
                 folder: Optional[str] = None, tags: Optional[List[str]] = None) -> MediaAsset:
     """Upload a media file and create a database record."""
-    # Generate file path
-    base_path = f"users/{user.id}"
-    if website_id:
-        base_path = f"{base_path}/websites/{website_id}"
-    if folder:
-        base_path = f"{base_path}/{folder}"
-    
-    # Save file to bucket
-    file_path = save_to_bucket(file, base_path)
+    # Store content-addressed; identical bytes already in the bucket are not uploaded again
+    blob = save_blob(file)
+    file_path = blob.file_path
     
     # Create media asset record
     media_asset = MediaAsset(
@@ -27,17 +58,26 @@ def upload_media(user: User, file: MediaFile, name: str,
         name=name,
         original_filename=name,  # In a real app, you'd extract this from the upload
         file_path=file_path,
+        content_hash=blob.sha256,
         file_size=file.size,
         mime_type=file.mime_type,
         alt_text=alt_text,
         tags=tags or [],
         folder=folder
     )
-    media_asset.sync()
+    try:
+        media_asset.sync()
+    except Exception:
+        # The reference must be given back even when the sync failed for running out of time
+        with without_deadline():
+            release_blob(blob.sha256)
+        raise
+    
+    # Resized and modern-format variants are rendered in the background
+    schedule_derivatives(media_asset)
     
     # Return with presigned URL
-    media_asset.file_path = generate_presigned_url(file_path)
-    return media_asset
+    return _presign_asset(media_asset)
 
 @authenticated
 def get_user_media(user: User, website_id: Optional[UUID] = None, 
@@ -65,9 +105,7 @@ def get_user_media(user: User, website_id: Optional[UUID] = None,
     # Generate presigned URLs for all assets
     media_assets = []
     for result in results:
-        asset = MediaAsset(**result)
-        asset.file_path = generate_presigned_url(asset.file_path)
-        media_assets.append(asset)
+        media_assets.append(_presign_asset(MediaAsset(**result)))
     
     return media_assets
 
@@ -81,9 +119,76 @@ def get_media_asset(user: User, asset_id: UUID) -> MediaAsset:
     if not results:
         raise ValueError("Media asset not found or access denied")
     
+    return _presign_asset(MediaAsset(**results[0]))
+
+@authenticated
+def get_media_url(user: User, asset_id: UUID, width: Optional[int] = None,
+                  mime_types: Optional[List[str]] = None) -> Dict:
+    """Get a presigned URL for the best derivative of a media asset, plus srcsets per format."""
+    results = MediaAsset.sql(
+        "SELECT * FROM media_assets WHERE id = %(asset_id)s AND user_id = %(user_id)s",
+        {"asset_id": str(asset_id), "user_id": user.id}
+    )
+    if not results:
+        raise ValueError("Media asset not found or access denied")
+    
     asset = MediaAsset(**results[0])
-    asset.file_path = generate_presigned_url(asset.file_path)
-    return asset
+    derivative = select_derivative(asset, width, mime_types)
+    if derivative is None:
+        # No derivatives yet (or not an image), fall back to the original
+        return {
+            "url": generate_presigned_url(asset.file_path),
+            "proxy_url": media_proxy_url(asset.id),
+            "width": None,
+            "mime_type": asset.mime_type,
+            "srcsets": {}
+        }
+    
+    return {
+        "url": generate_presigned_url(derivative["file_path"]),
+        "proxy_url": media_proxy_url(asset.id),
+        "width": derivative["width"],
+        "mime_type": derivative["mime_type"],
+        "srcsets": build_srcsets(asset)
+    }
+
+@authenticated
+def get_media_transform_url(user: User, asset_id: UUID, params: TransformParams) -> Dict:
+    """Get a signed, expiring URL that renders the user's media asset at any size, fit, format and quality."""
+    if config.media_signing_secret(throw_if_missing=False) is None:
+        raise ValueError("Media transforms are not configured")
+    results = MediaAsset.sql(
+        "SELECT id, mime_type FROM media_assets WHERE id = %(asset_id)s AND user_id = %(user_id)s",
+        {"asset_id": str(asset_id), "user_id": user.id}
+    )
+    if not results:
+        raise ValueError("Media asset not found or access denied")
+    if results[0]["mime_type"] not in DERIVABLE_MIME_TYPES:
+        raise ValueError("Media asset cannot be transformed")
+    return {"url": transform_url(asset_id, params), "mime_type": params.mime_type}
+
+@public
+def get_media_transform(asset_id: UUID, params: TransformParams, signature: str, expires: int) -> BinaryIO:
+    """Open a resized copy of a media asset for a signed transform URL, rendering it on first request."""
+    if not verify_transform_signature(asset_id, params, signature, expires):
+        raise ValueError("Invalid transform signature")
+    return get_transformed_media(asset_id, params)
+
+@public
+def stream_media(asset_id: UUID, signature: str, expires: int, range_header: Optional[str] = None,
+                 if_none_match: Optional[str] = None, if_modified_since: Optional[str] = None) -> MediaStream:
+    """Open the original file of a media asset for streaming through the API, for a signed proxy URL."""
+    if not verify_media_signature(str(asset_id), signature, expires):
+        raise ValueError("Invalid media signature")
+    
+    results = MediaAsset.sql(
+        "SELECT file_path FROM media_assets WHERE id = %(asset_id)s",
+        {"asset_id": str(asset_id)}
+    )
+    if not results:
+        raise ValueError("Media asset not found")
+    
+    return stream_from_bucket(results[0]["file_path"], range_header, if_none_match, if_modified_since)
 
 @authenticated
 def update_media_metadata(user: User, asset_id: UUID, name: Optional[str] = None,
@@ -135,49 +240,134 @@ def delete_media_asset(user: User, asset_id: UUID) -> bool:
     
     asset = MediaAsset(**results[0])
     
-    # Delete from bucket (use original path, not presigned URL)
-    delete_from_bucket(asset.file_path)
-    
     # Delete database record
     MediaAsset.sql(
         "DELETE FROM media_assets WHERE id = %(asset_id)s",
         {"asset_id": str(asset_id)}
     )
     
+    # Shared blobs (and their derivatives) are only removed from the bucket with their last reference. The row is
+    # gone, so this runs to completion even past the deadline rather than leaking the reference and the objects.
+    with without_deadline():
+        if asset.content_hash:
+            if release_blob(asset.content_hash):
+                delete_derivatives(asset)
+        else:
+            # Legacy per-upload object (use original path, not presigned URL)
+            delete_from_bucket(asset.file_path)
+            delete_derivatives(asset)
+        purge_transforms(asset_id)
+    
     return True
 
+@authenticated
+def delete_media_assets(user: User, asset_ids: List[UUID]) -> Dict:
+    """Delete many media assets and their files, reporting assets and objects that could not be removed."""
+    if len(asset_ids) > MAX_BULK_MEDIA_ASSETS:
+        raise ValueError(f"Cannot delete more than {MAX_BULK_MEDIA_ASSETS} media assets at once")
+    requested_ids = list(dict.fromkeys(str(asset_id) for asset_id in asset_ids))
+    
+    # Ownership check and delete in one statement
+    deleted_rows = MediaAsset.sql(
+        "DELETE FROM media_assets WHERE id = ANY(%(asset_ids)s::uuid[]) AND user_id = %(user_id)s RETURNING *",
+        {"asset_ids": requested_ids, "user_id": user.id}
+    )
+    assets = [MediaAsset(**row) for row in deleted_rows]
+    deleted_ids = {str(asset.id) for asset in assets}
+    
+    # Shared blobs (and their derivatives) are only removed from the bucket with their last reference; like
+    # delete_media_asset, this cleanup isn't cut short by the deadline once the rows are gone
+    with without_deadline():
+        released, storage_errors = release_blobs([asset.content_hash for asset in assets if asset.content_hash])
+        paths = []
+        for asset in assets:
+            if not asset.content_hash:
+                paths.append(asset.file_path)
+            if not asset.content_hash or asset.content_hash in released:
+                paths.extend(derivative["file_path"] for derivative in asset.derivatives.values())
+            purge_transforms(asset.id)
+        storage_errors += delete_many_from_bucket(paths)
+    
+    return {
+        "deleted": [asset_id for asset_id in requested_ids if asset_id in deleted_ids],
+        "not_found": [asset_id for asset_id in requested_ids if asset_id not in deleted_ids],
+        "storage_errors": storage_errors
+    }
+
+def _folder_file_path(user: User, asset: MediaAsset, folder: Optional[str]) -> str:
+    """Bucket key of a legacy (non content-addressed) asset stored under its folder."""
+    file_path = f"{get_client().get_base_path()}/users/{user.id}"
+    if asset.website_id:
+        file_path = f"{file_path}/websites/{asset.website_id}"
+    if folder:
+        file_path = f"{file_path}/{folder}"
+    return f"{file_path}/{asset.id}"
+
 @authenticated
 def organize_media(user: User, asset_ids: List[UUID], target_folder: Optional[str] = None) -> List[MediaAsset]:
     """Move multiple media assets to a different folder."""
-    # Verify ownership of all assets
-    placeholders = ', '.join(['%(asset_' + str(i) + ')s' for i in range(len(asset_ids))])
-    params = {f'asset_{i}': str(asset_id) for i, asset_id in enumerate(asset_ids)}
-    params['user_id'] = user.id
+    if len(asset_ids) > MAX_BULK_MEDIA_ASSETS:
+        raise ValueError(f"Cannot move more than {MAX_BULK_MEDIA_ASSETS} media assets at once")
+    requested_ids = list(dict.fromkeys(str(asset_id) for asset_id in asset_ids))
+    if not requested_ids:
+        return []
+    params = {"asset_ids": requested_ids, "user_id": user.id}
     
+    # Verify ownership of all assets
     results = MediaAsset.sql(
-        f"SELECT id FROM media_assets WHERE id IN ({placeholders}) AND user_id = %(user_id)s",
+        "SELECT * FROM media_assets WHERE id = ANY(%(asset_ids)s::uuid[]) AND user_id = %(user_id)s",
         params
     )
     
-    if len(results) != len(asset_ids):
+    if len(results) != len(requested_ids):
         raise ValueError("Some assets not found or access denied")
     
+    # Content-addressed assets don't depend on their folder; legacy folder-based keys are relocated. Legacy keys
+    # may be shared by several assets, so moves are tracked per asset: asset id -> (source, destination)
+    moves = {}
+    for result in results:
+        asset = MediaAsset(**result)
+        destination = _folder_file_path(user, asset, target_folder)
+        if not asset.content_hash and asset.file_path != destination:
+            moves[str(asset.id)] = (asset.file_path, destination)
+    copy_errors = copy_many_in_bucket(list(moves.values()))
+    for error in copy_errors:
+        logger.warning(f"Failed to relocate media object {error['key']} to {error['destination']}: {error['error']}")
+    failed_destinations = {error["destination"] for error in copy_errors}
+    moved = {asset_id: move for asset_id, move in moves.items() if move[1] not in failed_destinations}
+    
     # Update folder for all assets
     MediaAsset.sql(
-        f"UPDATE media_assets SET folder = %(folder)s, updated_at = %(updated_at)s WHERE id IN ({placeholders})",
+        "UPDATE media_assets SET folder = %(folder)s, updated_at = %(updated_at)s WHERE id = ANY(%(asset_ids)s::uuid[])",
         {**params, "folder": target_folder, "updated_at": datetime.now()}
     )
+    if moved:
+        MediaAsset.sql(
+            """
+            UPDATE media_assets SET file_path = moved.file_path
+            FROM (SELECT unnest(%(asset_ids)s::uuid[]) AS id, unnest(%(destinations)s::text[]) AS file_path) AS moved
+            WHERE media_assets.id = moved.id AND media_assets.user_id = %(user_id)s
+            """,
+            {"asset_ids": list(moved), "destinations": [destination for _, destination in moved.values()], "user_id": user.id}
+        )
+        # Old keys are only removed once no row points at them any more
+        sources = list({source for source, _ in moved.values()})
+        still_used = MediaAsset.sql(
+            "SELECT DISTINCT file_path FROM media_assets WHERE file_path = ANY(%(sources)s)",
+            {"sources": sources}
+        )
+        unused = set(sources) - {row["file_path"] for row in still_used}
+        for error in delete_many_from_bucket(list(unused)):
+            logger.warning(f"Failed to remove relocated media object {error['key']}: {error['error']}")
     
     # Return updated assets
     updated_results = MediaAsset.sql(
-        f"SELECT * FROM media_assets WHERE id IN ({placeholders}) ORDER BY name",
+        "SELECT * FROM media_assets WHERE id = ANY(%(asset_ids)s::uuid[]) ORDER BY name",
         params
     )
     
     media_assets = []
     for result in updated_results:
-        asset = MediaAsset(**result)
-        asset.file_path = generate_presigned_url(asset.file_path)
-        media_assets.append(asset)
+        media_assets.append(_presign_asset(MediaAsset(**result)))
     
     return media_assets
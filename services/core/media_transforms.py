@@ -0,0 +1,132 @@
+from typing import BinaryIO, Optional, Literal
+from uuid import UUID
+from io import BytesIO
+from urllib.parse import urlencode
+from pydantic import BaseModel, Field
+from PIL import Image, ImageOps
+from solar.config import config
+from solar.disk_cache import DiskCache
+from solar.media import get_from_bucket, media_signature_expiry, sign_media, verify_media_signature
+from core.media_asset import MediaAsset
+from core.media_derivatives import DERIVABLE_MIME_TYPES, encode_image, get_process_pool
+import threading
+import hashlib
+
+TRANSFORM_MIME_TYPES = {"webp": "image/webp", "avif": "image/avif", "jpeg": "image/jpeg", "png": "image/png"}
+MAX_TRANSFORM_DIMENSION = 4096
+# Square WebP thumbnail used by the media library and property panel
+THUMBNAIL_SIZE = 320
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+class TransformParams(BaseModel):
+    w: Optional[int] = Field(default=None, ge=1, le=MAX_TRANSFORM_DIMENSION)
+    h: Optional[int] = Field(default=None, ge=1, le=MAX_TRANSFORM_DIMENSION)
+    fit: Literal["cover", "contain", "fill", "inside"] = "cover"
+    format: Literal["webp", "avif", "jpeg", "png"] = "webp"
+    quality: int = Field(default=75, ge=1, le=100)
+
+    @property
+    def mime_type(self) -> str:
+        return TRANSFORM_MIME_TYPES[self.format]
+
+    def query(self) -> str:
+        """Canonical query string; the signature and cache key are computed over this."""
+        return urlencode(sorted((k, v) for k, v in self.model_dump().items() if v is not None))
+
+
+def get_cache() -> DiskCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = DiskCache(config.media_transform_cache_dir(), config.media_transform_cache_bytes())
+    return _cache
+
+
+def sign_transform(asset_id: UUID, params: TransformParams, expires: int) -> str:
+    return sign_media(f"{asset_id}?{params.query()}", expires)
+
+
+def verify_transform_signature(asset_id: UUID, params: TransformParams, signature: str, expires: int) -> bool:
+    return verify_media_signature(f"{asset_id}?{params.query()}", signature, expires)
+
+
+def transform_url(asset_id: UUID, params: TransformParams) -> str:
+    """Signed, expiring path of the on-demand transform endpoint; the signature stands in for authentication."""
+    expires = media_signature_expiry()
+    signature = sign_transform(asset_id, params, expires)
+    return f"/api/media_service/transform/{asset_id}?{params.query()}&exp={expires}&sig={signature}"
+
+
+def thumbnail_url(asset: MediaAsset) -> Optional[str]:
+    if asset.mime_type not in DERIVABLE_MIME_TYPES or config.media_signing_secret(throw_if_missing=False) is None:
+        return None
+    return transform_url(asset.id, TransformParams(w=THUMBNAIL_SIZE, h=THUMBNAIL_SIZE))
+
+
+def transform_etag(asset_id: UUID, params: TransformParams) -> str:
+    """Strong ETag for a transform. Asset bytes never change, so it only depends on the id and params."""
+    return '"' + hashlib.sha256(f"{asset_id}?{params.query()}".encode()).hexdigest()[:32] + '"'
+
+
+def render_transform(data: bytes, params: dict) -> bytes:
+    """Resize and re-encode one image. Runs inside a worker process."""
+    params = TransformParams(**params)
+    with Image.open(BytesIO(data)) as source:
+        image = ImageOps.exif_transpose(source)
+        image.load()
+
+    width, height = params.w, params.h
+    if width is None and height is None:
+        width, height = image.size
+    elif width is None:
+        width = max(1, round(image.width * height / image.height))
+    elif height is None:
+        height = max(1, round(image.height * width / image.width))
+
+    if params.fit == "cover":
+        image = ImageOps.fit(image, (width, height), Image.Resampling.LANCZOS)
+    elif params.fit == "contain":
+        if image.mode not in ("RGBA", "LA") and params.format in ("webp", "avif", "png"):
+            image = image.convert("RGBA")
+        image = ImageOps.pad(image, (width, height), Image.Resampling.LANCZOS)
+    elif params.fit == "fill":
+        image = image.resize((width, height), Image.Resampling.LANCZOS)
+    else:
+        # "inside" scales down to fit the box and never enlarges
+        image = image.copy()
+        image.thumbnail((width, height), Image.Resampling.LANCZOS)
+
+    return encode_image(image, params.mime_type, params.quality)
+
+
+def get_transformed_media(asset_id: UUID, params: TransformParams) -> BinaryIO:
+    """
+    Open the cached file for a transform, rendering it in the process pool on first request. The caller closes it.
+    """
+    cache = get_cache()
+    key = transform_etag(asset_id, params).strip('"')
+    cached = cache.open(str(asset_id), key)
+    if cached is not None:
+        return cached
+
+    results = MediaAsset.sql(
+        "SELECT * FROM media_assets WHERE id = %(asset_id)s",
+        {"asset_id": str(asset_id)}
+    )
+    if not results:
+        raise ValueError("Media asset not found")
+    asset = MediaAsset(**results[0])
+    if asset.mime_type not in DERIVABLE_MIME_TYPES:
+        raise ValueError("Media asset cannot be transformed")
+
+    source = get_from_bucket(asset.file_path)
+    rendered = get_process_pool().submit(render_transform, source.bytes, params.model_dump()).result()
+    return cache.put(str(asset_id), key, rendered)
+
+
+def purge_transforms(asset_id: UUID):
+    """Drop every cached transform of an asset."""
+    get_cache().purge(str(asset_id))
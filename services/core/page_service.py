@@ -3,6 +3,9 @@ from uuid import UUID
 from solar.access import User, authenticated
 from core.page import Page
 from core.website import Website
+from core.component_version import pin_component_versions
+from core.component_props import normalize_component_props
+from core.component_usage import ComponentUsage, components_used_by_page, index_page_usage, remove_page_usage
 from datetime import datetime
 
 @authenticated
@@ -74,14 +77,19 @@ def get_page(user: User, page_id: UUID) -> Page:
 
 @authenticated
 def update_page_content(user: User, page_id: UUID, content_structure: Dict) -> Page:
-    """Update the content structure of a page."""
+    """
+    Update the content structure of a page, pinning newly added components to their current version and validating
+    every component's props against the props_schema of its version, with defaults filled in.
+    """
     # Verify ownership
     existing = get_page(user, page_id)
     
+    content_structure = normalize_component_props(pin_component_versions(content_structure))
     Page.sql(
         "UPDATE pages SET content_structure = %(content_structure)s, updated_at = %(updated_at)s WHERE id = %(page_id)s",
         {"content_structure": content_structure, "updated_at": datetime.now(), "page_id": str(page_id)}
     )
+    index_page_usage(page_id, existing.website_id, content_structure)
     
     return get_page(user, page_id)
 
@@ -162,9 +170,17 @@ def delete_page(user: User, page_id: UUID) -> bool:
         "DELETE FROM pages WHERE id = %(page_id)s",
         {"page_id": str(page_id)}
     )
+    remove_page_usage(page_id)
     
     return True
 
+@authenticated
+def get_page_components(user: User, page_id: UUID) -> List[ComponentUsage]:
+    """List the components a page uses, with the version each instance is pinned to."""
+    # Verify ownership
+    get_page(user, page_id)
+    return components_used_by_page(page_id)
+
 @authenticated
 def reorder_pages(user: User, website_id: UUID, page_orders: List[Dict]) -> List[Page]:
     """Reorder pages by updating their sort_order values."""
@@ -4,6 +4,7 @@ from solar.access import User, authenticated, public
 from solar.media import MediaFile, save_to_bucket, generate_presigned_url
 from core.website import Website
 from core.page import Page
+from core.component_usage import remove_website_usage
 from datetime import datetime
 
 @authenticated
@@ -117,6 +118,9 @@ def delete_website(user: User, website_id: UUID) -> bool:
     # Verify ownership
     existing = get_website(user, website_id)
     
+    # Usage rows go first: if a later delete fails, the pages left behind can be reindexed
+    remove_website_usage(website_id)
+    
     # Delete associated pages
     Page.sql(
         "DELETE FROM pages WHERE website_id = %(website_id)s",
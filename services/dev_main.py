@@ -14,6 +14,7 @@ sys.path.insert(0, str(services_dir))
 
 # Set development environment
 os.environ.setdefault("ENV", "sandbox")
+os.environ.setdefault("MEDIA_SIGNING_SECRET", "dev-media-signing-secret-for-local-only")
 os.environ.setdefault("JWT_SECRET", "dev-jwt-secret-for-local-only")
 os.environ.setdefault("PUBLIC_DOMAIN", "localhost:8000")
 
@@ -0,0 +1,156 @@
+######################################################################################################################
+# General Information
+######################################################################################################################
+# This file contains local access-token verification. RS256 tokens are checked against the router's JWKS, which is
+# cached in-process and refreshed in the background (and on demand when a token names an unknown key id, so key
+# rotation needs no restart). Tokens must name the configured issuer and, when one is configured, audience. Revoked
+# token ids are synced from a revocation list, which local mode requires, on a fixed interval; if the list hasn't
+# synced within AUTH_REVOCATION_MAX_STALENESS, local verification refuses to vouch for tokens and callers fall back
+# to remote introspection, which bounds how long a revoked token can keep working.
+
+
+######################################################################################################################
+# Dependencies
+######################################################################################################################
+
+
+from typing import Any, Dict, Optional, Set
+import asyncio
+import logging
+import time
+
+import jwt
+
+from .config import config
+from .http import request_with_retry
+
+logger = logging.getLogger(__name__)
+
+# Unknown key ids trigger a JWKS refresh at most this often, so forged kids can't be used to hammer the router
+JWKS_MIN_REFRESH_INTERVAL = 30  # seconds
+
+
+######################################################################################################################
+# JWKS
+######################################################################################################################
+
+
+class JWKSCache:
+    def __init__(self):
+        self._keys: Dict[str, jwt.PyJWK] = {}
+        self._fetched_at = 0.0
+        self._lock = asyncio.Lock()
+
+    async def refresh(self, force: bool = False):
+        async with self._lock:
+            if not force and time.time() - self._fetched_at < JWKS_MIN_REFRESH_INTERVAL:
+                return
+            response = await request_with_retry("GET", config.auth_jwks_url())
+            response.raise_for_status()
+            keys = {}
+            for key in jwt.PyJWKSet.from_dict(response.json()).keys:
+                if key.key_id:
+                    keys[key.key_id] = key
+            self._keys = keys
+            self._fetched_at = time.time()
+
+    async def get_signing_key(self, kid: str) -> Optional[jwt.PyJWK]:
+        key = self._keys.get(kid)
+        if key is None:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"JWKS refresh failed: {e}")
+            key = self._keys.get(kid)
+        return key
+
+
+######################################################################################################################
+# Revocation List
+######################################################################################################################
+
+
+class RevocationList:
+    def __init__(self):
+        self._revoked: Set[str] = set()
+        self._synced_at = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return config.auth_revocation_list_url(throw_if_missing=False) is not None
+
+    @property
+    def is_fresh(self) -> bool:
+        """Whether the list is recent enough to rely on; never true when no revocation list is configured."""
+        if not self.enabled:
+            return False
+        return time.time() - self._synced_at <= config.auth_revocation_max_staleness()
+
+    async def sync(self):
+        """Replace the revoked set with the router's current list of revoked token ids (`{"revoked": [jti, ...]}`)."""
+        response = await request_with_retry("GET", config.auth_revocation_list_url())
+        response.raise_for_status()
+        self._revoked = set(response.json().get("revoked", []))
+        self._synced_at = time.time()
+
+    def is_revoked(self, jti: str) -> bool:
+        return jti in self._revoked
+
+
+jwks_cache = JWKSCache()
+revocation_list = RevocationList()
+
+
+######################################################################################################################
+# Verification
+######################################################################################################################
+
+
+async def verify_token_locally(token: str) -> Optional[Dict[str, Any]]:
+    """
+    Verify an RS256 access token without calling the router.
+
+    Returns the claims when the token is valid and not revoked. Returns None when local verification can't decide
+    (unknown key id, stale revocation list, claims missing the user), in which case the caller should introspect.
+    Raises jwt.InvalidTokenError for tokens that are definitely invalid.
+    """
+    if not revocation_list.is_fresh:
+        return None
+    kid = jwt.get_unverified_header(token).get("kid")
+    if not kid:
+        return None
+    key = await jwks_cache.get_signing_key(kid)
+    if key is None:
+        return None
+    claims = jwt.decode(
+        token,
+        key.key,
+        algorithms=["RS256"],
+        issuer=config.auth_token_issuer(),
+        audience=config.auth_token_audience(),
+        options={"require": ["exp", "iss", "jti"]},
+    )
+    if revocation_list.is_revoked(claims["jti"]):
+        raise jwt.InvalidTokenError("Token has been revoked")
+    if not claims.get("userUuid") or not claims.get("email"):
+        return None
+    return claims
+
+
+async def run_key_rotation():
+    """Keep the JWKS and revocation list current. Runs for the life of the application."""
+    next_jwks_refresh = 0.0
+    while True:
+        now = time.time()
+        if now >= next_jwks_refresh:
+            try:
+                await jwks_cache.refresh(force=True)
+            except Exception as e:
+                logger.warning(f"JWKS refresh failed: {e}")
+            next_jwks_refresh = now + config.auth_jwks_refresh_interval()
+        if revocation_list.enabled:
+            try:
+                await revocation_list.sync()
+            except Exception as e:
+                logger.warning(f"Revocation list sync failed: {e}")
+        await asyncio.sleep(config.auth_revocation_sync_interval())
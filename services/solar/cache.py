@@ -0,0 +1,221 @@
+######################################################################################################################
+# General Information
+######################################################################################################################
+# This file contains the caching primitives used by the API: an in-process TTL/LRU cache, a shared store that spans
+# worker processes (Redis when REDIS_URL is set, otherwise an in-process stand-in with the same interface), and
+# TieredCache, which puts the two together. Shared-store failures are logged and treated as misses so that a cache
+# outage never fails a request.
+
+
+######################################################################################################################
+# Dependencies
+######################################################################################################################
+
+
+from collections import OrderedDict
+from typing import Any, Optional, Tuple
+import json
+import logging
+import threading
+import time
+
+from .config import config
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Shared-store calls must stay cheaper than the work they save
+SHARED_STORE_TIMEOUT = 0.25  # seconds
+
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+
+######################################################################################################################
+# In-Process Cache
+######################################################################################################################
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a per-entry TTL."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_with_expiry(self, key: str) -> Tuple[Optional[Any], float]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, 0
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None, 0
+            self._entries.move_to_end(key)
+            return value, expires_at
+
+    def get(self, key: str) -> Optional[Any]:
+        return self.get_with_expiry(key)[0]
+
+    def set(self, key: str, value: Any, ttl: float):
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+######################################################################################################################
+# Shared Stores
+######################################################################################################################
+
+
+class LocalStore:
+    """In-process stand-in for the shared store, used when no REDIS_URL is configured."""
+
+    is_remote = False
+
+    def __init__(self, max_entries: int = 10000):
+        self._cache = TTLCache(max_entries)
+
+    def get(self, key: str) -> Optional[str]:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: str, ttl: float):
+        self._cache.set(key, value, ttl)
+
+    def delete(self, key: str):
+        self._cache.delete(key)
+
+
+class RedisStore:
+    """Redis-backed shared store; errors are logged and reported as misses."""
+
+    is_remote = True
+
+    def __init__(self, url: str):
+        self.client = redis.Redis.from_url(
+            url,
+            socket_timeout=SHARED_STORE_TIMEOUT,
+            socket_connect_timeout=SHARED_STORE_TIMEOUT,
+            decode_responses=True,
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        try:
+            return self.client.get(key)
+        except redis.RedisError as e:
+            logger.warning(f"Shared cache get failed: {e}")
+            return None
+
+    def set(self, key: str, value: str, ttl: float):
+        if ttl <= 0:
+            return
+        try:
+            self.client.set(key, value, px=int(ttl * 1000))
+        except redis.RedisError as e:
+            logger.warning(f"Shared cache set failed: {e}")
+
+    def delete(self, key: str):
+        try:
+            self.client.delete(key)
+        except redis.RedisError as e:
+            logger.warning(f"Shared cache delete failed: {e}")
+
+
+def get_shared_store():
+    """The process-wide shared store: Redis when REDIS_URL is set and redis is installed, else the local stand-in."""
+    global _shared_store
+    with _shared_store_lock:
+        if _shared_store is None:
+            redis_url = config.redis_url(throw_if_missing=False)
+            if redis_url and redis is not None:
+                _shared_store = RedisStore(redis_url)
+            else:
+                if redis_url:
+                    logger.warning("REDIS_URL is set but the redis package is not installed, using a local cache")
+                _shared_store = LocalStore()
+    return _shared_store
+
+
+######################################################################################################################
+# Tiered Cache
+######################################################################################################################
+
+
+class TieredCache:
+    """
+    A process-local TTLCache in front of the shared store.
+
+    Values must be JSON-serializable. Entries are stored with their absolute expiry so a shared hit can be
+    copied into the local tier for exactly its remaining lifetime. delete() only reaches this process's local
+    tier (and the remote one, if any), so `max_local_ttl` bounds how long other workers keep serving a deleted
+    entry, whether or not there is a remote tier.
+    """
+
+    def __init__(self, namespace: str, max_entries: int, max_local_ttl: Optional[float] = None):
+        self.namespace = namespace
+        self.local = TTLCache(max_entries)
+        self.max_local_ttl = max_local_ttl
+
+    @property
+    def shared(self):
+        return get_shared_store()
+
+    @property
+    def has_remote_tier(self) -> bool:
+        return self.shared.is_remote
+
+    def _shared_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get_local(self, key: str) -> Optional[Any]:
+        return self.local.get(key)
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is not None or not self.has_remote_tier:
+            return value
+        raw = self.shared.get(self._shared_key(key))
+        if raw is None:
+            return None
+        try:
+            entry = json.loads(raw)
+        except ValueError:
+            return None
+        self.local.set(key, entry["value"], self._local_ttl(entry["expires_at"] - time.time()))
+        return entry["value"]
+
+    def _local_ttl(self, ttl: float) -> float:
+        if self.max_local_ttl is None:
+            return ttl
+        return min(ttl, self.max_local_ttl)
+
+    def set(self, key: str, value: Any, ttl: float):
+        if ttl <= 0:
+            return
+        self.local.set(key, value, self._local_ttl(ttl))
+        if self.has_remote_tier:
+            entry = {"value": value, "expires_at": time.time() + ttl}
+            self.shared.set(self._shared_key(key), json.dumps(entry, default=str), ttl)
+
+    def delete(self, key: str):
+        self.local.delete(key)
+        if self.has_remote_tier:
+            self.shared.delete(self._shared_key(key))
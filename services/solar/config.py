@@ -13,6 +13,7 @@
 from pathlib import Path
 import sys
 import os
+import tempfile
 from dotenv import load_dotenv
 from typing import Union, Dict, Optional
 
@@ -93,6 +94,261 @@ class Config:
             return "NEON_CONN_URL"
         return connection_string_val
 
+    def _int_setting(self, name: str, default: int) -> int:
+        value = os.getenv(name)
+        if value is None or value == "":
+            return default
+        try:
+            return int(value)
+        except ValueError:
+            raise ConfigurationError(f"{name} must be an integer, got {value!r}")
+
+    def _float_setting(self, name: str, default: float) -> float:
+        value = os.getenv(name)
+        if value is None or value == "":
+            return default
+        try:
+            return float(value)
+        except ValueError:
+            raise ConfigurationError(f"{name} must be a number, got {value!r}")
+
+    def media_derivative_workers(self) -> int:
+        """Get the number of worker processes used to render image derivatives."""
+        return self._int_setting("MEDIA_DERIVATIVE_WORKERS", max(1, (os.cpu_count() or 2) // 2))
+
+    def media_transform_cache_dir(self) -> Path:
+        """Get the directory on-demand image transforms are cached in."""
+        cache_dir = os.getenv("MEDIA_TRANSFORM_CACHE_DIR")
+        if cache_dir:
+            return Path(cache_dir)
+        return Path(tempfile.gettempdir()) / "solar-media-transforms"
+
+    def media_transform_cache_bytes(self) -> int:
+        """Get the disk budget for cached image transforms."""
+        return self._int_setting("MEDIA_TRANSFORM_CACHE_BYTES", 1024 * 1024 * 1024)
+
+    def media_signing_secret(self, throw_if_missing: bool = True) -> Optional[str]:
+        """Get the secret used to sign media proxy and transform URLs; without it those URLs are not issued."""
+        secret = os.getenv("MEDIA_SIGNING_SECRET")
+        self._throw_if_missing(throw_if_missing, secret, "MEDIA_SIGNING_SECRET")
+        return secret
+
+    def media_signed_url_ttl(self) -> int:
+        """Get how long (seconds) a signed media URL stays valid at least; it stays valid for at most twice this."""
+        return max(1, self._int_setting("MEDIA_SIGNED_URL_TTL", 24 * 3600))
+
+    def redis_url(self, throw_if_missing: bool = True) -> Optional[str]:
+        """Get the Redis URL for caches shared across worker processes."""
+        redis_url_val = os.getenv("REDIS_URL")
+        self._throw_if_missing(throw_if_missing, redis_url_val, "REDIS_URL")
+        return redis_url_val
+
+    def auth_cache_max_ttl(self) -> int:
+        """Get the longest time (seconds) an active token introspection result is reused."""
+        return self._int_setting("AUTH_CACHE_MAX_TTL", 300)
+
+    def auth_cache_negative_ttl(self) -> int:
+        """Get how long (seconds) an inactive or invalid token result is remembered."""
+        return self._int_setting("AUTH_CACHE_NEGATIVE_TTL", 30)
+
+    def auth_cache_max_entries(self) -> int:
+        """Get the number of introspection results kept per worker process."""
+        return self._int_setting("AUTH_CACHE_MAX_ENTRIES", 10000)
+
+    def auth_verification_mode(self) -> str:
+        """Get how access tokens are verified: "introspect" (every token, cached) or "local" (JWKS, sampled introspection)."""
+        mode = os.getenv("AUTH_VERIFICATION_MODE", "introspect")
+        if mode not in ("introspect", "local"):
+            raise ConfigurationError(f"AUTH_VERIFICATION_MODE must be 'introspect' or 'local', got {mode!r}")
+        if mode == "local" and self.auth_revocation_list_url(throw_if_missing=False) is None:
+            # Without the list, a revoked token would only be caught by sampled introspection
+            raise ConfigurationError("AUTH_VERIFICATION_MODE=local requires AUTH_REVOCATION_LIST_URL")
+        return mode
+
+    def auth_token_issuer(self) -> str:
+        """Get the issuer (iss) locally verified tokens must carry; defaults to the router's base URL."""
+        return os.getenv("AUTH_TOKEN_ISSUER") or self.router_base_url()
+
+    def auth_token_audience(self) -> Optional[str]:
+        """Get the audience (aud) locally verified tokens must carry; unset, tokens naming any audience are refused."""
+        return os.getenv("AUTH_TOKEN_AUDIENCE") or None
+
+    def auth_jwks_url(self) -> str:
+        """Get the URL of the router's JSON Web Key Set."""
+        jwks_url = os.getenv("AUTH_JWKS_URL")
+        if jwks_url:
+            return jwks_url
+        return f"{self.router_base_url()}/innerApp/oauth2/jwks"
+
+    def auth_jwks_refresh_interval(self) -> int:
+        """Get how often (seconds) the JWKS is refetched in the background."""
+        return self._int_setting("AUTH_JWKS_REFRESH_INTERVAL", 300)
+
+    def auth_introspection_sample_rate(self) -> float:
+        """Get the fraction (0-1) of locally verified requests that are still introspected."""
+        return self._float_setting("AUTH_INTROSPECTION_SAMPLE_RATE", 0.01)
+
+    def auth_revocation_list_url(self, throw_if_missing: bool = True) -> Optional[str]:
+        """Get the URL of the revoked-token list synced for local verification."""
+        revocation_list_url = os.getenv("AUTH_REVOCATION_LIST_URL") or None
+        self._throw_if_missing(throw_if_missing, revocation_list_url, "AUTH_REVOCATION_LIST_URL")
+        return revocation_list_url
+
+    def auth_revocation_sync_interval(self) -> int:
+        """Get how often (seconds) the revocation list is synced."""
+        return self._int_setting("AUTH_REVOCATION_SYNC_INTERVAL", 30)
+
+    def auth_revocation_max_staleness(self) -> int:
+        """Get how old (seconds) the revocation list may be before local verification defers to introspection."""
+        return self._int_setting("AUTH_REVOCATION_MAX_STALENESS", 120)
+
+    def executor_workers(self, name: str) -> int:
+        """Get the thread count of a named executor, e.g. EXECUTOR_DB_HEAVY_WORKERS for "db-heavy"."""
+        defaults = {"db-light": 8, "db-heavy": 4, "storage": 8, "cpu": os.cpu_count() or 2, "bulk": 2}
+        return self._int_setting(f"EXECUTOR_{name.upper().replace('-', '_')}_WORKERS", defaults.get(name, 4))
+
+    def executor_shed_after_ms(self) -> int:
+        """Get the queue wait (ms) after which executor tasks are rejected with 503; 0 disables load shedding."""
+        return self._int_setting("EXECUTOR_SHED_AFTER_MS", 0)
+
+    def request_timeout(self) -> int:
+        """Get the deadline (seconds) for handling one API request; database and S3 work past it is abandoned."""
+        return self._int_setting("REQUEST_TIMEOUT", 30)
+
+    def bulk_request_timeout(self) -> int:
+        """Get the deadline (seconds) for bulk requests such as component import, which replaces REQUEST_TIMEOUT."""
+        return self._int_setting("BULK_REQUEST_TIMEOUT", 600)
+
+    def component_import_batch_size(self) -> int:
+        """Get the number of imported components validated and written together."""
+        return self._int_setting("COMPONENT_IMPORT_BATCH_SIZE", 500)
+
+    def component_import_workers(self) -> int:
+        """Get the number of processes that validate component code during a bulk import."""
+        return self._int_setting("COMPONENT_IMPORT_WORKERS", max(1, (os.cpu_count() or 2) // 2))
+
+    def s3_connect_timeout(self) -> int:
+        """Get the connect timeout (seconds) for S3 calls."""
+        return self._int_setting("S3_CONNECT_TIMEOUT", 3)
+
+    def s3_read_timeout(self) -> int:
+        """Get the read timeout (seconds) for S3 calls."""
+        return self._int_setting("S3_READ_TIMEOUT", 20)
+
+    def fast_json_responses(self) -> bool:
+        """Get whether list and page routes serialize their models directly with pydantic-core (opt-in)."""
+        return os.getenv("FAST_JSON_RESPONSES", "false").lower() in ("1", "true", "yes")
+
+    def compression_min_bytes(self) -> int:
+        """Get the response size (bytes) from which cacheable JSON responses are compressed."""
+        return self._int_setting("COMPRESSION_MIN_BYTES", 1024)
+
+    def brotli_quality(self) -> int:
+        """Get the Brotli quality (0-11) for compressed responses."""
+        return self._int_setting("BROTLI_QUALITY", 5)
+
+    def gzip_level(self) -> int:
+        """Get the gzip level (1-9) for compressed responses."""
+        return self._int_setting("GZIP_LEVEL", 6)
+
+    def built_in_components_dir(self) -> Optional[Path]:
+        """Get the directory of built-in component manifests, if overridden."""
+        path = os.getenv("BUILT_IN_COMPONENTS_DIR")
+        return Path(path) if path else None
+
+    def built_in_catalog_file(self) -> Optional[Path]:
+        """Get the pre-compiled built-in component catalog file, if overridden."""
+        path = os.getenv("BUILT_IN_CATALOG_FILE")
+        return Path(path) if path else None
+
+    def built_in_components_hot_reload(self) -> bool:
+        """Get whether manifest changes are picked up without a restart (default: only outside deployments)."""
+        default = "true" if os.getenv("ENV", "deployment") in ("development", "sandbox") else "false"
+        return os.getenv("BUILT_IN_COMPONENTS_HOT_RELOAD", default).lower() not in ("0", "false", "no")
+
+    def public_components_cache_ttl(self) -> float:
+        """Get how long (seconds) serialized public component listings are cached; keep it below the presign expiry."""
+        return self._float_setting("PUBLIC_COMPONENTS_CACHE_TTL", 60)
+
+    def public_components_local_ttl(self) -> float:
+        """Get how long (seconds) a worker keeps a listing locally, bounding staleness after a change in another worker."""
+        return self._float_setting("PUBLIC_COMPONENTS_LOCAL_TTL", 5)
+
+    def public_components_cache_max_entries(self) -> int:
+        """Get the maximum number of cached public component listings (one per category) per worker."""
+        return self._int_setting("PUBLIC_COMPONENTS_CACHE_MAX_ENTRIES", 256)
+
+    def public_cache_max_age(self) -> int:
+        """Get how long (seconds) browsers and CDNs may reuse public component listings without revalidating."""
+        return self._int_setting("PUBLIC_CACHE_MAX_AGE", 60)
+
+    def built_in_cache_max_age(self) -> int:
+        """Get how long (seconds) browsers and CDNs may reuse the built-in component catalog without revalidating."""
+        return self._int_setting("BUILT_IN_CACHE_MAX_AGE", 3600)
+
+    def cache_stale_while_revalidate(self) -> int:
+        """Get how long (seconds) past max-age a public response may be served while it is revalidated."""
+        return self._int_setting("CACHE_STALE_WHILE_REVALIDATE", 300)
+
+    def media_cache_max_age(self) -> int:
+        """Get how long (seconds) a browser may reuse a media listing; must stay well below the presigned URL expiry."""
+        return self._int_setting("MEDIA_CACHE_MAX_AGE", 60)
+
+    def log_level(self) -> str:
+        """Get the minimum level written by the API's log sinks (LOG_LEVEL is uvicorn's own)."""
+        return os.getenv("API_LOG_LEVEL", "DEBUG").upper()
+
+    def library_log_level(self) -> str:
+        """Get the minimum level of records from other libraries (botocore, urllib3, httpx, psycopg) that reach the sinks."""
+        return os.getenv("LIBRARY_LOG_LEVEL", "WARNING").upper()
+
+    def log_capture_stdout(self) -> bool:
+        """Get whether print() output is written to the log sinks instead of stdout."""
+        return os.getenv("LOG_CAPTURE_STDOUT", "false").lower() in ("1", "true", "yes")
+
+    def log_format(self) -> str:
+        """Get the log line format: "text" (human readable) or "json" (one object per line)."""
+        log_format = os.getenv("LOG_FORMAT", "text")
+        if log_format not in ("text", "json"):
+            raise ConfigurationError(f"LOG_FORMAT must be 'text' or 'json', got {log_format!r}")
+        return log_format
+
+    def log_file(self) -> Optional[str]:
+        """Get the path of the rotating log file; LOG_FILE set to an empty string disables it."""
+        return os.getenv("LOG_FILE", "../logs/fast_api.log") or None
+
+    def log_to_stderr(self) -> bool:
+        """Get whether logs are also written to stderr."""
+        return os.getenv("LOG_TO_STDERR", "true").lower() not in ("0", "false", "no")
+
+    def log_request_sample_rate(self) -> float:
+        """Get the fraction (0-1) of successful, fast requests that get a request log line."""
+        return self._float_setting("LOG_REQUEST_SAMPLE_RATE", 1.0)
+
+    def log_slow_request_ms(self) -> int:
+        """Get the duration (ms) above which a request is always logged, regardless of sampling."""
+        return self._int_setting("LOG_SLOW_REQUEST_MS", 1000)
+
+    def http_timeout(self) -> int:
+        """Get the read/write/pool timeout (seconds) for outbound HTTP calls."""
+        return self._int_setting("HTTP_TIMEOUT", 10)
+
+    def http_connect_timeout(self) -> int:
+        """Get the connect timeout (seconds) for outbound HTTP calls."""
+        return self._int_setting("HTTP_CONNECT_TIMEOUT", 3)
+
+    def http_max_connections(self) -> int:
+        """Get the maximum number of concurrent connections to a single upstream host."""
+        return self._int_setting("HTTP_MAX_CONNECTIONS", 100)
+
+    def http_max_keepalive_connections(self) -> int:
+        """Get the number of idle connections kept open per upstream host."""
+        return self._int_setting("HTTP_MAX_KEEPALIVE_CONNECTIONS", 20)
+
+    def http_retries(self) -> int:
+        """Get how many times a failed outbound HTTP call is retried."""
+        return self._int_setting("HTTP_RETRIES", 2)
+
     def model_api_key(self, throw_if_missing: bool = True) -> str:
         """Get the OpenRouter API key for model access."""
         api_key = os.getenv("OPENROUTER_API_KEY")
@@ -0,0 +1,62 @@
+######################################################################################################################
+# General Information
+######################################################################################################################
+# This file contains the per-request context shared by the API and the service layer: the request id, the
+# authenticated user and the request deadline. They live in contextvars, which the executors in solar.executors copy
+# into their worker threads, so Table.sql and the S3 helpers can see the deadline of the request they are serving.
+
+
+######################################################################################################################
+# Dependencies
+######################################################################################################################
+
+
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
+from typing import Iterator, Optional
+import time
+
+request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+current_user_id: ContextVar[Optional[str]] = ContextVar("current_user_id", default=None)
+# Absolute time.monotonic() value after which the request's work should be abandoned
+request_deadline: ContextVar[Optional[float]] = ContextVar("request_deadline", default=None)
+
+
+class DeadlineExceeded(Exception):
+    """The request's deadline passed before (or while) the work could be done."""
+
+
+######################################################################################################################
+# Deadlines
+######################################################################################################################
+
+
+def set_deadline(seconds: float) -> Token:
+    return request_deadline.set(time.monotonic() + seconds)
+
+
+def remaining_time() -> Optional[float]:
+    """Seconds left until the current request's deadline, or None when there is no deadline."""
+    deadline = request_deadline.get()
+    if deadline is None:
+        return None
+    return deadline - time.monotonic()
+
+
+def check_deadline():
+    remaining = remaining_time()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceeded("Request deadline exceeded")
+
+
+@contextmanager
+def without_deadline() -> Iterator[None]:
+    """
+    Run a block with no deadline, for compensation and cleanup that must finish even when the request's deadline has
+    passed (releasing a reference taken earlier in the request, say); otherwise it would leak what it should undo.
+    """
+    token = request_deadline.set(None)
+    try:
+        yield
+    finally:
+        request_deadline.reset(token)
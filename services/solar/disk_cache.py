@@ -0,0 +1,147 @@
+######################################################################################################################
+# General Information
+######################################################################################################################
+# This file contains the DiskCache class, a size-bounded LRU cache of rendered bytes on local disk. Entries are grouped
+# into namespaces (one directory each) so everything derived from one source can be purged together. Several worker
+# processes may share a cache directory: each keeps its own recency order, and eviction rescans the directory so files
+# written by other processes are counted too. Entries are handed out as open files, which stay readable when another
+# request or process evicts or purges the entry meanwhile.
+
+
+######################################################################################################################
+# Dependencies
+######################################################################################################################
+
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional
+import logging
+import os
+import shutil
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Eviction frees space down to this fraction of max_bytes so it doesn't run on every write
+EVICTION_LOW_WATERMARK = 0.9
+FILE_CHUNK_SIZE = 64 * 1024
+
+
+######################################################################################################################
+# DiskCache Class
+######################################################################################################################
+
+
+class DiskCache:
+    def __init__(self, directory: Path, max_bytes: int):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Path, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._rescan()
+
+    def _path(self, namespace: str, key: str) -> Path:
+        return self.directory / namespace / key
+
+    def _rescan(self):
+        """Rebuild the index from disk, oldest first, keeping the in-process recency of known entries."""
+        found = []
+        for namespace in os.scandir(self.directory):
+            if not namespace.is_dir():
+                continue
+            for entry in os.scandir(namespace.path):
+                if entry.is_file() and not entry.name.startswith("."):
+                    stat = entry.stat()
+                    found.append((stat.st_mtime, Path(entry.path), stat.st_size))
+        found.sort(key=lambda item: item[0])
+        sizes = {path: size for _, path, size in found}
+        # Files only known from disk are treated as older than anything this process has touched
+        entries = OrderedDict((path, size) for path, size in sizes.items() if path not in self._entries)
+        for path in self._entries:
+            if path in sizes:
+                entries[path] = sizes[path]
+        self._entries = entries
+        self._total_bytes = sum(entries.values())
+
+    def open(self, namespace: str, key: str) -> Optional[BinaryIO]:
+        """Open an entry for reading, or None if it isn't cached. The caller closes the file."""
+        path = self._path(namespace, key)
+        try:
+            file = open(path, "rb")
+        except FileNotFoundError:
+            with self._lock:
+                if path in self._entries:
+                    self._total_bytes -= self._entries.pop(path)
+            return None
+        with self._lock:
+            if path in self._entries:
+                self._entries.move_to_end(path)
+            else:
+                self._entries[path] = os.fstat(file.fileno()).st_size
+                self._total_bytes += self._entries[path]
+        return file
+
+    def put(self, namespace: str, key: str, data: bytes) -> BinaryIO:
+        """Store an entry and return it opened for reading, like open(). The caller closes the file."""
+        path = self._path(namespace, key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temp file and rename so readers never see a partial entry
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=".")
+        file = os.fdopen(fd, "w+b")
+        try:
+            file.write(data)
+            file.flush()
+            os.replace(tmp_path, path)
+        except Exception:
+            file.close()
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+        file.seek(0)
+
+        with self._lock:
+            self._total_bytes -= self._entries.pop(path, 0)
+            self._entries[path] = len(data)
+            self._total_bytes += len(data)
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+        return file
+
+    def _evict(self):
+        self._rescan()
+        target = self.max_bytes * EVICTION_LOW_WATERMARK
+        while self._entries and self._total_bytes > target:
+            path, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            try:
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"Failed to evict {path}: {e}")
+
+    def purge(self, namespace: str):
+        """Drop every entry in a namespace."""
+        namespace_dir = self.directory / namespace
+        with self._lock:
+            for path in [p for p in self._entries if p.parent == namespace_dir]:
+                self._total_bytes -= self._entries.pop(path)
+        shutil.rmtree(namespace_dir, ignore_errors=True)
+
+
+def iter_file(file: BinaryIO, chunk_size: int = FILE_CHUNK_SIZE) -> Iterator[bytes]:
+    """Read an open entry in chunks for a streaming response, closing it at the end."""
+    try:
+        while True:
+            chunk = file.read(chunk_size)
+            if not chunk:
+                return
+            yield chunk
+    finally:
+        file.close()
@@ -0,0 +1,152 @@
+######################################################################################################################
+# General Information
+######################################################################################################################
+# This file contains the named thread pools that blocking service calls run in. Each class of work gets its own
+# bounded pool (a bulkhead), so a burst of slow uploads or heavy listings can't occupy the threads that quick lookups
+# need. Every pool tracks its queue depth and how long tasks waited before starting; with load shedding enabled, a
+# task that waited longer than EXECUTOR_SHED_AFTER_MS is rejected with ExecutorOverloaded instead of being run late.
+# Tasks run in a copy of the submitter's contextvars (request id, user, deadline), and a task whose request deadline
+# passed while it was queued is not started.
+
+
+######################################################################################################################
+# Dependencies
+######################################################################################################################
+
+
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+import contextvars
+import threading
+import time
+
+from .config import config
+from .context import check_deadline
+
+DB_LIGHT = "db-light"  # single-row reads and writes
+DB_HEAVY = "db-heavy"  # listings, bulk and cascading operations
+STORAGE = "storage"  # calls that move object bytes to or from S3
+CPU = "cpu"  # validation and other pure computation
+BULK = "bulk"  # component imports, which run for minutes and are kept off the pools requests wait on
+EXECUTOR_NAMES = (DB_LIGHT, DB_HEAVY, STORAGE, CPU, BULK)
+
+_executors: Dict[str, "InstrumentedExecutor"] = {}
+_executors_lock = threading.Lock()
+
+
+class ExecutorOverloaded(Exception):
+    """A task waited in an executor queue longer than the load-shedding deadline."""
+
+    def __init__(self, name: str, waited: float):
+        super().__init__(f"Executor {name!r} is overloaded (task waited {waited * 1000:.0f} ms)")
+        self.name = name
+        self.waited = waited
+
+
+######################################################################################################################
+# Instrumented Executor
+######################################################################################################################
+
+
+class InstrumentedExecutor:
+    def __init__(self, name: str, max_workers: int):
+        self.name = name
+        self.max_workers = max_workers
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"executor-{name}")
+        self._lock = threading.Lock()
+        self.queued = 0
+        self.active = 0
+        self.completed = 0
+        self.shed = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def submit(self, func: Callable[..., Any], *args, **kwargs) -> Future:
+        enqueued_at = time.monotonic()
+        with self._lock:
+            self.queued += 1
+        context = contextvars.copy_context()
+        return self.pool.submit(context.run, self._run, enqueued_at, func, args, kwargs)
+
+    def _run(self, enqueued_at: float, func: Callable[..., Any], args, kwargs) -> Any:
+        waited = time.monotonic() - enqueued_at
+        shed_after = config.executor_shed_after_ms() / 1000
+        with self._lock:
+            self.queued -= 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+            if shed_after and waited > shed_after:
+                self.shed += 1
+                raise ExecutorOverloaded(self.name, waited)
+            self.active += 1
+        try:
+            check_deadline()
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.completed += 1
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            started = self.completed + self.active
+            return {
+                "max_workers": self.max_workers,
+                "queued": self.queued,
+                "active": self.active,
+                "completed": self.completed,
+                "shed": self.shed,
+                "wait_seconds_total": self.wait_seconds_total,
+                "wait_seconds_max": self.wait_seconds_max,
+                "wait_seconds_avg": self.wait_seconds_total / (started + self.shed) if started + self.shed else 0.0,
+            }
+
+
+######################################################################################################################
+# Registry
+######################################################################################################################
+
+
+def get_executor(name: str) -> InstrumentedExecutor:
+    if name not in EXECUTOR_NAMES:
+        raise ValueError(f"Unknown executor {name!r}")
+    with _executors_lock:
+        executor = _executors.get(name)
+        if executor is None:
+            executor = InstrumentedExecutor(name, config.executor_workers(name))
+            _executors[name] = executor
+    return executor
+
+
+def executor_metrics() -> Dict[str, Dict[str, Any]]:
+    with _executors_lock:
+        executors = list(_executors.values())
+    return {executor.name: executor.metrics() for executor in executors}
+
+
+def render_prometheus() -> str:
+    """Executor metrics in the Prometheus text exposition format."""
+    lines: List[str] = []
+    metrics = executor_metrics()
+    for field, kind in (
+        ("max_workers", "gauge"),
+        ("queued", "gauge"),
+        ("active", "gauge"),
+        ("completed", "counter"),
+        ("shed", "counter"),
+        ("wait_seconds_total", "counter"),
+        ("wait_seconds_max", "gauge"),
+    ):
+        metric = f"solar_executor_{field}"
+        lines.append(f"# TYPE {metric} {kind}")
+        for name, values in metrics.items():
+            lines.append(f'{metric}{{executor="{name}"}} {values[field]}')
+    return "\n".join(lines) + "\n"
+
+
+def shutdown_executors():
+    with _executors_lock:
+        executors = list(_executors.values())
+        _executors.clear()
+    for executor in executors:
+        executor.pool.shutdown(wait=False, cancel_futures=True)
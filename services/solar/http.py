@@ -0,0 +1,140 @@
+######################################################################################################################
+# General Information
+######################################################################################################################
+# This file contains the outbound HTTP layer shared by the API process. Each upstream origin gets one long-lived,
+# keep-alive connection pool (so connection limits apply per host), using HTTP/2 when the h2 package is installed.
+# Async clients serve request handlers on the event loop; sync clients serve code running in worker threads, such as
+# S3 credential refresh. Connection failures are retried by the transport; request_with_retry additionally retries
+# idempotent calls on gateway errors with exponential backoff.
+
+
+######################################################################################################################
+# Dependencies
+######################################################################################################################
+
+
+from typing import Dict, Tuple
+from urllib.parse import urlsplit
+import asyncio
+import importlib.util
+import logging
+import threading
+import time
+
+import httpx
+
+from .config import config
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {502, 503, 504}
+RETRY_BACKOFF = 0.2  # seconds, doubled on every attempt
+
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+_async_clients: Dict[Tuple[str, str], httpx.AsyncClient] = {}
+_sync_clients: Dict[Tuple[str, str], httpx.Client] = {}
+_clients_lock = threading.Lock()
+
+
+######################################################################################################################
+# Clients
+######################################################################################################################
+
+
+def _origin(url: str) -> Tuple[str, str]:
+    parts = urlsplit(url)
+    return parts.scheme, parts.netloc
+
+
+def _transport_options() -> Dict:
+    return {
+        "http2": HTTP2_AVAILABLE,
+        "retries": config.http_retries(),
+        "limits": httpx.Limits(
+            max_connections=config.http_max_connections(),
+            max_keepalive_connections=config.http_max_keepalive_connections(),
+        ),
+    }
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(config.http_timeout(), connect=config.http_connect_timeout())
+
+
+def get_async_client(url: str) -> httpx.AsyncClient:
+    """The pooled async client for the origin of `url`. Must be used from the event loop."""
+    origin = _origin(url)
+    with _clients_lock:
+        client = _async_clients.get(origin)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(transport=httpx.AsyncHTTPTransport(**_transport_options()), timeout=_timeout())
+            _async_clients[origin] = client
+    return client
+
+
+def get_sync_client(url: str) -> httpx.Client:
+    """The pooled sync client for the origin of `url`, for code running in worker threads."""
+    origin = _origin(url)
+    with _clients_lock:
+        client = _sync_clients.get(origin)
+        if client is None or client.is_closed:
+            client = httpx.Client(transport=httpx.HTTPTransport(**_transport_options()), timeout=_timeout())
+            _sync_clients[origin] = client
+    return client
+
+
+async def close_clients():
+    """Close every pooled client; called when the application shuts down."""
+    with _clients_lock:
+        async_clients = list(_async_clients.values())
+        sync_clients = list(_sync_clients.values())
+        _async_clients.clear()
+        _sync_clients.clear()
+    for client in async_clients:
+        await client.aclose()
+    for client in sync_clients:
+        client.close()
+
+
+######################################################################################################################
+# Retries
+######################################################################################################################
+
+
+async def request_with_retry(method: str, url: str, **kwargs) -> httpx.Response:
+    """
+    Send an idempotent request through the pooled client, retrying gateway errors and timeouts.
+
+    Calls with side effects (e.g. redeeming an authorization code) must use get_async_client directly.
+    """
+    client = get_async_client(url)
+    retries = config.http_retries()
+    for attempt in range(retries + 1):
+        try:
+            response = await client.request(method, url, **kwargs)
+            if response.status_code not in RETRYABLE_STATUS_CODES or attempt == retries:
+                return response
+            logger.warning(f"{method} {url} returned {response.status_code}, retrying")
+        except httpx.TimeoutException:
+            if attempt == retries:
+                raise
+            logger.warning(f"{method} {url} timed out, retrying")
+        await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+
+
+def request_with_retry_sync(method: str, url: str, **kwargs) -> httpx.Response:
+    """Blocking counterpart of request_with_retry, for worker threads."""
+    client = get_sync_client(url)
+    retries = config.http_retries()
+    for attempt in range(retries + 1):
+        try:
+            response = client.request(method, url, **kwargs)
+            if response.status_code not in RETRYABLE_STATUS_CODES or attempt == retries:
+                return response
+            logger.warning(f"{method} {url} returned {response.status_code}, retrying")
+        except httpx.TimeoutException:
+            if attempt == retries:
+                raise
+            logger.warning(f"{method} {url} timed out, retrying")
+        time.sleep(RETRY_BACKOFF * 2 ** attempt)
@@ -1,11 +1,27 @@
-import requests
 from pydantic import BaseModel
-from typing import Optional
+from typing import Optional, List, Dict, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import format_datetime, parsedate_to_datetime
+from botocore.exceptions import ClientError
 from .config import config
+from .context import check_deadline
+from .http import request_with_retry_sync
+from .table import Table, ColumnDetails
 import datetime
+import hashlib
+import hmac
+import time
 import boto3
 import uuid
 
+# Uploads are hashed in chunks of this size so the digest can be computed while the body is read
+MEDIA_CHUNK_SIZE = 1024 * 1024
+# S3 DeleteObjects accepts at most this many keys per request
+DELETE_OBJECTS_BATCH_SIZE = 1000
+BULK_STORAGE_WORKERS = 8
+# Lifetime (seconds) of presigned bucket URLs handed to clients
+PRESIGNED_URL_EXPIRY = 3600
+
 
 class S3Client:
     def __init__(self):
@@ -29,7 +45,8 @@ class S3Client:
             and self.expiration > datetime.datetime.now(datetime.timezone.utc)
         ):
             return
-        response = requests.post(
+        response = request_with_retry_sync(
+            "POST",
             f"{self.api_url}/aws/get-s3-credentials",
             json={"orgId": self.org_id, "projectId": self.project_id},
             headers={
@@ -46,7 +63,12 @@ class S3Client:
             aws_secret_access_key=credentials["secretAccessKey"],
             aws_session_token=credentials["sessionToken"],
             region_name=self.aws_region,
-            config=boto3.session.Config(signature_version="s3v4"),
+            config=boto3.session.Config(
+                signature_version="s3v4",
+                connect_timeout=config.s3_connect_timeout(),
+                read_timeout=config.s3_read_timeout(),
+                retries={"max_attempts": 3, "mode": "standard"},
+            ),
         )
         self.expiration = datetime.datetime.fromisoformat(
             credentials["expiration"].replace("Z", "+00:00")
@@ -61,9 +83,25 @@ class MediaFile(BaseModel):
     size: int
     mime_type: str
     bytes: bytes
+    sha256: Optional[str] = None  # Hex digest, filled in during upload when available
+
+
+class MediaBlob(Table):
+    """A content-addressed object in the bucket, shared by every asset with the same bytes."""
+
+    __tablename__ = "media_blobs"
+
+    sha256: str = ColumnDetails(primary_key=True)
+    file_path: str
+    size: int
+    mime_type: str
+    ref_count: int = 0
+    created_at: datetime.datetime = ColumnDetails(default_factory=datetime.datetime.now)
 
 
 def get_client():
+    # S3 work on behalf of a request whose deadline has passed is refused rather than started
+    check_deadline()
     global s3_client
     if s3_client is None:
         s3_client = S3Client()
@@ -80,6 +118,7 @@ def save_to_bucket(media_file: MediaFile, file_path: Optional[str] = None):
         Bucket=client.aws_bucket_name,
         Key=full_path,
         Body=media_file.bytes,
+        ContentType=media_file.mime_type,
     )
     return full_path
 
@@ -93,6 +132,65 @@ def delete_from_bucket(path: str):
     )
 
 
+def _delete_batch(client: S3Client, keys: List[str]) -> List[Dict[str, str]]:
+    try:
+        response = client.s3_client.delete_objects(
+            Bucket=client.aws_bucket_name,
+            Delete={"Objects": [{"Key": key} for key in keys], "Quiet": True},
+        )
+    except Exception as e:
+        return [{"key": key, "error": str(e)} for key in keys]
+    return [
+        {"key": error["Key"], "error": error.get("Message", error.get("Code", "Unknown error"))}
+        for error in response.get("Errors", [])
+    ]
+
+
+def delete_many_from_bucket(paths: List[str]) -> List[Dict[str, str]]:
+    """
+    Delete objects with DeleteObjects, DELETE_OBJECTS_BATCH_SIZE keys per request, batches run concurrently.
+
+    Returns the keys that could not be deleted, with the error for each.
+    """
+    if not paths:
+        return []
+    client = get_client()
+    client.refresh_client_if_expired()
+    keys = list(dict.fromkeys(paths))
+    batches = [keys[i : i + DELETE_OBJECTS_BATCH_SIZE] for i in range(0, len(keys), DELETE_OBJECTS_BATCH_SIZE)]
+    if len(batches) == 1:
+        return _delete_batch(client, batches[0])
+    with ThreadPoolExecutor(max_workers=min(BULK_STORAGE_WORKERS, len(batches))) as pool:
+        results = pool.map(lambda batch: _delete_batch(client, batch), batches)
+    return [error for errors in results for error in errors]
+
+
+def _copy_object(client: S3Client, source: str, destination: str) -> Optional[Dict[str, str]]:
+    try:
+        client.s3_client.copy_object(
+            Bucket=client.aws_bucket_name,
+            Key=destination,
+            CopySource={"Bucket": client.aws_bucket_name, "Key": source},
+        )
+    except Exception as e:
+        return {"key": source, "destination": destination, "error": str(e)}
+    return None
+
+
+def copy_many_in_bucket(copies: List[Tuple[str, str]]) -> List[Dict[str, str]]:
+    """
+    Copy objects given as (source key, destination key) pairs concurrently; a source may be copied to several
+    destinations. Returns the copies that failed, with the source as "key".
+    """
+    if not copies:
+        return []
+    client = get_client()
+    client.refresh_client_if_expired()
+    with ThreadPoolExecutor(max_workers=min(BULK_STORAGE_WORKERS, len(copies))) as pool:
+        results = pool.map(lambda item: _copy_object(client, *item), copies)
+    return [error for error in results if error is not None]
+
+
 def get_from_bucket(path: str) -> MediaFile:
     client = get_client()
     client.refresh_client_if_expired()
@@ -111,7 +209,100 @@ def get_from_bucket(path: str) -> MediaFile:
     )
 
 
-def generate_presigned_url(path: str, expires_in: int = 3600) -> str:
+class MediaStream:
+    """An object body streamed from the bucket, with the HTTP status and headers needed to proxy it."""
+
+    def __init__(self, status_code: int, headers: Dict[str, str], body=None):
+        self.status_code = status_code
+        self.headers = headers
+        self.body = body
+
+    def iter_chunks(self, chunk_size: int = MEDIA_CHUNK_SIZE):
+        if self.body is None:
+            return
+        try:
+            for chunk in self.body.iter_chunks(chunk_size):
+                yield chunk
+        finally:
+            self.body.close()
+
+
+def stream_from_bucket(
+    path: str,
+    range_header: Optional[str] = None,
+    if_none_match: Optional[str] = None,
+    if_modified_since: Optional[str] = None,
+) -> MediaStream:
+    """
+    Open an object for streaming without reading its body.
+
+    Range and conditional headers are passed through to S3, so 206, 304 and 416 responses come back
+    as a MediaStream with no body.
+    """
+    client = get_client()
+    client.refresh_client_if_expired()
+
+    base_path = client.get_base_path()
+    full_path = path if path.startswith(f"{base_path}/") else f"{base_path}/{path}"
+
+    params = {"Bucket": client.aws_bucket_name, "Key": full_path}
+    if range_header:
+        params["Range"] = range_header
+    if if_none_match:
+        params["IfNoneMatch"] = if_none_match
+    elif if_modified_since:
+        try:
+            params["IfModifiedSince"] = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            pass
+
+    try:
+        response = client.s3_client.get_object(**params)
+    except ClientError as e:
+        status_code = e.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+        if status_code not in (304, 412, 416):
+            raise
+        s3_headers = e.response.get("ResponseMetadata", {}).get("HTTPHeaders", {})
+        headers = {"Accept-Ranges": "bytes"}
+        for name in ("etag", "last-modified", "content-range"):
+            if name in s3_headers:
+                headers[name.title()] = s3_headers[name]
+        return MediaStream(status_code, headers)
+
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Type": response.get("ContentType", "application/octet-stream"),
+        "Content-Length": str(response["ContentLength"]),
+        "ETag": response["ETag"],
+        "Last-Modified": format_datetime(response["LastModified"], usegmt=True),
+    }
+    if "ContentRange" in response:
+        headers["Content-Range"] = response["ContentRange"]
+    return MediaStream(206 if "ContentRange" in response else 200, headers, response["Body"])
+
+
+def media_signature_expiry() -> int:
+    """
+    Expiry (unix seconds) for a newly signed media URL. It is rounded up to a multiple of the TTL, so URLs signed
+    within the same window are identical and stay cacheable.
+    """
+    ttl = config.media_signed_url_ttl()
+    return (int(time.time()) // ttl + 2) * ttl
+
+
+def sign_media(message: str, expires: int) -> str:
+    """HMAC signature for media URLs that are served without an Authorization header, valid until `expires`."""
+    secret = config.media_signing_secret().encode()
+    return hmac.new(secret, f"{message}&exp={expires}".encode(), hashlib.sha256).hexdigest()
+
+
+def verify_media_signature(message: str, signature: str, expires: int) -> bool:
+    if expires < time.time() or config.media_signing_secret(throw_if_missing=False) is None:
+        return False
+    return hmac.compare_digest(sign_media(message, expires), signature)
+
+
+def generate_presigned_url(path: str, expires_in: int = PRESIGNED_URL_EXPIRY) -> str:
     client = get_client()
     client.refresh_client_if_expired()
     return client.s3_client.generate_presigned_url(
@@ -119,3 +310,111 @@ def generate_presigned_url(path: str, expires_in: int = 3600) -> str:
         Params={"Bucket": client.aws_bucket_name, "Key": path},
         ExpiresIn=expires_in,
     )
+
+
+def compute_sha256(media_file: MediaFile) -> str:
+    """Hash the file in MEDIA_CHUNK_SIZE slices, reusing the digest computed at upload time if present."""
+    if media_file.sha256 is None:
+        digest = hashlib.sha256()
+        view = memoryview(media_file.bytes)
+        for offset in range(0, len(view), MEDIA_CHUNK_SIZE):
+            digest.update(view[offset : offset + MEDIA_CHUNK_SIZE])
+        media_file.sha256 = digest.hexdigest()
+    return media_file.sha256
+
+
+def get_blob_path(sha256: str) -> str:
+    client = get_client()
+    return f"{client.get_base_path()}/blobs/{sha256[:2]}/{sha256}"
+
+
+def save_blob(media_file: MediaFile) -> MediaBlob:
+    """
+    Store a file under its SHA-256 and take a reference on it.
+
+    A blob row only exists while its object is in the bucket: an existing row just gets its ref_count incremented,
+    otherwise the object is PUT first (the key is content-addressed, so concurrent PUTs of the same bytes are
+    harmless) and the row is inserted after it. A failed PUT leaves nothing behind.
+    """
+    sha256 = compute_sha256(media_file)
+    # Waits for a release holding the row lock, and finds no row if that release removed the blob
+    results = MediaBlob.sql(
+        "UPDATE media_blobs SET ref_count = ref_count + 1 WHERE sha256 = %(sha256)s RETURNING *",
+        {"sha256": sha256},
+    )
+    if results:
+        return MediaBlob(**results[0])
+
+    full_path = get_blob_path(sha256)
+    client = get_client()
+    client.refresh_client_if_expired()
+    client.s3_client.put_object(
+        Bucket=client.aws_bucket_name,
+        Key=full_path,
+        Body=media_file.bytes,
+        ContentType=media_file.mime_type,
+    )
+    results = MediaBlob.sql(
+        """
+        INSERT INTO media_blobs (sha256, file_path, size, mime_type, ref_count, created_at)
+        VALUES (%(sha256)s, %(file_path)s, %(size)s, %(mime_type)s, 1, %(created_at)s)
+        ON CONFLICT (sha256) DO UPDATE SET ref_count = media_blobs.ref_count + 1
+        RETURNING *
+        """,
+        {
+            "sha256": sha256,
+            "file_path": full_path,
+            "size": media_file.size,
+            "mime_type": media_file.mime_type,
+            "created_at": datetime.datetime.now(),
+        },
+    )
+    return MediaBlob(**results[0])
+
+
+def release_blob(sha256: str) -> bool:
+    """
+    Drop one reference to a blob. The row and the bucket object are removed with the last reference.
+
+    The object is deleted while the row is locked, so an upload of the same bytes either takes its reference
+    before the release or PUTs the object again after it. Returns True if the blob was deleted.
+    """
+    return sha256 in release_blobs([sha256])[0]
+
+
+def release_blobs(sha256s: List[str]) -> Tuple[Dict[str, str], List[Dict[str, str]]]:
+    """
+    Drop one reference per entry (a digest may repeat), removing blobs left unreferenced together with their
+    objects, as release_blob does.
+
+    Returns the deleted blobs as digest -> bucket path, and the objects that could not be deleted (see
+    delete_many_from_bucket); their rows are removed regardless, as an orphaned object is only wasted space.
+    """
+    if not sha256s:
+        return {}, []
+    counts: Dict[str, int] = {}
+    for sha256 in sha256s:
+        counts[sha256] = counts.get(sha256, 0) + 1
+    with MediaBlob.transaction() as cursor:
+        # Locked in digest order, so concurrent releases can't deadlock
+        cursor.execute(
+            "SELECT sha256, file_path, ref_count FROM media_blobs WHERE sha256 = ANY(%(sha256s)s) ORDER BY sha256 FOR UPDATE",
+            {"sha256s": list(counts)},
+        )
+        rows = cursor.fetchall()
+        released = {row["sha256"]: row["file_path"] for row in rows if row["ref_count"] <= counts[row["sha256"]]}
+        remaining = {row["sha256"]: counts[row["sha256"]] for row in rows if row["sha256"] not in released}
+        if remaining:
+            cursor.execute(
+                """
+                UPDATE media_blobs SET ref_count = media_blobs.ref_count - released.count
+                FROM (SELECT unnest(%(sha256s)s::text[]) AS sha256, unnest(%(counts)s::int[]) AS count) AS released
+                WHERE media_blobs.sha256 = released.sha256
+                """,
+                {"sha256s": list(remaining), "counts": list(remaining.values())},
+            )
+        errors = []
+        if released:
+            errors = delete_many_from_bucket(list(released.values()))
+            cursor.execute("DELETE FROM media_blobs WHERE sha256 = ANY(%(sha256s)s)", {"sha256s": list(released)})
+    return released, errors
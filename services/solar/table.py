@@ -10,18 +10,22 @@
 ######################################################################################################################
 
 
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterator, Optional
+from contextlib import contextmanager
 from pydantic import BaseModel, Field
 
 from psycopg.rows import dict_row
 from psycopg_pool import ConnectionPool
-from psycopg import Connection, Error as PsycopgError
+from psycopg import Connection, Cursor, Error as PsycopgError
+from psycopg.errors import QueryCanceled
 from psycopg.types.json import Jsonb
 
 from .config import config
+from .context import DeadlineExceeded, check_deadline, remaining_time
 
 import logging
 import time
+import uuid
 
 logger = logging.getLogger(__name__)
 
@@ -161,17 +165,25 @@ class Table(BaseModel):
             conn = None
 
             try:
+                # Within a request, never wait for a connection or run a statement past the request's deadline
+                check_deadline()
+                remaining = remaining_time()
+                pool_timeout = DEFAULT_TIMEOUT if remaining is None else min(remaining, DEFAULT_TIMEOUT)
                 if pg_key in pool:
                     current_pool = pool[pg_key]
-                    conn = current_pool.getconn()
+                    conn = current_pool.getconn(timeout=pool_timeout)
                 else:
                     pool = get_pool(reset=True)
                     current_pool = pool[pg_key]
-                    conn = current_pool.getconn()
+                    conn = current_pool.getconn(timeout=pool_timeout)
 
                 with conn:
                     with conn.cursor() as cursor:
                         try:
+                            remaining = remaining_time()
+                            if remaining is not None:
+                                # SET LOCAL only lasts for this transaction, so pooled connections are unaffected
+                                cursor.execute(f"SET LOCAL statement_timeout = {max(1, int(remaining * 1000))}")
                             if schema_name != "public" and schema_name != "auth":
                                 cursor.execute(f"SET search_path TO {schema_name}")
                             cursor.execute(sql_statement, params)
@@ -185,6 +197,11 @@ class Table(BaseModel):
                 return  # Success, exit the retry loop
 
             except PsycopgError as e:
+                # Past the deadline (or cancelled by the statement_timeout derived from it) there is no point retrying
+                remaining = remaining_time()
+                if remaining is not None and (remaining <= 0 or isinstance(e, QueryCanceled)):
+                    raise DeadlineExceeded("Request deadline exceeded during a database operation") from e
+
                 retry_count += 1
                 logger.warning(
                     f"Database operation failed (attempt {retry_count}/{max_retries}): {str(e)}"
@@ -225,6 +242,85 @@ class Table(BaseModel):
                         except Exception:
                             pass
 
+    @classmethod
+    def stream(
+        cls,
+        sql_statement: str,
+        params: Dict[str, Any] | None = None,
+        batch_size: int = 1000,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Yield the rows of a query from a server-side cursor, fetching batch_size rows per round trip, so a result
+        of any size is never held in memory.
+
+        The connection stays checked out until the generator is exhausted or closed. Streams are not bound by the
+        request deadline, since they are consumed while the response is being sent; there are no retries either,
+        as rows may already have been yielded.
+        """
+        pg_key = config.get_pg_key_for_table(cls.__name__)
+        pool = get_pool()
+        if pg_key not in pool:
+            pool = get_pool(reset=True)
+        current_pool = pool[pg_key]
+        conn = current_pool.getconn(timeout=DEFAULT_TIMEOUT)
+        try:
+            with conn:
+                # Named cursors are server-side in psycopg
+                with conn.cursor(name=f"stream_{uuid.uuid4().hex}") as cursor:
+                    cursor.itersize = batch_size
+                    cursor.execute(sql_statement, params)
+                    yield from cursor
+        finally:
+            current_pool.putconn(conn)
+
+    @classmethod
+    @contextmanager
+    def transaction(cls) -> Iterator[Cursor]:
+        """
+        A cursor whose statements run in one transaction, committed when the block exits and rolled back if it
+        raises. For work that must hold row locks across several statements (SELECT ... FOR UPDATE) or across a
+        call outside the database. Like sql, it doesn't start past the request's deadline; there are no retries,
+        since the block may have side effects.
+        """
+        check_deadline()
+        remaining = remaining_time()
+        pg_key = config.get_pg_key_for_table(cls.__name__)
+        pool = get_pool()
+        if pg_key not in pool:
+            pool = get_pool(reset=True)
+        current_pool = pool[pg_key]
+        conn = current_pool.getconn(timeout=DEFAULT_TIMEOUT if remaining is None else min(remaining, DEFAULT_TIMEOUT))
+        try:
+            with conn:
+                with conn.cursor() as cursor:
+                    if remaining is not None:
+                        cursor.execute(f"SET LOCAL statement_timeout = {max(1, int(remaining * 1000))}")
+                    yield cursor
+        finally:
+            current_pool.putconn(conn)
+
+    @classmethod
+    @contextmanager
+    def session(cls) -> Iterator[Cursor]:
+        """
+        A cursor on an autocommit connection, for statements that can't run inside a transaction block (CREATE
+        INDEX CONCURRENTLY) and for session-level advisory locks, which must be released before the block exits.
+        Meant for startup and maintenance work: there is no deadline and no retries.
+        """
+        pg_key = config.get_pg_key_for_table(cls.__name__)
+        pool = get_pool()
+        if pg_key not in pool:
+            pool = get_pool(reset=True)
+        current_pool = pool[pg_key]
+        conn = current_pool.getconn(timeout=DEFAULT_TIMEOUT)
+        try:
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                yield cursor
+        finally:
+            conn.autocommit = False
+            current_pool.putconn(conn)
+
     def _prepare_value(self, value):
         """Helper to recursively prepare values for database insertion"""
         if isinstance(value, list):
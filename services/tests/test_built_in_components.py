@@ -0,0 +1,32 @@
+import json
+import warnings
+from typing import List
+
+import pytest
+from pydantic import TypeAdapter
+
+from core.built_in_components import (
+    DEFAULT_MANIFEST_DIR, BuiltInComponent, ManifestError, compile_catalog, load_catalog,
+)
+
+
+def test_catalog_body_matches_the_response_model(tmp_path):
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        catalog = load_catalog(DEFAULT_MANIFEST_DIR, tmp_path / "catalog.json")
+    components = TypeAdapter(List[BuiltInComponent]).validate_json(catalog.body)
+    assert components
+    assert all(component.id == catalog.get(component.id).id for component in components)
+
+
+def test_compiled_catalog_is_loaded(tmp_path):
+    compiled = compile_catalog(DEFAULT_MANIFEST_DIR, tmp_path / "catalog.json")
+    assert load_catalog(DEFAULT_MANIFEST_DIR, tmp_path / "catalog.json").etag == compiled.etag
+
+
+def test_duplicate_versions_are_rejected(tmp_path):
+    component = {"id": "hero", "version": "1.0.0", "name": "Hero", "category": "layout"}
+    for name in ("a.json", "b.json"):
+        (tmp_path / name).write_text(json.dumps({"manifest_version": 1, "components": [component]}))
+    with pytest.raises(ManifestError):
+        load_catalog(tmp_path, tmp_path / "catalog.json")
@@ -0,0 +1,76 @@
+import json
+import shutil
+import subprocess
+
+import pytest
+
+from core.component_compiler import compile_component
+from core.component_validation import CodeSyntaxError
+
+REACT_STUB = "const React={createElement:(type,props,...children)=>({type,props,children}),Fragment:'Fragment'};\n"
+
+
+def render(module: str, props: dict):
+    """Run the compiled module in node against a stub React and return what its default export renders."""
+    if shutil.which("node") is None:
+        pytest.skip("node is not installed")
+    script = REACT_STUB + module.replace('import React from"react";\n', "").replace("export default ", "const __default=")
+    script = script.replace("export ", "") + f";console.log(JSON.stringify(__default({json.dumps(props)})))"
+    output = subprocess.run(["node", "-e", script], capture_output=True, text=True, check=True).stdout
+    return json.loads(output)
+
+
+def test_jsx_becomes_create_element():
+    module = compile_component('function Hero({ title }) {\n  return <h1 className="title">Hi {title}</h1>;\n}')
+    assert 'React.createElement("h1",{className:"title"},"Hi ",title)' in module
+    assert module.startswith('import React from"react";')
+
+
+def test_member_tags_and_spread():
+    module = compile_component("function Hero(props) { return <ui.Box {...props}><b /></ui.Box>; }")
+    assert 'React.createElement(ui.Box,{...props},React.createElement("b",null))' in module
+
+
+def test_fragment():
+    assert "React.createElement(React.Fragment,null" in compile_component("const Hero = () => <><i /></>;")
+
+
+def test_comments_are_dropped():
+    module = compile_component("// a comment\nfunction Hero() { /* another */ return <div>{/* jsx comment */}</div>; }")
+    assert "comment" not in module
+
+
+@pytest.mark.parametrize("code, name", [
+    ("function helper() {}\nfunction Hero() { return <div />; }", "Hero"),
+    ("export function Hero() { return <div />; }", "Hero"),
+    ("function helper() {}\nexport const Card = () => <p />;", "Card"),
+    ("function Hero() { return <div />; }\nexport { Hero };", "Hero"),
+])
+def test_default_export_is_added(code, name):
+    assert compile_component(code).endswith(f";export default {name};")
+
+
+@pytest.mark.parametrize("code", [
+    "function Hero() { return <div />; }\nexport default Hero;",
+    "function Hero() { return <div />; }\nexport { Hero as default };",
+])
+def test_existing_default_export_is_kept(code):
+    assert compile_component(code).count("default") == 1
+
+
+def test_unclosed_element():
+    with pytest.raises(CodeSyntaxError):
+        compile_component("function Hero() { return <div>; }")
+
+
+def test_compiled_module_renders():
+    module = compile_component(
+        'export function Hero({ title = "Hello", items = [] }) {\n'
+        '  return <ul className="list">{items.map(item => <li key={item}>{title} {item}</li>)}</ul>;\n'
+        "}"
+    )
+    assert render(module, {"items": ["a"]}) == {
+        "type": "ul",
+        "props": {"className": "list"},
+        "children": [[{"type": "li", "props": {"key": "a"}, "children": ["Hello", " ", "a"]}]],
+    }
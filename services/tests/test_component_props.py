@@ -0,0 +1,68 @@
+import pytest
+
+from core import component_props
+from core.component_props import InvalidComponentProps, compile_props_schema, normalize_component_props
+
+SCHEMA = {
+    "title": {"type": "string", "default": "Hello"},
+    "count": {"type": "number", "default": 3},
+    "enabled": {"type": "boolean", "default": False},
+    "size": {"type": "select", "options": ["sm", "md", "lg"], "default": "md"},
+    "color": {"type": "color", "default": "#000000"},
+    "image": {"type": "image", "default": ""},
+}
+
+
+def test_defaults_are_filled_in():
+    props, errors = compile_props_schema(SCHEMA)({})
+    assert errors == []
+    assert props == {"title": "Hello", "count": 3, "enabled": False, "size": "md", "color": "#000000", "image": ""}
+
+
+def test_values_are_coerced():
+    props, errors = compile_props_schema(SCHEMA)({"count": "12", "enabled": "true", "title": 5})
+    assert errors == []
+    assert (props["count"], props["enabled"], props["title"]) == (12, True, "5")
+
+
+def test_cleared_fields_take_their_default():
+    props, errors = compile_props_schema(SCHEMA)({"count": "", "color": " ", "title": ""})
+    assert errors == []
+    assert (props["count"], props["color"], props["title"]) == (3, "#000000", "")
+
+
+@pytest.mark.parametrize("color", ["#fff", "red", "rgb(0, 0, 0)", "hsl(var(--primary))", "color-mix(in srgb, red 50%, blue)"])
+def test_valid_colors(color):
+    assert compile_props_schema(SCHEMA)({"color": color})[1] == []
+
+
+@pytest.mark.parametrize("props", [
+    {"count": "many"},
+    {"enabled": "yes"},
+    {"size": "xl"},
+    {"color": "red; background: url(x)"},
+    {"color": "rgb(0, 0, 0"},
+    {"image": "javascript:alert(1)"},
+])
+def test_invalid_props(props):
+    assert len(compile_props_schema(SCHEMA)(props)[1]) == 1
+
+
+def test_required_prop():
+    validate = compile_props_schema({"href": {"type": "image", "required": True}})
+    assert validate({})[1] == ["href: is required"]
+    assert validate({"href": ""})[1] == ["href: is required"]
+
+
+def test_unknown_props_pass_through():
+    props, errors = compile_props_schema(SCHEMA)({"children": [1, 2]})
+    assert errors == []
+    assert props["children"] == [1, 2]
+
+
+def test_invalid_instances_raise_with_every_error(monkeypatch):
+    monkeypatch.setattr(component_props, "get_props_validators", lambda keys: {("hero", "1.0.0"): compile_props_schema(SCHEMA)})
+    content = {"components": [{"id": "a", "componentId": "hero", "componentVersion": "1.0.0", "props": {"count": "x", "size": "xl"}}]}
+    with pytest.raises(InvalidComponentProps) as error:
+        normalize_component_props(content)
+    assert error.value.errors == ["a.count: expected a number", "a.size: expected one of sm, md, lg"]
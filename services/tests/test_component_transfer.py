@@ -0,0 +1,43 @@
+import json
+import time
+
+from core import component_transfer
+from core.component_transfer import _batches, import_lines
+from solar.context import request_deadline, set_deadline
+
+
+def line(**fields) -> bytes:
+    return json.dumps({"name": "Hero", "code": "function Hero() { return <div />; }", **fields}).encode() + b"\n"
+
+
+def test_batches_carry_failures_and_first_line():
+    lines = [line(), b"not json\n", b"\n", line(), line()]
+    batches = list(_batches(lines, 2))
+    assert [[number for number, _ in batch] for batch, _, _ in batches] == [[1, 4], [5]]
+    assert [[number for number, _ in failures] for _, failures, _ in batches] == [[2], []]
+    assert [first_line for _, _, first_line in batches] == [1, 5]
+
+
+def test_duplicate_ids_fail():
+    component_id = "6f0c1d5e-8a57-4a52-9a45-2a1f3f0b7c11"
+    batch, failures, _ = next(_batches([line(id=component_id), line(id=component_id)], 10))
+    assert len(batch) == 1
+    assert failures == [(2, f"Component {component_id} appears more than once")]
+
+
+def test_import_stops_between_batches_at_the_deadline(monkeypatch):
+    imported = []
+
+    def import_batch(user_id, batch, validator, result, public_categories, new_versions):
+        imported.extend(number for number, _ in batch)
+        result.created += len(batch)
+        time.sleep(0.05)
+
+    monkeypatch.setattr(component_transfer, "_import_batch", import_batch)
+    token = set_deadline(0.08)
+    try:
+        result = import_lines("user", [line() for _ in range(6)], 2, set(), [])
+    finally:
+        request_deadline.reset(token)
+    assert imported == [1, 2]
+    assert (result.created, result.complete, result.resume_line) == (2, False, 3)
@@ -0,0 +1,18 @@
+from core.component_usage import count_usage, iter_instances
+
+
+def test_nested_instances_are_counted():
+    content = {"components": [
+        {"id": "a", "componentId": "section", "componentVersion": "1.0.0", "children": [
+            {"id": "b", "componentId": "hero"},
+            {"id": "c", "componentId": "card", "props": {"slots": {"footer": [{"id": "d", "componentId": "hero"}]}}},
+        ]},
+        {"id": "e", "componentId": "hero"},
+    ]}
+    assert [instance["id"] for instance in iter_instances(content)] == ["a", "b", "c", "d", "e"]
+    assert count_usage(content) == {("section", "1.0.0"): 1, ("hero", None): 3, ("card", None): 1}
+
+
+def test_content_without_components():
+    assert count_usage(None) == {}
+    assert count_usage({"components": None}) == {}
@@ -0,0 +1,77 @@
+import pytest
+
+from core.component_validation import validate_code
+
+COMPONENT = """
+function Hero({ title = "Hello" }) {
+  return <h1 className="title">{title}</h1>;
+}
+
+export default Hero;
+"""
+
+
+def errors(code: str):
+    result = validate_code(code)
+    assert not result["valid"]
+    return result["errors"]
+
+
+def test_valid_component():
+    result = validate_code(COMPONENT)
+    assert result["valid"], result["errors"]
+
+
+@pytest.mark.parametrize("expression", [
+    "eval('1')",
+    "self.eval('1')",
+    "window.eval('1')",
+    "document.defaultView.eval('1')",
+    "(0, eval)('1')",
+    "eval?.('1')",
+    "self['eval']('1')",
+    "new Function('return 1')()",
+    "fetch('/api')",
+    "self.fetch('/api')",
+    "top.location",
+    "parent.postMessage('x', '*')",
+    "opener.location",
+    "frames[0]",
+])
+def test_blocked_expressions(expression):
+    errors(f"function Hero() {{ {expression}; return <div />; }}\nexport default Hero;")
+
+
+def test_aliased_eval():
+    errors("const e = eval;\nfunction Hero() { e('1'); return <div />; }\nexport default Hero;")
+
+
+def test_blocked_names_in_comments_and_strings_are_ignored():
+    code = COMPONENT + "\n// eval('x') and fetch('/api')\nconst text = 'self.eval(1)';\n"
+    result = validate_code(code)
+    assert result["valid"], result["errors"]
+
+
+def test_string_event_handler():
+    errors('function Hero() { return <button onClick="alert(1)">x</button>; }\nexport default Hero;')
+
+
+def test_function_event_handler():
+    result = validate_code("function Hero({ onSelect }) { return <button onClick={onSelect}>x</button>; }\nexport default Hero;")
+    assert result["valid"], result["errors"]
+
+
+def test_javascript_url():
+    errors('function Hero() { return <a href="java\tscript:alert(1)">x</a>; }\nexport default Hero;')
+
+
+def test_regex_and_division():
+    code = "function Hero({ a = 4, b = 2 }) { const r = /<div>/g; return <p>{a / b}{r.test('x') ? 1 : 0}</p>; }\nexport default Hero;"
+    result = validate_code(code)
+    assert result["valid"], result["errors"]
+
+
+def test_syntax_error_has_location():
+    result = validate_code("function Hero() { return <div>; }")
+    assert not result["valid"]
+    assert result["diagnostics"][0]["line"] == 1
@@ -0,0 +1,60 @@
+import uuid
+
+from core import media_derivatives
+from core.media_asset import MediaAsset
+from solar.media import MediaFile
+
+
+def asset_row(**fields) -> dict:
+    return {
+        "id": uuid.uuid4(),
+        "user_id": uuid.uuid4(),
+        "name": "photo",
+        "original_filename": "photo.jpg",
+        "file_path": "blobs/abc",
+        "content_hash": "abc",
+        "file_size": 10,
+        "mime_type": "image/jpeg",
+        **fields,
+    }
+
+
+def fake_render(data, mime_type):
+    return [{"width": 320, "height": 240, "mime_type": "image/webp", "bytes": b"webp"}]
+
+
+def stub_storage(monkeypatch, saved, deleted):
+    class Pool:
+        def submit(self, fn, *args):
+            class Done:
+                def result(self):
+                    return fn(*args)
+            return Done()
+
+    monkeypatch.setattr(media_derivatives, "get_process_pool", lambda: Pool())
+    monkeypatch.setattr(media_derivatives, "render_derivatives", fake_render)
+    monkeypatch.setattr(media_derivatives, "get_from_bucket", lambda path: MediaFile(size=1, mime_type="image/jpeg", bytes=b"x"))
+    monkeypatch.setattr(media_derivatives, "save_to_bucket", lambda file, path: saved.append(path) or path)
+    monkeypatch.setattr(media_derivatives, "delete_many_from_bucket", lambda paths: deleted.extend(paths) or [])
+
+
+def test_asset_deleted_while_rendering_writes_nothing(monkeypatch):
+    row = asset_row()
+    saved, deleted = [], []
+    stub_storage(monkeypatch, saved, deleted)
+    queries = iter([[row], [], []])  # the asset, no shared derivatives, then gone on the re-check
+    monkeypatch.setattr(MediaAsset, "sql", classmethod(lambda cls, statement, params=None: next(queries)))
+    assert media_derivatives.generate_derivatives(row["id"]) == {}
+    assert saved == [] and deleted == []
+
+
+def test_asset_deleted_while_uploading_removes_derivatives(monkeypatch):
+    row = asset_row()
+    saved, deleted = [], []
+    stub_storage(monkeypatch, saved, deleted)
+    # the asset, no shared derivatives, still there on the re-check, the UPDATE finds no row, no other blob reference
+    queries = iter([[row], [], [{"?column?": 1}], [], []])
+    monkeypatch.setattr(MediaAsset, "sql", classmethod(lambda cls, statement, params=None: next(queries)))
+    assert media_derivatives.generate_derivatives(row["id"]) == {}
+    assert saved == ["derivatives/abc/320w.webp"]
+    assert deleted == saved